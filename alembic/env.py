@@ -12,6 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from thermostat_backend.models import Base
 from thermostat_backend.database import get_database_url
+from thermostat_backend.partitions import init_partitions
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -80,6 +81,11 @@ def run_migrations_online() -> None:
         with context.begin_transaction():
             context.run_migrations()
 
+    # Per-year status partitions carry only the statuses table and track their own schema steps
+    partitions = init_partitions()
+    if partitions is not None:
+        partitions.migrate()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,72 @@
+"""create_core_tables
+
+Revision ID: 0f2b7c4e9a61
+Revises: 
+Create Date: 2026-10-19 18:42:03.114872
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f2b7c4e9a61'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - the tables the app created with create_all before migrations were added.
+
+    Databases from that time already have them; an empty database gets them here
+    so that later revisions, and the app, find them.
+    """
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+
+    if 'statuses' not in tables:
+        op.create_table(
+            'statuses',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.String(), nullable=False),
+            sa.Column('end_time', sa.String(), nullable=False),
+            sa.Column('minutes_heating', sa.Integer(), nullable=False),
+            sa.Column('average_indoor_temp', sa.Float(), nullable=False),
+            sa.Column('average_outdoor_temp', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'sensor_readings' not in tables:
+        op.create_table(
+            'sensor_readings',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity_id', sa.String(), nullable=False),
+            sa.Column('state', sa.String(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_sensor_readings_entity_id'), 'sensor_readings', ['entity_id'], unique=False)
+        op.create_index(op.f('ix_sensor_readings_timestamp'), 'sensor_readings', ['timestamp'], unique=False)
+
+    if 'weather_forecasts' not in tables:
+        op.create_table(
+            'weather_forecasts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity_id', sa.String(), nullable=False),
+            sa.Column('forecast_data', sa.Text(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_weather_forecasts_entity_id'), 'weather_forecasts', ['entity_id'], unique=False)
+        op.create_index(op.f('ix_weather_forecasts_timestamp'), 'weather_forecasts', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    for table in ('weather_forecasts', 'sensor_readings', 'statuses'):
+        if table in tables:
+            op.drop_table(table)
@@ -10,6 +10,8 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 
+from thermostat_backend.batched_migration import batched_migration
+
 
 # revision identifiers, used by Alembic.
 revision: str = '1be8233b83a5'
@@ -19,7 +21,12 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    """Upgrade schema - remove entity_id column if it exists."""
+    """Upgrade schema - remove entity_id column if it exists.
+
+    Rows are copied in chunks with checkpoints, so a large table is never
+    locked for the whole copy and an interrupted upgrade resumes where it
+    stopped.
+    """
     bind = op.get_bind()
     inspector = sa.inspect(bind)
 
@@ -28,55 +35,64 @@ def upgrade() -> None:
         columns = [col['name'] for col in inspector.get_columns('daily_power_usage')]
 
         if 'entity_id' in columns:
-            # SQLite doesn't support DROP COLUMN directly, need to recreate table
-            # Drop temp table if it exists from previous failed migration
-            op.execute("DROP TABLE IF EXISTS daily_power_usage_new")
-
-            op.execute("""
-                CREATE TABLE daily_power_usage_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date DATE NOT NULL,
-                    import_start_value REAL NOT NULL,
-                    import_end_value REAL NOT NULL,
-                    daily_import REAL NOT NULL,
-                    export_start_value REAL NOT NULL DEFAULT 0.0,
-                    export_end_value REAL NOT NULL DEFAULT 0.0,
-                    daily_export REAL NOT NULL DEFAULT 0.0,
-                    inverter_daily_yield REAL NOT NULL DEFAULT 0.0,
-                    daily_usage REAL NOT NULL,
-                    timestamp DATETIME NOT NULL
+            with batched_migration(revision) as migration:
+                # SQLite doesn't support DROP COLUMN directly, need to recreate table
+                migration.start(_create_new_table)
+
+                # Copy data from old table to new (excluding entity_id)
+                # Handle both old schema (start_value, end_value) and new schema columns
+                migration.copy(
+                    'daily_power_usage',
+                    'daily_power_usage_new',
+                    ['id', 'date', 'import_start_value', 'import_end_value', 'daily_import',
+                     'export_start_value', 'export_end_value', 'daily_export',
+                     'inverter_daily_yield', 'daily_usage', 'timestamp'],
+                    ['id', 'date',
+                     'COALESCE(import_start_value, start_value, 0.0)',
+                     'COALESCE(import_end_value, end_value, 0.0)',
+                     'COALESCE(daily_import, daily_usage, 0.0)',
+                     'COALESCE(export_start_value, 0.0)',
+                     'COALESCE(export_end_value, 0.0)',
+                     'COALESCE(daily_export, 0.0)',
+                     'COALESCE(inverter_daily_yield, 0.0)',
+                     'COALESCE(daily_usage, 0.0)',
+                     'timestamp']
                 )
-            """)
-
-            # Copy data from old table to new (excluding entity_id)
-            # Handle both old schema (start_value, end_value) and new schema columns
-            op.execute("""
-                INSERT INTO daily_power_usage_new
-                (id, date, import_start_value, import_end_value, daily_import,
-                 export_start_value, export_end_value, daily_export,
-                 inverter_daily_yield, daily_usage, timestamp)
-                SELECT id, date,
-                       COALESCE(import_start_value, start_value, 0.0),
-                       COALESCE(import_end_value, end_value, 0.0),
-                       COALESCE(daily_import, daily_usage, 0.0),
-                       COALESCE(export_start_value, 0.0),
-                       COALESCE(export_end_value, 0.0),
-                       COALESCE(daily_export, 0.0),
-                       COALESCE(inverter_daily_yield, 0.0),
-                       COALESCE(daily_usage, 0.0),
-                       timestamp
-                FROM daily_power_usage
-            """)
-
-            # Drop old table
-            op.execute("DROP TABLE daily_power_usage")
-
-            # Rename new table
-            op.execute("ALTER TABLE daily_power_usage_new RENAME TO daily_power_usage")
-
-            # Recreate indexes
-            op.create_index(op.f('ix_daily_power_usage_date'), 'daily_power_usage', ['date'], unique=True)
-            op.create_index(op.f('ix_daily_power_usage_timestamp'), 'daily_power_usage', ['timestamp'], unique=False)
+
+                migration.finish(_replace_old_table)
+
+
+def _create_new_table() -> None:
+    # Drop temp table if it exists from previous failed migration
+    op.execute("DROP TABLE IF EXISTS daily_power_usage_new")
+
+    op.execute("""
+        CREATE TABLE daily_power_usage_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE NOT NULL,
+            import_start_value REAL NOT NULL,
+            import_end_value REAL NOT NULL,
+            daily_import REAL NOT NULL,
+            export_start_value REAL NOT NULL DEFAULT 0.0,
+            export_end_value REAL NOT NULL DEFAULT 0.0,
+            daily_export REAL NOT NULL DEFAULT 0.0,
+            inverter_daily_yield REAL NOT NULL DEFAULT 0.0,
+            daily_usage REAL NOT NULL,
+            timestamp DATETIME NOT NULL
+        )
+    """)
+
+
+def _replace_old_table() -> None:
+    # Drop old table
+    op.execute("DROP TABLE daily_power_usage")
+
+    # Rename new table
+    op.execute("ALTER TABLE daily_power_usage_new RENAME TO daily_power_usage")
+
+    # Recreate indexes
+    op.create_index(op.f('ix_daily_power_usage_date'), 'daily_power_usage', ['date'], unique=True)
+    op.create_index(op.f('ix_daily_power_usage_timestamp'), 'daily_power_usage', ['timestamp'], unique=False)
 
 
 def downgrade() -> None:
@@ -1,7 +1,7 @@
 """add_daily_power_usage_table
 
 Revision ID: 2fafa8278854
-Revises: 
+Revises: 0f2b7c4e9a61
 Create Date: 2025-10-03 19:21:50.506242
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '2fafa8278854'
-down_revision: Union[str, Sequence[str], None] = None
+down_revision: Union[str, Sequence[str], None] = '0f2b7c4e9a61'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
@@ -69,7 +69,14 @@ def upgrade() -> None:
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # Drop the entire table
-    op.drop_index(op.f('ix_daily_power_usage_timestamp'), table_name='daily_power_usage')
-    op.drop_index(op.f('ix_daily_power_usage_date'), table_name='daily_power_usage')
-    op.drop_table('daily_power_usage')
+    # Drop the entire table; downgrading 49bbffc8e5a9 on a fresh database already did
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'daily_power_usage' in inspector.get_table_names():
+        indexes = [index['name'] for index in inspector.get_indexes('daily_power_usage')]
+        if 'ix_daily_power_usage_timestamp' in indexes:
+            op.drop_index(op.f('ix_daily_power_usage_timestamp'), table_name='daily_power_usage')
+        if 'ix_daily_power_usage_date' in indexes:
+            op.drop_index(op.f('ix_daily_power_usage_date'), table_name='daily_power_usage')
+        op.drop_table('daily_power_usage')
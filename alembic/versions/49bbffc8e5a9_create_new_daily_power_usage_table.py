@@ -17,15 +17,32 @@ down_revision: Union[str, Sequence[str], None] = '1be8233b83a5'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+NEW_COLUMNS = {
+    'id', 'date', 'import_start_value', 'import_end_value', 'daily_import', 'export_start_value',
+    'export_end_value', 'daily_export', 'inverter_daily_yield', 'daily_usage', 'timestamp'
+}
+
 
 def upgrade() -> None:
-    """Upgrade schema - rename old table and create new one."""
+    """Upgrade schema - rename old table and create new one.
+
+    A table that already has the new columns (every database past
+    1be8233b83a5, or one created by create_tables()) is kept as is.
+    """
     bind = op.get_bind()
     inspector = sa.inspect(bind)
 
-    # Rename old table to preserve data
     if 'daily_power_usage' in inspector.get_table_names():
+        columns = {col['name'] for col in inspector.get_columns('daily_power_usage')}
+        if 'entity_id' not in columns and NEW_COLUMNS <= columns:
+            return
+
+        # Rename old table to preserve data; its indexes move with it, so free their names
+        indexes = [index['name'] for index in inspector.get_indexes('daily_power_usage')]
         op.execute("ALTER TABLE daily_power_usage RENAME TO daily_power_usage_old")
+        for name in ('ix_daily_power_usage_date', 'ix_daily_power_usage_timestamp'):
+            if name in indexes:
+                op.drop_index(name, table_name='daily_power_usage_old')
 
     # Create fresh new table with correct schema
     op.create_table(
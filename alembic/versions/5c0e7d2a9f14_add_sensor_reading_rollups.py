@@ -0,0 +1,55 @@
+"""add_sensor_reading_rollups
+
+Revision ID: 5c0e7d2a9f14
+Revises: 49bbffc8e5a9
+Create Date: 2026-10-19 09:12:40.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0e7d2a9f14'
+down_revision: Union[str, Sequence[str], None] = '49bbffc8e5a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add rollup tiers and a history index for sensor readings."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'sensor_reading_rollups' not in inspector.get_table_names():
+        op.create_table(
+            'sensor_reading_rollups',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity_id', sa.String(), nullable=False),
+            sa.Column('resolution', sa.Integer(), nullable=False),
+            sa.Column('bucket_start', sa.DateTime(), nullable=False),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            sa.Column('min_value', sa.Float(), nullable=True),
+            sa.Column('max_value', sa.Float(), nullable=True),
+            sa.Column('avg_value', sa.Float(), nullable=True),
+            sa.Column('last_state', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('entity_id', 'resolution', 'bucket_start', name='uq_sensor_reading_rollups_bucket')
+        )
+        op.create_index(op.f('ix_sensor_reading_rollups_entity_id'), 'sensor_reading_rollups', ['entity_id'], unique=False)
+        op.create_index(op.f('ix_sensor_reading_rollups_bucket_start'), 'sensor_reading_rollups', ['bucket_start'], unique=False)
+
+    if 'sensor_readings' in inspector.get_table_names():
+        indexes = [index['name'] for index in inspector.get_indexes('sensor_readings')]
+        if 'ix_sensor_readings_entity_id_timestamp' not in indexes:
+            op.create_index('ix_sensor_readings_entity_id_timestamp', 'sensor_readings', ['entity_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sensor_readings_entity_id_timestamp', table_name='sensor_readings')
+    op.drop_index(op.f('ix_sensor_reading_rollups_bucket_start'), table_name='sensor_reading_rollups')
+    op.drop_index(op.f('ix_sensor_reading_rollups_entity_id'), table_name='sensor_reading_rollups')
+    op.drop_table('sensor_reading_rollups')
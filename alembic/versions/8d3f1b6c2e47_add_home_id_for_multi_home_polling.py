@@ -0,0 +1,124 @@
+"""add_home_id_for_multi_home_polling
+
+Revision ID: 8d3f1b6c2e47
+Revises: 5c0e7d2a9f14
+Create Date: 2026-10-19 14:05:11.502193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f1b6c2e47'
+down_revision: Union[str, Sequence[str], None] = '5c0e7d2a9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HOME_TABLES = ['sensor_readings', 'sensor_reading_rollups', 'weather_forecasts', 'daily_power_usage']
+
+
+def upgrade() -> None:
+    """Upgrade schema - partition polled data by home; existing rows belong to the default home."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    for table in HOME_TABLES:
+        if table not in tables:
+            continue
+        columns = [column['name'] for column in inspector.get_columns(table)]
+        if 'home_id' not in columns:
+            op.add_column(table, sa.Column('home_id', sa.String(), nullable=False, server_default='default'))
+
+    if 'sensor_readings' in tables:
+        indexes = [index['name'] for index in inspector.get_indexes('sensor_readings')]
+        if 'ix_sensor_readings_entity_id_timestamp' in indexes:
+            op.drop_index('ix_sensor_readings_entity_id_timestamp', table_name='sensor_readings')
+        if 'ix_sensor_readings_home_id_entity_id_timestamp' not in indexes:
+            op.create_index(
+                'ix_sensor_readings_home_id_entity_id_timestamp', 'sensor_readings',
+                ['home_id', 'entity_id', 'timestamp'], unique=False
+            )
+
+    if 'weather_forecasts' in tables:
+        indexes = [index['name'] for index in inspector.get_indexes('weather_forecasts')]
+        if 'ix_weather_forecasts_home_id' not in indexes:
+            op.create_index(op.f('ix_weather_forecasts_home_id'), 'weather_forecasts', ['home_id'], unique=False)
+
+    if 'daily_power_usage' in tables:
+        # A date is now unique per home rather than globally
+        indexes = {index['name']: index for index in inspector.get_indexes('daily_power_usage')}
+        if indexes.get('ix_daily_power_usage_date', {}).get('unique'):
+            op.drop_index(op.f('ix_daily_power_usage_date'), table_name='daily_power_usage')
+            op.create_index(op.f('ix_daily_power_usage_date'), 'daily_power_usage', ['date'], unique=False)
+        if 'ix_daily_power_usage_home_id' not in indexes:
+            op.create_index(op.f('ix_daily_power_usage_home_id'), 'daily_power_usage', ['home_id'], unique=False)
+        if 'uq_daily_power_usage_home_date' not in indexes:
+            op.create_index('uq_daily_power_usage_home_date', 'daily_power_usage', ['home_id', 'date'], unique=True)
+
+    if 'sensor_reading_rollups' in tables:
+        unique = [c['column_names'] for c in inspector.get_unique_constraints('sensor_reading_rollups')]
+        if ['home_id', 'entity_id', 'resolution', 'bucket_start'] not in unique:
+            # SQLite cannot alter constraints in place, so the table is rebuilt
+            with op.batch_alter_table('sensor_reading_rollups', recreate='always') as batch_op:
+                batch_op.drop_constraint('uq_sensor_reading_rollups_bucket', type_='unique')
+                batch_op.create_unique_constraint(
+                    'uq_sensor_reading_rollups_bucket',
+                    ['home_id', 'entity_id', 'resolution', 'bucket_start']
+                )
+                batch_op.create_index(op.f('ix_sensor_reading_rollups_home_id'), ['home_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - checks what exists first, as upgrade() does, since it may have skipped tables."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    def has_home_id(table):
+        return 'home_id' in [column['name'] for column in inspector.get_columns(table)]
+
+    if 'sensor_reading_rollups' in tables and has_home_id('sensor_reading_rollups'):
+        indexes = [index['name'] for index in inspector.get_indexes('sensor_reading_rollups')]
+        unique = [c['name'] for c in inspector.get_unique_constraints('sensor_reading_rollups')]
+        with op.batch_alter_table('sensor_reading_rollups', recreate='always') as batch_op:
+            if 'ix_sensor_reading_rollups_home_id' in indexes:
+                batch_op.drop_index(op.f('ix_sensor_reading_rollups_home_id'))
+            if 'uq_sensor_reading_rollups_bucket' in unique:
+                batch_op.drop_constraint('uq_sensor_reading_rollups_bucket', type_='unique')
+            batch_op.create_unique_constraint('uq_sensor_reading_rollups_bucket', ['entity_id', 'resolution', 'bucket_start'])
+            batch_op.drop_column('home_id')
+
+    if 'daily_power_usage' in tables:
+        indexes = {index['name']: index for index in inspector.get_indexes('daily_power_usage')}
+        if 'uq_daily_power_usage_home_date' in indexes:
+            op.drop_index('uq_daily_power_usage_home_date', table_name='daily_power_usage')
+        if 'ix_daily_power_usage_home_id' in indexes:
+            op.drop_index(op.f('ix_daily_power_usage_home_id'), table_name='daily_power_usage')
+        if 'ix_daily_power_usage_date' in indexes and not indexes['ix_daily_power_usage_date']['unique']:
+            op.drop_index(op.f('ix_daily_power_usage_date'), table_name='daily_power_usage')
+            op.create_index(op.f('ix_daily_power_usage_date'), 'daily_power_usage', ['date'], unique=True)
+        if has_home_id('daily_power_usage'):
+            with op.batch_alter_table('daily_power_usage') as batch_op:
+                batch_op.drop_column('home_id')
+
+    if 'weather_forecasts' in tables:
+        indexes = [index['name'] for index in inspector.get_indexes('weather_forecasts')]
+        if 'ix_weather_forecasts_home_id' in indexes:
+            op.drop_index(op.f('ix_weather_forecasts_home_id'), table_name='weather_forecasts')
+        if has_home_id('weather_forecasts'):
+            with op.batch_alter_table('weather_forecasts') as batch_op:
+                batch_op.drop_column('home_id')
+
+    if 'sensor_readings' in tables:
+        indexes = [index['name'] for index in inspector.get_indexes('sensor_readings')]
+        if 'ix_sensor_readings_home_id_entity_id_timestamp' in indexes:
+            op.drop_index('ix_sensor_readings_home_id_entity_id_timestamp', table_name='sensor_readings')
+        if has_home_id('sensor_readings'):
+            with op.batch_alter_table('sensor_readings') as batch_op:
+                batch_op.drop_column('home_id')
+        if 'ix_sensor_readings_entity_id_timestamp' not in indexes:
+            op.create_index('ix_sensor_readings_entity_id_timestamp', 'sensor_readings', ['entity_id', 'timestamp'], unique=False)
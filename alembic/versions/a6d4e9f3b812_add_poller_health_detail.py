@@ -0,0 +1,35 @@
+"""add_poller_health_detail
+
+Revision ID: a6d4e9f3b812
+Revises: c3f8a2d71b94
+Create Date: 2026-10-19 14:03:51.227190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e9f3b812'
+down_revision: Union[str, Sequence[str], None] = 'c3f8a2d71b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add the circuit breaker snapshot written with the poller heartbeat."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'poller_health' in inspector.get_table_names():
+        columns = [col['name'] for col in inspector.get_columns('poller_health')]
+        if 'detail' not in columns:
+            op.add_column('poller_health', sa.Column('detail', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('poller_health') as batch_op:
+        batch_op.drop_column('detail')
@@ -0,0 +1,46 @@
+"""add_weather_forecast_snapshots
+
+Revision ID: b7e2c4a9d315
+Revises: 8d3f1b6c2e47
+Create Date: 2026-10-19 16:21:03.184422
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c4a9d315'
+down_revision: Union[str, Sequence[str], None] = '8d3f1b6c2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - keep delta-encoded weather forecast history."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'weather_forecast_snapshots' not in inspector.get_table_names():
+        op.create_table(
+            'weather_forecast_snapshots',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('home_id', sa.String(), nullable=False, server_default='default'),
+            sa.Column('entity_id', sa.String(), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('is_keyframe', sa.Boolean(), nullable=False),
+            sa.Column('data', sa.Text(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(
+            'ix_weather_forecast_snapshots_home_entity_timestamp', 'weather_forecast_snapshots',
+            ['home_id', 'entity_id', 'timestamp'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_weather_forecast_snapshots_home_entity_timestamp', table_name='weather_forecast_snapshots')
+    op.drop_table('weather_forecast_snapshots')
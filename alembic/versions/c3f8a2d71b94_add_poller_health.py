@@ -0,0 +1,40 @@
+"""add_poller_health
+
+Revision ID: c3f8a2d71b94
+Revises: e4a91c7d2b58
+Create Date: 2026-10-19 09:12:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a2d71b94'
+down_revision: Union[str, Sequence[str], None] = 'e4a91c7d2b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add the poller health table read by /health/ready."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'poller_health' not in inspector.get_table_names():
+        op.create_table(
+            'poller_health',
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('max_age_seconds', sa.Float(), nullable=True),
+            sa.Column('since', sa.DateTime(), nullable=False),
+            sa.Column('last_success_at', sa.DateTime(), nullable=True),
+            sa.Column('error', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('poller_health')
@@ -0,0 +1,114 @@
+"""add_daily_energy_facts
+
+Revision ID: e4a91c7d2b58
+Revises: b7e2c4a9d315
+Create Date: 2026-10-19 17:02:41.506913
+
+"""
+import logging
+import os
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from thermostat_backend.daily_facts import degree_day_base
+
+logger = logging.getLogger(__name__)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a91c7d2b58'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c4a9d315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add the daily energy fact table and fill it.
+
+    The facts are computed from the statuses and daily power usage in the
+    database. Statuses moved to archive or partition files aren't reachable
+    from here; with those configured, run rebuild_daily_facts.py afterwards.
+    """
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if 'daily_energy_facts' not in inspector.get_table_names():
+        op.create_table(
+            'daily_energy_facts',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('home_id', sa.String(), nullable=False, server_default='default'),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('status_count', sa.Integer(), nullable=False),
+            sa.Column('minutes_heating', sa.Integer(), nullable=False),
+            sa.Column('indoor_temp_sum', sa.Float(), nullable=False),
+            sa.Column('outdoor_temp_sum', sa.Float(), nullable=False),
+            sa.Column('avg_indoor_temp', sa.Float(), nullable=True),
+            sa.Column('avg_outdoor_temp', sa.Float(), nullable=True),
+            sa.Column('heating_degree_days', sa.Float(), nullable=True),
+            sa.Column('daily_import', sa.Float(), nullable=True),
+            sa.Column('daily_export', sa.Float(), nullable=True),
+            sa.Column('inverter_daily_yield', sa.Float(), nullable=True),
+            sa.Column('daily_usage', sa.Float(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('uq_daily_energy_facts_home_date', 'daily_energy_facts', ['home_id', 'date'], unique=True)
+
+    # Also when the app already created the table with create_all(), so it may hold partial facts
+    _fill_facts(bind, set(inspector.get_table_names()))
+
+    if os.getenv('STATUS_ARCHIVE_PATH') or os.getenv('STATUS_PARTITION_PATH'):
+        logger.warning('daily_energy_facts only covers statuses in SQLite; run rebuild_daily_facts.py to add archived '
+                       'and partitioned statuses')
+
+
+def _fill_facts(bind, tables: set) -> None:
+    """Recompute every fact row, as DailyFactsService.rebuild() does for the statuses in SQLite"""
+    parameters = {'base': degree_day_base(), 'now': datetime.utcnow()}
+    bind.execute(sa.text('DELETE FROM daily_energy_facts'))
+    if 'statuses' in tables:
+        _fill_status_facts(bind, parameters)
+    if 'daily_power_usage' in tables:
+        _fill_power_usage_facts(bind, parameters)
+
+
+def _fill_status_facts(bind, parameters: dict) -> None:
+    # Statuses carry no home; date() filters out start times that don't begin with a valid day
+    bind.execute(sa.text("""
+        INSERT INTO daily_energy_facts (
+            home_id, date, status_count, minutes_heating, indoor_temp_sum, outdoor_temp_sum,
+            avg_indoor_temp, avg_outdoor_temp, heating_degree_days, updated_at
+        )
+        SELECT 'default', substr(start_time, 1, 10), count(*), sum(minutes_heating),
+               sum(average_indoor_temp), sum(average_outdoor_temp), avg(average_indoor_temp),
+               avg(average_outdoor_temp), max(0.0, :base - avg(average_outdoor_temp)), :now
+        FROM statuses
+        WHERE date(substr(start_time, 1, 10)) = substr(start_time, 1, 10)
+        GROUP BY substr(start_time, 1, 10)
+    """), parameters)
+
+
+def _fill_power_usage_facts(bind, parameters: dict) -> None:
+    # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT
+    bind.execute(sa.text("""
+        INSERT INTO daily_energy_facts (
+            home_id, date, status_count, minutes_heating, indoor_temp_sum, outdoor_temp_sum,
+            daily_import, daily_export, inverter_daily_yield, daily_usage, updated_at
+        )
+        SELECT home_id, date, 0, 0, 0.0, 0.0, daily_import, coalesce(daily_export, 0.0),
+               coalesce(inverter_daily_yield, 0.0), daily_usage, :now
+        FROM daily_power_usage WHERE true
+        ON CONFLICT (home_id, date) DO UPDATE SET
+            daily_import = excluded.daily_import, daily_export = excluded.daily_export,
+            inverter_daily_yield = excluded.inverter_daily_yield, daily_usage = excluded.daily_usage,
+            updated_at = excluded.updated_at
+    """), parameters)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_daily_energy_facts_home_date', table_name='daily_energy_facts')
+    op.drop_table('daily_energy_facts')
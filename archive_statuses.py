@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+from dotenv import load_dotenv
+from thermostat_backend.database import SessionLocal
+from thermostat_backend.archive import init_archive, archive_keep_months
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    arg_parser = argparse.ArgumentParser(description="Move closed months of statuses from SQLite to Parquet")
+    arg_parser.add_argument("--keep-months", type=int, default=None, help="Months (including the current one) to keep in SQLite")
+    args = arg_parser.parse_args()
+
+    archive = init_archive()
+    if not archive:
+        print("STATUS_ARCHIVE_PATH not set or pyarrow not installed")
+        return
+
+    db = SessionLocal()
+    try:
+        moved = archive.archive_closed_months(db, args.keep_months or archive_keep_months())
+        print(f"Archived {moved} statuses to {archive.path}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
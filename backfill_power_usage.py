@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import logging
+from dateutil import parser
+from dotenv import load_dotenv
+from thermostat_backend.database import create_tables
+from thermostat_backend.home_assistant import HomeAssistantService
+from thermostat_backend.homes import get_home
+from thermostat_backend.models import DEFAULT_HOME_ID
+from thermostat_backend.backfill import PowerUsageBackfill
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    arg_parser = argparse.ArgumentParser(description="Backfill missing daily power usage from Home Assistant history")
+    arg_parser.add_argument("--start-date", help="First date to backfill (defaults to the earliest stored date)")
+    arg_parser.add_argument("--home", default=DEFAULT_HOME_ID, help="Id of the configured home to backfill")
+    arg_parser.add_argument("--end-date", help="Last date to backfill (defaults to yesterday)")
+    arg_parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of days fetched in parallel")
+    arg_parser.add_argument("--requests-per-second", type=float, default=5.0, help="Maximum Home Assistant requests per second")
+    args = arg_parser.parse_args()
+
+    home = get_home(args.home)
+    if not home:
+        print(f"Home {args.home!r} is not configured (set HOME_ASSISTANT_URL or HOME_ASSISTANT_HOMES_FILE)")
+        return
+
+    create_tables()
+    backfill = PowerUsageBackfill(
+        HomeAssistantService.from_config(home),
+        concurrency=args.concurrency,
+        requests_per_second=args.requests_per_second
+    )
+
+    start = parser.parse(args.start_date).date() if args.start_date else None
+    end = parser.parse(args.end_date).date() if args.end_date else None
+    summary = asyncio.run(backfill.run(start, end))
+    print(f"Backfill complete: {summary['inserted']} inserted, {summary['failed']} failed, {summary['missing']} missing")
+
+if __name__ == "__main__":
+    main()
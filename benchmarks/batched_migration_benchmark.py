@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Compare a one-statement table copy with BatchedMigration.copy().
+
+Builds a file database with the pre-1be8233b83a5 daily_power_usage schema,
+then copies it into the new table both ways while another connection
+writes a row every few milliseconds, as the poller would. Reports the copy
+time and the longest time that writer was blocked.
+
+    uv run python benchmarks/batched_migration_benchmark.py --rows 2000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+
+from thermostat_backend.batched_migration import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE, BatchedMigration
+
+COLUMNS = ["id", "date", "import_start_value", "import_end_value", "daily_import", "daily_usage", "timestamp"]
+EXPRESSIONS = ["id", "date", "start_value", "end_value", "daily_usage", "daily_usage", "timestamp"]
+
+
+def build(file: str, rows: int) -> None:
+    conn = sqlite3.connect(file)
+    conn.execute("""
+        CREATE TABLE daily_power_usage (
+            id INTEGER PRIMARY KEY, entity_id VARCHAR, date DATE NOT NULL, start_value REAL,
+            end_value REAL, daily_usage REAL, timestamp DATETIME NOT NULL
+        )
+    """)
+    first = date(1000, 1, 1)
+    conn.executemany(
+        "INSERT INTO daily_power_usage VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i + 1, "sensor.power", str(first + timedelta(days=i % 3000000)), i * 1.5, i * 1.5 + 3, 3.0,
+             "2024-01-01 00:00:00")
+            for i in range(rows)
+        )
+    )
+    conn.execute("CREATE TABLE writes (id INTEGER PRIMARY KEY, value INTEGER)")
+    conn.commit()
+    conn.close()
+
+
+def reset(file: str) -> None:
+    conn = sqlite3.connect(file)
+    conn.execute("DROP TABLE IF EXISTS daily_power_usage_new")
+    conn.execute("DROP TABLE IF EXISTS migration_checkpoints")
+    conn.execute("""
+        CREATE TABLE daily_power_usage_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, date DATE NOT NULL, import_start_value REAL NOT NULL,
+            import_end_value REAL NOT NULL, daily_import REAL NOT NULL, daily_usage REAL NOT NULL,
+            timestamp DATETIME NOT NULL
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+
+def single_statement(file: str) -> None:
+    conn = sqlite3.connect(file)
+    conn.execute(
+        f"INSERT INTO daily_power_usage_new ({', '.join(COLUMNS)}) "
+        f"SELECT {', '.join(EXPRESSIONS)} FROM daily_power_usage"
+    )
+    conn.commit()
+    conn.close()
+
+
+def batched(file: str, batch_size: int, pause: float) -> None:
+    engine = create_engine(f"sqlite:///{file}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration = BatchedMigration(conn, "benchmark")
+        migration.copy(
+            "daily_power_usage", "daily_power_usage_new", COLUMNS, EXPRESSIONS, batch_size=batch_size, pause=pause
+        )
+    engine.dispose()
+
+
+def measure(file: str, copy) -> tuple:
+    stop = threading.Event()
+    waits = []
+
+    def writer():
+        conn = sqlite3.connect(file, timeout=600)
+        value = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            conn.execute("INSERT INTO writes (value) VALUES (?)", (value,))
+            conn.commit()
+            waits.append(time.perf_counter() - started)
+            value += 1
+            time.sleep(0.005)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    copy()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    thread.join()
+    return elapsed, max(waits), len(waits)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "data.db")
+        build(file, args.rows)
+        print(f"{args.rows} rows")
+        for label, copy in [
+            ("single statement", lambda: single_statement(file)),
+            (f"batched ({args.batch_size} rows)", lambda: batched(file, args.batch_size, args.pause)),
+        ]:
+            reset(file)
+            elapsed, longest_wait, writes = measure(file, copy)
+            print(f"  {label:<24} copy {elapsed:6.2f}s   longest writer wait {longest_wait * 1000:8.1f} ms   writes {writes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Compare the aggregate endpoints on SQLite and on the embedded DuckDB engine.
+
+Seeds --rows one-minute statuses into a temporary SQLite database, loads the
+DuckDB copy, then times get_statistics, get_monthly_data_by_year and
+get_heating_efficiency on both engines with the result cache disabled.
+SQLite's first statistics call includes building the statistics index.
+
+    uv run --extra duckdb python benchmarks/duckdb_benchmark.py --rows 10000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(rows: int) -> datetime:
+    from sqlalchemy import text
+    from thermostat_backend.database import engine, create_tables
+
+    create_tables()
+    start = datetime(datetime.utcnow().year, 1, 1) - timedelta(minutes=rows)
+    # Generated inside SQLite; inserting millions of rows from Python would dominate the run
+    with engine.begin() as conn:
+        conn.execute(text("""
+            WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i < :rows - 1)
+            INSERT INTO statuses (start_time, end_time, minutes_heating, average_indoor_temp, average_outdoor_temp)
+            SELECT strftime('%Y-%m-%d %H:%M:%S.000000', :start, '+' || i || ' minutes'),
+                   strftime('%Y-%m-%d %H:%M:%S.000000', :start, '+' || (i + 1) || ' minutes'),
+                   abs(random()) % 2,
+                   19 + (abs(random()) % 400) / 100.0,
+                   -10 + (abs(random()) % 3500) / 100.0
+            FROM seq
+        """), {"rows": rows, "start": start.strftime("%Y-%m-%d %H:%M:%S")})
+    return start
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def run(rows: int, repeat: int) -> None:
+    from thermostat_backend import duckdb_engine
+    from thermostat_backend.database import SessionLocal
+    from thermostat_backend.services import StatusService
+
+    started = time.perf_counter()
+    start = seed(rows)
+    print(f"Seeded {rows} statuses in {time.perf_counter() - started:.1f}s")
+
+    db = SessionLocal()
+    load_time, engine = timed(duckdb_engine.init_duckdb_engine, db)
+    if engine is None:
+        print("DuckDB engine unavailable (install the duckdb extra)")
+        return
+    print(f"Loaded DuckDB copy in {load_time:.1f}s")
+
+    year = start.year + 1
+    month_start = datetime(year, 3, 1)
+    cases = [
+        ("statistics (all)", StatusService.get_statistics, (None, None)),
+        (f"statistics ({year})", StatusService.get_statistics, (f"{year}-01-01", f"{year}-12-31T23:59:59")),
+        (f"monthly ({year})", StatusService.get_monthly_data_by_year, (year,)),
+        ("heating efficiency (1 month)", StatusService.get_heating_efficiency,
+         (month_start.isoformat(), (month_start + timedelta(days=31)).isoformat())),
+    ]
+
+    for label, fn, args in cases:
+        timings = {}
+        results = {}
+        for name, active in [("sqlite", None), ("duckdb", engine)]:
+            duckdb_engine._engine = active
+            first, results[name] = timed(fn, db, *args)
+            warm = min(timed(fn, db, *args)[0] for _ in range(repeat))
+            timings[name] = (first, warm)
+        same = "same result" if results["sqlite"] == results["duckdb"] else "RESULTS DIFFER"
+        (sqlite_first, sqlite_warm), (duck_first, duck_warm) = timings["sqlite"], timings["duckdb"]
+        print(
+            f"{label:<30} sqlite first {sqlite_first * 1000:9.1f} ms, warm {sqlite_warm * 1000:9.1f} ms | "
+            f"duckdb first {duck_first * 1000:8.1f} ms, warm {duck_warm * 1000:8.1f} ms | {same}"
+        )
+    db.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the DuckDB analytic engine against SQLite")
+    arg_parser.add_argument("--rows", type=int, default=10_000_000, help="Statuses to seed")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Warm runs per case (fastest is reported)")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'duckdb_benchmark.db')}"
+        os.environ["ANALYTIC_ENGINE"] = "duckdb"
+        os.environ["RESULT_CACHE_TTL_SECONDS"] = "0"
+        os.environ["POLLER_MODE"] = "disabled"
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        run(args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare POST /statuses throughput with and without group commit.
+
+For each writer count, that many concurrent requests each post one status
+through the ASGI app, first with a commit per request (max_rows=1) and then
+with the default group commit settings, against a file database so every
+commit pays for its fsync.
+
+    uv run python benchmarks/group_commit_benchmark.py --writers 100 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def status_body(i: int) -> dict:
+    begin = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return {
+        "start_time": begin.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        "end_time": (begin + timedelta(minutes=1)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+        "minutes_heating": random.randint(0, 1),
+        "average_indoor_temp": round(random.uniform(19, 23), 2),
+        "average_outdoor_temp": round(random.uniform(-10, 25), 2)
+    }
+
+
+async def run(writer_counts, rounds: int) -> None:
+    import httpx
+    from thermostat_backend import main, group_commit
+    from thermostat_backend.group_commit import GroupCommitWriter, get_group_commit_writer
+
+    await main.startup_event()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    defaults = get_group_commit_writer()
+    transport = httpx.ASGITransport(app=main.app)
+    offset = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for writers in writer_counts:
+            results = {}
+            for label, writer in [
+                ("per-request commit", GroupCommitWriter(max_delay=0, max_rows=1)),
+                ("group commit", GroupCommitWriter(defaults.max_delay, defaults.max_rows)),
+            ]:
+                group_commit._group_commit_writer = writer
+                elapsed = 0.0
+                for _ in range(rounds):
+                    bodies = [status_body(offset + i) for i in range(writers)]
+                    offset += writers
+                    started = time.perf_counter()
+                    responses = await asyncio.gather(*(client.post("/api/v1/statuses", json=body) for body in bodies))
+                    elapsed += time.perf_counter() - started
+                    assert all(response.status_code == 200 for response in responses)
+                    assert len({response.json()["id"] for response in responses}) == writers
+                results[label] = (writers * rounds / elapsed, writer.batches)
+
+            single, grouped = results["per-request commit"], results["group commit"]
+            print(
+                f"{writers:>5} writers: per-request commit {single[0]:8.0f} rows/s ({single[1]} commits) | "
+                f"group commit {grouped[0]:8.0f} rows/s ({grouped[1]} commits) | {grouped[0] / single[0]:.1f}x"
+            )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark group commit of concurrent status writes")
+    arg_parser.add_argument("--writers", type=int, nargs="+", default=[100, 1000], help="Concurrent writers")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Bursts per writer count and mode")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'group_commit.db')}"
+        os.environ["POLLER_MODE"] = "disabled"
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        asyncio.run(run(args.writers, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Show that concurrent identical requests share one query.
+
+Fires --concurrency simultaneous GET /statuses/monthly/{year} and
+/statuses/stats requests through the ASGI app and reports how many times the
+underlying StatusService query actually ran, next to the same number of
+uncoalesced calls.
+
+    uv run python benchmarks/singleflight_benchmark.py --rows 200000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(rows: int) -> int:
+    from thermostat_backend.database import SessionLocal, create_tables
+    from thermostat_backend.models import Status
+
+    create_tables()
+    start = datetime(datetime.utcnow().year - 1, 1, 1)
+    mappings = []
+    for i in range(rows):
+        begin = start + timedelta(minutes=10 * i)
+        mappings.append({
+            "start_time": begin.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            "end_time": (begin + timedelta(minutes=10)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+            "minutes_heating": random.randint(0, 10),
+            "average_indoor_temp": round(random.uniform(19, 23), 2),
+            "average_outdoor_temp": round(random.uniform(-10, 25), 2)
+        })
+    db = SessionLocal()
+    db.bulk_insert_mappings(Status, mappings)
+    db.commit()
+    db.close()
+    return start.year
+
+
+async def run(concurrency: int, year: int) -> None:
+    import httpx
+    from starlette.concurrency import run_in_threadpool
+    from thermostat_backend import main
+    from thermostat_backend.services import StatusService
+    from thermostat_backend.singleflight import single_flight, _with_session
+
+    await main.startup_event()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path, fn, args in [
+            ("monthly", f"/api/v1/statuses/monthly/{year}", StatusService.get_monthly_data_by_year, (year,)),
+            ("stats", "/api/v1/statuses/stats", StatusService.get_statistics, (None, None)),
+        ]:
+            await client.get(path)  # warm up lazily built indexes
+
+            before = single_flight.executions
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+            coalesced_time = time.perf_counter() - started
+            executions = single_flight.executions - before
+            assert all(response.status_code == 200 for response in responses)
+            assert all(response.content == responses[0].content for response in responses)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(run_in_threadpool(_with_session, fn, *args) for _ in range(concurrency)))
+            separate_time = time.perf_counter() - started
+
+            print(
+                f"{label:<8} {concurrency} concurrent requests: {executions} query execution(s), "
+                f"{coalesced_time * 1000:.1f} ms | uncoalesced: {concurrency} executions, {separate_time * 1000:.1f} ms"
+            )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark single-flight request coalescing")
+    arg_parser.add_argument("--rows", type=int, default=100000, help="Statuses to seed")
+    arg_parser.add_argument("--concurrency", type=int, default=20, help="Simultaneous identical requests")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'singleflight.db')}"
+        os.environ["POLLER_MODE"] = "disabled"
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        year = seed(args.rows)
+        asyncio.run(run(args.concurrency, year))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Measure API cold start: process launch, module imports and each startup phase.
+
+Every run starts a fresh interpreter, imports thermostat_backend.main and runs
+the startup handler with background jobs disabled. The first run against a new
+database creates and stamps the schema, later runs take the fast path.
+
+    uv run python benchmarks/startup_benchmark.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = """
+import asyncio, json
+from thermostat_backend import main
+asyncio.run(main.startup_event())
+print(json.dumps(main.startup_timings))
+"""
+
+
+def run_once(env: dict) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_wall"] = wall
+    return timings
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark API startup time")
+    arg_parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    arg_parser.add_argument("--database-url", help="Database to start against (defaults to a new temporary SQLite file)")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'startup.db')}"
+        env["POLLER_MODE"] = "disabled"
+        env["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"{'phase':<16}{'first':>10}{'median':>10}{'max':>10}   (ms, {args.runs} runs)")
+    for phase in runs[0]:
+        values = [run[phase] * 1000 for run in runs if phase in run]
+        print(f"{phase:<16}{values[0]:>10.1f}{statistics.median(values):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+from dotenv import load_dotenv
+from thermostat_backend.database import SessionLocal
+from thermostat_backend.partitions import init_partitions, partition_keep_years
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    arg_parser = argparse.ArgumentParser(description="Move closed years of statuses from SQLite to per-year SQLite files")
+    arg_parser.add_argument("--keep-years", type=int, default=None, help="Years (including the current one) to keep in the main database")
+    args = arg_parser.parse_args()
+
+    partitions = init_partitions()
+    if not partitions:
+        print("STATUS_PARTITION_PATH not set")
+        return
+
+    db = SessionLocal()
+    try:
+        moved = partitions.partition_closed_years(db, args.keep_years or partition_keep_years())
+        print(f"Moved {moved} statuses to {partitions.path}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
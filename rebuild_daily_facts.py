@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+import logging
+from dotenv import load_dotenv
+from thermostat_backend.database import SessionLocal, create_tables
+from thermostat_backend.archive import init_archive
+from thermostat_backend.partitions import init_partitions
+from thermostat_backend.daily_facts import DailyFactsService
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    create_tables()
+    init_archive()
+    init_partitions()
+    db = SessionLocal()
+    try:
+        total = DailyFactsService.rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {total} daily energy facts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+from dotenv import load_dotenv
+from thermostat_backend.database import ensure_schema
+from thermostat_backend.archive import init_archive
+from thermostat_backend.partitions import init_partitions
+from thermostat_backend.poller import run_standalone
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    ensure_schema()
+    init_archive()
+    init_partitions()
+    asyncio.run(run_standalone())
+
+if __name__ == "__main__":
+    main()
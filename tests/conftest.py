@@ -0,0 +1,31 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read when the app modules are imported, so they are set before any test imports them
+_database_dir = tempfile.mkdtemp(prefix="thermostat-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ["POLLER_MODE"] = "disabled"
+for name in ("STATUS_ARCHIVE_PATH", "STATUS_PARTITION_PATH", "ANALYTIC_STORE_PATH", "ANALYTIC_ENGINE", "MQTT_HOST"):
+    os.environ.pop(name, None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    """A session on an empty database; every table is emptied again afterwards"""
+    from thermostat_backend.database import SessionLocal, create_tables, engine
+    from thermostat_backend.models import Base
+
+    create_tables()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from thermostat_backend import analytic_store
+from thermostat_backend.analytic_store import ColumnarStatusStore, init_store
+from thermostat_backend.change_feed import ChangeFeed
+from thermostat_backend.models import Status
+
+
+def add_status(db, start_time: str, end_time: str) -> Status:
+    status = Status(start_time=start_time, end_time=end_time, minutes_heating=20,
+                    average_indoor_temp=21.0, average_outdoor_temp=4.5)
+    db.add(status)
+    db.commit()
+    return status
+
+
+def test_unparseable_times_are_skipped(db, tmp_path):
+    add_status(db, "2021-03-04 19:00:00", "2021-03-04 19:59:00")
+    add_status(db, "03/04/2021 20:00", "03/04/2021 20:59")
+    store = ColumnarStatusStore(str(tmp_path))
+    store.open()
+
+    assert store.sync(db) == 2
+    assert (store.count, store.max_id) == (1, 2)
+
+    # Later statuses append directly instead of re-reading the skipped row
+    status = add_status(db, "2021-03-04 21:00:00.000000", "2021-03-04 21:59:00.000000")
+    store.append(db, [status])
+    assert (store.count, store.max_id) == (2, 3)
+    assert store.sync(db) == 0
+
+
+def test_store_failing_at_startup_falls_back_to_sqlite(db, tmp_path, monkeypatch):
+    def fail(self, db, chunk_size=50000):
+        raise OSError("No space left on device")
+
+    monkeypatch.setenv("ANALYTIC_STORE_PATH", str(tmp_path))
+    monkeypatch.setattr(ColumnarStatusStore, "sync", fail)
+    monkeypatch.setattr(analytic_store, "_store", None)
+
+    assert init_store(db) is None
+    assert analytic_store.get_store() is None
+
+
+def test_heating_efficiency_is_ordered_by_start_time(db, tmp_path):
+    add_status(db, "2021-03-04 21:00:00", "2021-03-04 21:59:00")
+    add_status(db, "2021-03-04 19:00:00", "2021-03-04 19:59:00")
+    store = ColumnarStatusStore(str(tmp_path))
+    store.open()
+    store.sync(db)
+
+    assert [row["id"] for row in store.get_heating_efficiency()] == [2, 1]
+
+
+def test_change_feed_appends_statuses_from_other_processes(db, tmp_path, monkeypatch):
+    store = ColumnarStatusStore(str(tmp_path))
+    store.open()
+    monkeypatch.setattr(analytic_store, "_store", store)
+    feed = ChangeFeed()
+    feed._poll()
+
+    # Committed through another connection, as another process would
+    add_status(db, "2021-03-04 19:00:00", "2021-03-04 19:59:00")
+    _, statuses = feed._poll()
+
+    assert len(statuses) == 1
+    assert (store.count, store.max_id) == (1, statuses[0].id)
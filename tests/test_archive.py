@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from thermostat_backend import archive as archive_module
+from thermostat_backend.archive import StatusArchive
+from thermostat_backend.models import Status
+from thermostat_backend.services import StatusService
+
+
+def add_statuses(db, month_days) -> None:
+    for month, day in month_days:
+        db.add(Status(start_time=f"2020-{month:02d}-{day:02d} 10:00:00.000000",
+                      end_time=f"2020-{month:02d}-{day:02d} 10:59:00.000000",
+                      minutes_heating=day, average_indoor_temp=21.0, average_outdoor_temp=4.5))
+    db.commit()
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    status_archive = StatusArchive(str(tmp_path))
+    monkeypatch.setattr(archive_module, "_archive", status_archive)
+    return status_archive
+
+
+def test_all_statuses_page_through_archive_by_id(db, archive):
+    # A late arrival for January gets a higher id than the February rows
+    add_statuses(db, [(1, 1), (2, 1), (2, 2), (1, 2), (3, 1)])
+    assert archive.archive_month(db, 2020, 1) + archive.archive_month(db, 2020, 2) == 4
+
+    pages = [
+        [status.id for status in StatusService.get_all_statuses(db, limit=2, offset=offset)]
+        for offset in (0, 2, 4)
+    ]
+
+    assert pages == [[1, 2], [3, 4], [5]]
+    assert [status.start_time[:10] for status in archive.first_by_id(4)] == [
+        "2020-01-01", "2020-02-01", "2020-02-02", "2020-01-02"
+    ]
+
+
+def test_id_index_follows_rewritten_files(db, archive):
+    add_statuses(db, [(1, 1), (1, 2), (3, 1)])
+    archive.archive_month(db, 2020, 1)
+    assert [status.id for status in archive.first_by_id(10)] == [1, 2]
+
+    add_statuses(db, [(1, 3), (3, 2)])
+    archive.archive_month(db, 2020, 1)
+    assert [status.id for status in archive.first_by_id(10)] == [1, 2, 4]
+
+
+def test_periodic_archival_runs_off_the_event_loop(db, archive, monkeypatch):
+    threads = []
+
+    def archive_closed_months(session, keep_months):
+        threads.append(threading.current_thread())
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(archive, "archive_closed_months", archive_closed_months)
+
+    async def run():
+        with pytest.raises(asyncio.CancelledError):
+            await archive.run_periodically(keep_months=3)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert threads and threads[0] is not loop_thread
+
+
+def test_rows_in_sqlite_and_archive_are_counted_once(db, archive):
+    add_statuses(db, [(1, 1), (1, 2), (3, 1)])
+    january = [status.to_dict() for status in db.query(Status).filter(Status.start_time < "2020-02").all()]
+    assert archive.archive_month(db, 2020, 1) == 2
+    # As after a crash between writing the Parquet file and deleting the rows
+    db.add_all(Status(**row) for row in january)
+    db.commit()
+
+    assert len(StatusService.get_statuses_by_period(db, "2020-01-01", "2020-01-31")) == 2
+    assert [status.id for status in StatusService.get_all_statuses(db, limit=10)] == [1, 2, 3]
+    summary = StatusService._raw_summary(db, "2020-01-01 00:00:00.000000", "2020-02-01 00:00:00.000000")
+    assert summary[:2] == (2, 3)
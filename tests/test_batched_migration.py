@@ -0,0 +1,75 @@
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from thermostat_backend.batched_migration import BatchedMigration
+
+
+def build(file: str, rows: int) -> None:
+    conn = sqlite3.connect(file)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", ((i, i * 10) for i in range(1, rows + 1)))
+    conn.commit()
+    conn.close()
+
+
+def write(file: str, sql: str) -> None:
+    conn = sqlite3.connect(file)
+    conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def migrate(file: str, between_copy_and_finish=None, stop_after_copy: bool = False) -> None:
+    engine = create_engine(f"sqlite:///{file}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration = BatchedMigration(conn, "test")
+        migration.start(lambda: conn.exec_driver_sql(
+            "CREATE TABLE items_new (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"
+        ))
+        migration.copy("items", "items_new", ["id", "value"], batch_size=4, pause=0)
+        if between_copy_and_finish:
+            between_copy_and_finish()
+        if not stop_after_copy:
+            migration.finish(lambda: (
+                conn.exec_driver_sql("DROP TABLE items"),
+                conn.exec_driver_sql("ALTER TABLE items_new RENAME TO items")
+            ))
+    engine.dispose()
+
+
+def items(file: str) -> list:
+    conn = sqlite3.connect(file)
+    try:
+        return conn.execute("SELECT id, value FROM items ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_finish_copies_rows_inserted_during_the_copy(tmp_path):
+    file = str(tmp_path / "data.db")
+    build(file, 10)
+
+    migrate(file, lambda: write(file, "INSERT INTO items VALUES (11, 110)"))
+
+    assert items(file) == [(i, i * 10) for i in range(1, 12)]
+
+
+def test_resumed_migration_catches_up_before_the_swap(tmp_path):
+    file = str(tmp_path / "data.db")
+    build(file, 10)
+    migrate(file, stop_after_copy=True)
+    write(file, "INSERT INTO items VALUES (11, 110)")
+
+    migrate(file)
+
+    assert items(file) == [(i, i * 10) for i in range(1, 12)]
+
+
+def test_updates_to_copied_rows_are_not_carried_over(tmp_path):
+    file = str(tmp_path / "data.db")
+    build(file, 3)
+
+    migrate(file, lambda: write(file, "UPDATE items SET value = -1 WHERE id = 1"))
+
+    assert items(file)[0] == (1, 10)
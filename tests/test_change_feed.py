@@ -0,0 +1,79 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from thermostat_backend.cache import get_result_cache
+from thermostat_backend.change_feed import ChangeFeed
+from thermostat_backend.events import broadcaster
+from thermostat_backend.models import DailyPowerUsage, SensorReading, Status, WeatherForecast
+
+
+def add_status(db, hour: int) -> None:
+    db.add(Status(
+        start_time=f"2024-01-15 {hour:02d}:00:00.000000",
+        end_time=f"2024-01-15 {hour:02d}:59:00.000000",
+        minutes_heating=20,
+        average_indoor_temp=21.0,
+        average_outdoor_temp=4.5
+    ))
+
+
+def test_relays_rows_written_by_another_process(db):
+    add_status(db, 1)
+    db.add(SensorReading(entity_id="sensor.old", state="1", timestamp=datetime(2024, 1, 15, 9)))
+    db.commit()
+    feed = ChangeFeed()
+    feed.prime(db)
+
+    db.add(SensorReading(home_id="cabin", entity_id="sensor.living_room", state="21.5",
+                         timestamp=datetime(2024, 1, 15, 10)))
+    db.add(WeatherForecast(entity_id="weather.home", forecast_data='[{"temperature": 3}]',
+                           timestamp=datetime(2024, 1, 15, 10)))
+    db.add(DailyPowerUsage(date=date(2024, 1, 15), import_start_value=1.0, import_end_value=3.0, daily_import=2.0,
+                           daily_usage=2.0, timestamp=datetime(2024, 1, 15, 10)))
+    add_status(db, 2)
+    db.commit()
+
+    events, statuses = feed.poll(db)
+
+    assert [(event_type, home_id) for event_type, _, home_id in events] == [
+        ("sensor_readings", "cabin"), ("weather_forecast", "default"), ("daily_power_usage", "default")
+    ]
+    assert events[0][1] == [{"entity_id": "sensor.living_room", "state": "21.5", "timestamp": "2024-01-15T10:00:00"}]
+    assert events[1][1]["forecast_data"] == [{"temperature": 3}]
+    assert [status.start_time for status in statuses] == ["2024-01-15 02:00:00.000000"]
+    assert feed.poll(db) == ([], [])
+
+
+def test_power_usage_updated_in_place_is_relayed_again(db):
+    usage = DailyPowerUsage(date=date(2024, 1, 15), import_start_value=1.0, import_end_value=3.0, daily_import=2.0,
+                            daily_usage=2.0, timestamp=datetime(2024, 1, 15, 10))
+    db.add(usage)
+    db.commit()
+    feed = ChangeFeed()
+    feed.prime(db)
+
+    usage.daily_usage = 5.0
+    usage.timestamp += timedelta(minutes=5)
+    db.commit()
+
+    events, _ = feed.poll(db)
+    assert [data["daily_usage"] for _, data, _ in events] == [5.0]
+
+
+def test_apply_publishes_and_invalidates(db):
+    cache = get_result_cache()
+    cache.put("day", 1, ("2024-01-15 00:00:00.000000", "2024-01-15 23:59:59.999999"))
+    add_status(db, 3)
+    db.commit()
+    statuses = db.query(Status.id, Status.start_time, Status.end_time).all()
+
+    async def run():
+        queue = broadcaster.subscribe("default")
+        try:
+            ChangeFeed().apply([("sensor_readings", [], "default")], statuses, publish=True)
+            return queue.qsize()
+        finally:
+            broadcaster.unsubscribe(queue, "default")
+
+    assert asyncio.run(run()) == 1
+    assert cache.get("day") == (False, None)
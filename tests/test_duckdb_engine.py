@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("numpy")
+
+from thermostat_backend.duckdb_engine import DuckDBAnalytics
+from thermostat_backend.models import Status
+
+
+def add_status(db, start_time: str, end_time: str) -> None:
+    db.add(Status(start_time=start_time, end_time=end_time, minutes_heating=20,
+                  average_indoor_temp=21.0, average_outdoor_temp=4.5))
+    db.commit()
+
+
+def test_unparseable_times_are_skipped(db):
+    add_status(db, "2021-03-04 19:00:00", "2021-03-04 19:59:00")
+    engine = DuckDBAnalytics()
+    assert engine.open(db) == 1
+
+    add_status(db, "03/04/2021 20:00", "03/04/2021 20:59")
+    add_status(db, "2021-03-04 21:00:00.000000", "2021-03-04 21:59:00.000000")
+
+    assert engine.get_statistics(db).total_records == 2
+    assert (engine.count, engine.max_id) == (2, 3)
+    # The skipped row is not read again
+    assert engine._catch_up(db) == 0
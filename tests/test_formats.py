@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from thermostat_backend.formats import MSGPACK, msgpack_available
+from thermostat_backend.main import app
+from thermostat_backend.models import Status
+
+
+@pytest.fixture
+def client(db):
+    db.add(Status(start_time="2024-01-15 10:00:00.000000", end_time="2024-01-15 10:59:00.000000",
+                  minutes_heating=20, average_indoor_temp=21.0, average_outdoor_temp=4.5))
+    db.commit()
+    # Without the context manager startup doesn't run, so no background jobs or change feed
+    return TestClient(app)
+
+
+def vary(response) -> list:
+    return [token.strip() for token in response.headers.get("vary", "").split(",") if token.strip()]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/statuses/hourly/2024-01-15",
+    "/api/v1/statuses/hourly/2023-01-01",
+    "/api/v1/statuses/daily/2024/13",
+    "/api/v1/facts/daily?start_date=nonsense",
+])
+def test_negotiated_routes_vary_on_accept_for_json_and_errors(client, path):
+    response = client.get(path)
+
+    assert vary(response).count("Accept") == 1
+
+
+def test_routes_without_negotiation_dont_vary(client):
+    assert "Accept" not in vary(client.get("/api/v1/statuses/all"))
+
+
+@pytest.mark.skipif(not msgpack_available(), reason="msgpack not installed")
+def test_binary_response_varies_once(client):
+    response = client.get("/api/v1/statuses/hourly/2024-01-15", headers={"Accept": MSGPACK})
+
+    assert response.headers["content-type"] == MSGPACK
+    assert vary(response).count("Accept") == 1
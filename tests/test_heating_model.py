@@ -0,0 +1,33 @@
+import pytest
+
+from thermostat_backend.heating_model import EMPTY_MOMENTS, _database_moments, combine_moments, status_moments
+from thermostat_backend.models import Status
+
+PERIODS = [
+    ("2021-03-04 20:00:00.000000", "2021-03-04 20:59:00.000000"),
+    ("2021-03-04 21:00:00", "2021-03-04 21:30:00"),
+    ("2021-03-04 22:00", "2021-03-04 22:45"),
+    ("2021-03-04T23:00:00.5Z", "2021-03-05T00:00:00.5Z"),
+    ("2021-03-05 01:00:00+01:00", "2021-03-05 00:30:00"),
+    ("03/04/2021 20:00", "03/04/2021 21:00"),
+    ("2021-03-05 02:00:00", "2021-03-05 02:00:00"),
+]
+
+
+def test_python_and_sql_moments_agree(db):
+    statuses = []
+    for minutes, (start_time, end_time) in enumerate(PERIODS, start=10):
+        status = Status(start_time=start_time, end_time=end_time, minutes_heating=minutes,
+                        average_indoor_temp=21.0, average_outdoor_temp=float(minutes % 7))
+        db.add(status)
+        statuses.append(status)
+    db.commit()
+
+    python_moments = EMPTY_MOMENTS
+    for status in statuses:
+        python_moments = combine_moments(python_moments, status_moments(status))
+    sql_moments, _ = _database_moments(db)
+
+    # The unparseable and the zero-length periods are left out by both
+    assert python_moments[0] == sql_moments[0] == 5
+    assert python_moments == pytest.approx(sql_moments, rel=1e-6)
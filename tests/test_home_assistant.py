@@ -0,0 +1,44 @@
+import logging
+
+from thermostat_backend import home_assistant
+from thermostat_backend.home_assistant import HomeAssistantService
+from thermostat_backend.models import SensorReading
+
+
+class FailingSession:
+    """A session whose writes fail, as while the database is locked"""
+
+    def bulk_insert_mappings(self, mapper, mappings):
+        raise RuntimeError("database is locked")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def queue_readings(service: HomeAssistantService, count: int) -> None:
+    service.save_sensor_readings([{"entity_id": f"sensor.s{i}", "state": "1"} for i in range(count)])
+
+
+def test_failed_flushes_keep_only_the_newest_readings(db, monkeypatch, caplog):
+    service = HomeAssistantService("http://ha.local")
+    service.sensor_flush_max_pending = 1000
+    service.sensor_buffer_max_readings = 3
+    monkeypatch.setattr(home_assistant, "SessionLocal", FailingSession)
+
+    queue_readings(service, 2)
+    service.flush_sensor_readings()
+    service.save_sensor_readings([{"entity_id": "sensor.s0", "state": "2"}, {"entity_id": "sensor.s1", "state": "2"}])
+    with caplog.at_level(logging.WARNING, logger=home_assistant.__name__):
+        service.flush_sensor_readings()
+
+    assert [(r["entity_id"], r["state"]) for r in service._pending_readings] == [
+        ("sensor.s1", "1"), ("sensor.s0", "2"), ("sensor.s1", "2")
+    ]
+    assert "Dropped the 1 oldest" in caplog.text
+
+    monkeypatch.undo()
+    service.flush_sensor_readings()
+    assert db.query(SensorReading).count() == 3
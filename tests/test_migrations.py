@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from thermostat_backend.database import SCHEMA_REVISION
+from thermostat_backend.models import Base
+
+alembic = pytest.importorskip("alembic")
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+@pytest.fixture
+def migrated_url(tmp_path, monkeypatch):
+    """An empty database file that env.py migrates; no ini file, so test logging is left alone"""
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    return url, config
+
+
+def test_upgrade_on_empty_database_creates_every_table(migrated_url):
+    url, config = migrated_url
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            tables = set(inspect(conn).get_table_names())
+            revision = conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+    finally:
+        engine.dispose()
+    assert set(Base.metadata.tables) <= tables
+    assert revision == SCHEMA_REVISION
+
+
+def test_downgrade_after_fresh_upgrade_removes_every_table(migrated_url):
+    url, config = migrated_url
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            tables = set(inspect(conn).get_table_names())
+    finally:
+        engine.dispose()
+    assert tables == {"alembic_version"}
+
+    # And back up again
+    command.upgrade(config, "head")
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from thermostat_backend.models import SensorReading, Status
+from thermostat_backend.mqtt_ingest import MqttIngestor
+from thermostat_backend.services import StatusService
+
+
+def status_payload(hour: int) -> bytes:
+    return json.dumps({
+        "start_time": f"2024-01-15 {hour:02d}:00:00.000000",
+        "end_time": f"2024-01-15 {hour:02d}:59:00.000000",
+        "minutes_heating": 20,
+        "average_indoor_temp": 21.0,
+        "average_outdoor_temp": 4.5
+    }).encode()
+
+
+class FakeClient:
+    """Stands in for the paho client: delivers the given messages once started and records acks"""
+
+    def __init__(self, loop, queue, messages):
+        self._loop = loop
+        self._queue = queue
+        self._messages = messages
+        self.on_disconnect = None
+        self.acks = []
+        self.acked = asyncio.Event()
+
+    def connect(self, host, port):
+        pass
+
+    def loop_start(self):
+        for mid, (topic, payload) in enumerate(self._messages, start=1):
+            message = SimpleNamespace(topic=topic, payload=payload, mid=mid, qos=1)
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def ack(self, mid, qos):
+        self.acks.append(mid)
+        if len(self.acks) == len(self._messages):
+            self.acked.set()
+
+    def disconnect(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+
+def consume(ingestor: MqttIngestor, messages) -> FakeClient:
+    """Run the consumer against a fake client until every message is acked"""
+    clients = []
+
+    def make_client(loop, queue):
+        clients.append(FakeClient(loop, queue, messages))
+        return clients[0]
+
+    ingestor._client = make_client
+
+    async def run():
+        task = asyncio.create_task(ingestor._consume())
+        while not clients:
+            await asyncio.sleep(0)
+        await asyncio.wait_for(clients[0].acked.wait(), timeout=5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    return clients[0]
+
+
+def test_messages_are_written_and_acked_after_commit(db):
+    ingestor = MqttIngestor("broker", batch_size=3, batch_seconds=0.05)
+    client = consume(ingestor, [
+        ("thermostat/status", status_payload(1)),
+        ("thermostat/sensors/default/sensor.living_room", b'{"state": "21.5", "timestamp": "2024-01-15T10:00:00Z"}'),
+        ("thermostat/status", status_payload(2)),
+    ])
+
+    assert client.acks == [1, 2, 3]
+    assert db.query(Status).count() == 2
+    assert db.query(SensorReading).count() == 1
+
+
+@pytest.mark.parametrize("payload", [
+    b'{"state": 1, "timestamp": 12345}',
+    b'{"state": "on", "timestamp": "not a time"}',
+    b'\xff\xfe',
+])
+def test_malformed_sensor_message_is_dropped_and_acked(db, payload):
+    ingestor = MqttIngestor("broker")
+    ingestor.add("thermostat/sensors/default/sensor.x", payload, mid=7, qos=1)
+
+    assert ingestor.messages_rejected == 1
+    assert ingestor.write_batch() == [(7, 1)]
+    assert db.query(SensorReading).count() == 0
+
+
+def test_failed_write_is_not_acked(db, monkeypatch):
+    def fail(db, statuses_data):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(StatusService, "insert_statuses", staticmethod(fail))
+    ingestor = MqttIngestor("broker")
+    ingestor.add("thermostat/status", status_payload(1), mid=1, qos=1)
+
+    with pytest.raises(RuntimeError):
+        ingestor.write_batch()
+    assert db.query(Status).count() == 0
+
+
+def test_failure_after_commit_still_acks_once(db, monkeypatch):
+    def fail(db, statuses):
+        raise ValueError("derived data failed")
+
+    monkeypatch.setattr(StatusService, "_after_insert", staticmethod(fail))
+    ingestor = MqttIngestor("broker")
+    ingestor.add("thermostat/status", status_payload(1), mid=1, qos=1)
+
+    assert ingestor.write_batch() == [(1, 1)]
+    assert ingestor.write_batch() == []
+    assert db.query(Status).count() == 1
@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+import pytest
+
+from thermostat_backend.partitions import StatusPartitions
+
+
+def test_periodic_partitioning_runs_off_the_event_loop(db, tmp_path, monkeypatch):
+    partitions = StatusPartitions(str(tmp_path))
+    threads = []
+
+    def partition_closed_years(session, keep_years):
+        threads.append(threading.current_thread())
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(partitions, "partition_closed_years", partition_closed_years)
+
+    async def run():
+        with pytest.raises(asyncio.CancelledError):
+            await partitions.run_periodically(keep_years=1)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert threads and threads[0] is not loop_thread
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from thermostat_backend import circuit_breaker, readiness
+from thermostat_backend.models import PollerHealth
+from thermostat_backend.readiness import HEARTBEAT, PollFreshness, check_readiness
+
+
+def persist(db, freshness: PollFreshness, failed_jobs=()) -> None:
+    """Write poller_health the way the process running the background jobs does"""
+    freshness.persist(db, list(failed_jobs))
+
+
+def age_row(db, name: str, seconds: float) -> None:
+    db.query(PollerHealth).filter(PollerHealth.name == name).update(
+        {"since": datetime.utcnow() - timedelta(seconds=seconds)}
+    )
+    db.commit()
+
+
+def test_ready_from_poller_running_elsewhere(db):
+    freshness = PollFreshness()
+    freshness.register("default:states", 180)
+    freshness.record_success("default:states")
+    persist(db, freshness)
+
+    report = asyncio.run(check_readiness())
+
+    assert report["status"] == "ready"
+    assert report["background_jobs"]["process"] == "other"
+    assert [source["source"] for source in report["sources"]] == ["default:states"]
+
+
+def test_stale_heartbeat_means_poller_died(db):
+    persist(db, PollFreshness())
+    age_row(db, HEARTBEAT, 3 * readiness.HEARTBEAT_SECONDS + 1)
+
+    assert asyncio.run(check_readiness())["status"] == "not_ready"
+
+
+def test_failed_job_in_poller_process(db):
+    persist(db, PollFreshness(), failed_jobs=["home_assistant_polling"])
+
+    report = asyncio.run(check_readiness())
+
+    assert report["status"] == "not_ready"
+    assert report["background_jobs"]["failed"] == ["home_assistant_polling"]
+
+
+def test_stale_source_in_poller_process(db):
+    freshness = PollFreshness()
+    freshness.register("default:states", 180)
+    persist(db, freshness)
+    age_row(db, "default:states", 181)
+
+    report = asyncio.run(check_readiness())
+
+    assert report["status"] == "not_ready"
+    assert report["sources"][0]["stale"]
+
+
+def test_missing_heartbeat_after_startup_grace(db, monkeypatch):
+    monkeypatch.setattr(readiness, "_process_started", time.monotonic())
+    assert asyncio.run(check_readiness())["status"] == "ready"
+
+    monkeypatch.setattr(readiness, "_process_started", readiness._process_started - 3 * readiness.HEARTBEAT_SECONDS - 1)
+    assert asyncio.run(check_readiness())["status"] == "not_ready"
+
+
+def test_poller_circuits_are_reported_from_heartbeat(db, monkeypatch):
+    circuit = {"name": "default:states", "state": "open"}
+    monkeypatch.setattr(circuit_breaker, "breaker_snapshots", lambda: [circuit])
+    persist(db, PollFreshness())
+
+    heartbeat, _ = readiness.read_poller_health()
+
+    assert heartbeat["circuits"] == [circuit]
+    assert "circuits" not in asyncio.run(check_readiness())["background_jobs"]["heartbeat"]
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from thermostat_backend.database import SCHEMA_REVISION, create_tables, engine, ensure_schema
+
+
+def test_table_missing_model_columns_fails_startup(db):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE weather_forecasts"))
+        # The shape create_tables() gave it before forecasts were stored per home
+        conn.execute(text(
+            "CREATE TABLE weather_forecasts (id INTEGER PRIMARY KEY, entity_id VARCHAR NOT NULL, "
+            "forecast_data TEXT NOT NULL, timestamp DATETIME NOT NULL)"
+        ))
+    try:
+        with pytest.raises(RuntimeError, match="weather_forecasts.home_id"):
+            ensure_schema()
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE weather_forecasts"))
+        create_tables()
+
+
+def test_database_with_every_column_starts(db):
+    assert ensure_schema() == "create_all"
+
+
+def test_stamped_database_missing_a_table_gets_it(db):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:revision)"), {"revision": SCHEMA_REVISION})
+    try:
+        assert ensure_schema() == "current"
+
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE statuses"))
+        assert ensure_schema() == "create_all"
+        with engine.connect() as conn:
+            assert "statuses" in inspect(conn).get_table_names()
+        assert ensure_schema() == "current"
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
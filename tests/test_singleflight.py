@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+
+from thermostat_backend.singleflight import SingleFlight
+
+
+class Counting:
+    """A blocking call that counts its executions and returns once released"""
+
+    def __init__(self, result="result"):
+        self.calls = 0
+        self.release = threading.Event()
+        self.result = result
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.release.wait(timeout=5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result, args
+
+
+async def gather_released(flight: SingleFlight, fn: Counting, calls: list) -> list:
+    """Start every call, release fn once all of them are waiting on it, and collect the outcomes"""
+    results = asyncio.gather(*calls, return_exceptions=True)
+    while flight.executions + flight.coalesced < len(calls):
+        await asyncio.sleep(0)
+    fn.release.set()
+    return await results
+
+
+def test_concurrent_identical_calls_execute_once():
+    flight = SingleFlight()
+    fn = Counting()
+
+    results = asyncio.run(gather_released(flight, fn, [flight.do("stats", fn, 2024) for _ in range(10)]))
+
+    assert fn.calls == 1
+    assert results == [("result", (2024,))] * 10
+    assert flight.snapshot() == {"in_flight": 0, "executions": 1, "coalesced": 9}
+
+
+def test_callers_share_the_exception():
+    flight = SingleFlight()
+    fn = Counting(ValueError("database is locked"))
+
+    results = asyncio.run(gather_released(flight, fn, [flight.do("stats", fn) for _ in range(3)]))
+
+    assert fn.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_distinct_keys_and_later_calls_execute_again():
+    flight = SingleFlight()
+    fn = Counting()
+    fn.release.set()
+
+    async def run():
+        await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+        await flight.do("a", fn)
+
+    asyncio.run(run())
+    assert fn.calls == 3
+
+
+@pytest.mark.parametrize("cancelled", [0, 1])
+def test_one_caller_cancelling_does_not_cancel_the_others(cancelled):
+    flight = SingleFlight()
+    fn = Counting()
+
+    async def run():
+        callers = [asyncio.ensure_future(flight.do("stats", fn)) for _ in range(2)]
+        while flight.executions + flight.coalesced < 2:
+            await asyncio.sleep(0)
+        callers[cancelled].cancel()
+        fn.release.set()
+        return await callers[1 - cancelled]
+
+    assert asyncio.run(run()) == ("result", ())
+    assert fn.calls == 1
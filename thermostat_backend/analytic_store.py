@@ -0,0 +1,373 @@
+import fcntl
+import json
+import logging
+import os
+from calendar import monthrange
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .models import Status
+from .schemas import StatsSummary, HourlyData, DailyData, MonthlyData
+
+# Optional dependency, imported on first use so processes without the store skip its import cost
+np = None
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype; times are epoch microseconds of the naive start/end strings
+COLUMNS = {
+    "id": "int64",
+    "start": "int64",
+    "end": "int64",
+    "minutes_heating": "int64",
+    "indoor": "float64",
+    "outdoor": "float64"
+}
+
+US_PER_HOUR = 3600 * 1_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+
+
+def numpy_available() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def _epoch_us(value: datetime) -> int:
+    return int(np.datetime64(value, "us").astype("int64"))
+
+
+class ColumnarStatusStore:
+    """Column-oriented copy of the statuses table in memory-mapped .npy files.
+
+    The files persist between runs, so startup only reads rows whose id is
+    higher than the last one stored. SQLite assigns ids in commit order, which
+    makes "id > max_id" a complete catch-up. Writers in several processes are
+    serialized with a lock file; readers pick up the new length from meta.json.
+    Rows deleted or updated in SQLite afterwards are not reflected.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 65536):
+        if not numpy_available():
+            raise ImportError("numpy is required for the analytic store (install the analytics extra)")
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self.count = 0
+        self.capacity = 0
+        self.max_id = 0
+        self._columns: Dict[str, Any] = {}
+        self._meta_mtime = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.npy")
+
+    @property
+    def _meta_file(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @contextmanager
+    def _write_lock(self):
+        with open(os.path.join(self.path, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def open(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        with self._write_lock():
+            if not os.path.exists(self._meta_file):
+                self._allocate(self.initial_capacity, copy_rows=0)
+                self._write_meta()
+            self._read_meta(force=True)
+
+    def _read_meta(self, force: bool = False) -> None:
+        mtime = os.stat(self._meta_file).st_mtime_ns
+        if not force and mtime == self._meta_mtime:
+            return
+
+        with open(self._meta_file) as f:
+            meta = json.load(f)
+        self._meta_mtime = mtime
+        self.count = meta["count"]
+        self.max_id = meta["max_id"]
+        if meta["capacity"] != self.capacity or not self._columns:
+            self.capacity = meta["capacity"]
+            self._columns = {
+                name: np.load(self._file(name), mmap_mode="r+") for name in COLUMNS
+            }
+
+    def _write_meta(self) -> None:
+        for column in self._columns.values():
+            column.flush()
+        tmp_file = self._meta_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"count": self.count, "capacity": self.capacity, "max_id": self.max_id}, f)
+        os.replace(tmp_file, self._meta_file)
+        self._meta_mtime = os.stat(self._meta_file).st_mtime_ns
+
+    def _allocate(self, capacity: int, copy_rows: int) -> None:
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            tmp_file = self._file(name) + ".tmp"
+            column = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=dtype, shape=(capacity,))
+            if copy_rows:
+                column[:copy_rows] = self._columns[name][:copy_rows]
+            column.flush()
+            del column
+            os.replace(tmp_file, self._file(name))
+            columns[name] = np.load(self._file(name), mmap_mode="r+")
+        self._columns = columns
+        self.capacity = capacity
+
+    @staticmethod
+    def _times_parse(row: tuple) -> bool:
+        try:
+            np.datetime64(row[1], "us")
+            np.datetime64(row[2], "us")
+        except (TypeError, ValueError):
+            logger.warning(f"Analytic store skipping status {row[0]} with unparseable times {row[1]!r}, {row[2]!r}")
+            return False
+        return True
+
+    def _append_rows(self, rows: List[tuple]) -> None:
+        """Append (id, start_time, end_time, minutes_heating, indoor, outdoor) rows; caller holds the lock.
+
+        Rows whose times aren't ISO strings (the API accepts any string) are
+        skipped but still move max_id past them, so a catch-up never reads
+        them again.
+        """
+        if not rows:
+            return
+
+        max_id = max(row[0] for row in rows)
+        try:
+            starts = np.array([row[1] for row in rows], dtype="datetime64[us]")
+            ends = np.array([row[2] for row in rows], dtype="datetime64[us]")
+        except ValueError:
+            rows = [row for row in rows if self._times_parse(row)]
+            starts = np.array([row[1] for row in rows], dtype="datetime64[us]")
+            ends = np.array([row[2] for row in rows], dtype="datetime64[us]")
+
+        needed = self.count + len(rows)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._allocate(capacity, copy_rows=self.count)
+
+        if rows:
+            ids, _, _, minutes, indoor, outdoor = zip(*rows)
+            section = slice(self.count, needed)
+            self._columns["id"][section] = ids
+            self._columns["start"][section] = starts.astype("int64")
+            self._columns["end"][section] = ends.astype("int64")
+            self._columns["minutes_heating"][section] = minutes
+            self._columns["indoor"][section] = indoor
+            self._columns["outdoor"][section] = outdoor
+
+        self.count = needed
+        self.max_id = max(self.max_id, max_id)
+        self._write_meta()
+
+    def sync(self, db: Session, chunk_size: int = 50000) -> int:
+        """Append statuses with an id above the stored maximum; returns the number appended"""
+        appended = 0
+        with self._write_lock():
+            self._read_meta()
+            while True:
+                rows = db.query(
+                    Status.id,
+                    Status.start_time,
+                    Status.end_time,
+                    Status.minutes_heating,
+                    Status.average_indoor_temp,
+                    Status.average_outdoor_temp
+                ).filter(Status.id > self.max_id).order_by(Status.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                self._append_rows([tuple(row) for row in rows])
+                appended += len(rows)
+        return appended
+
+    def append(self, db: Session, statuses: List[Status]) -> None:
+        """Append freshly committed statuses, falling back to a catch-up sync if ids have a gap"""
+        with self._write_lock():
+            self._read_meta()
+            new = sorted((s for s in statuses if s.id > self.max_id), key=lambda s: s.id)
+            if new and new[0].id == self.max_id + 1 and new[-1].id - new[0].id == len(new) - 1:
+                self._append_rows([
+                    (s.id, s.start_time, s.end_time, s.minutes_heating, s.average_indoor_temp, s.average_outdoor_temp)
+                    for s in new
+                ])
+                return
+        if new:
+            self.sync(db)
+
+    def _view(self) -> Dict[str, Any]:
+        self._read_meta()
+        return {name: column[:self.count] for name, column in self._columns.items()}
+
+    # Query methods mirror the StatusService results
+
+    @staticmethod
+    def _bucket_averages(buckets, columns, mask, size: int):
+        bucket = buckets[mask]
+        counts = np.bincount(bucket, minlength=size)
+        heating = np.bincount(bucket, weights=columns["minutes_heating"][mask], minlength=size)
+        indoor = np.bincount(bucket, weights=columns["indoor"][mask], minlength=size)
+        outdoor = np.bincount(bucket, weights=columns["outdoor"][mask], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_indoor = np.where(counts > 0, indoor / np.maximum(counts, 1), 0.0)
+            avg_outdoor = np.where(counts > 0, outdoor / np.maximum(counts, 1), 0.0)
+        return counts, heating, avg_indoor, avg_outdoor
+
+    def get_statistics(self, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> StatsSummary:
+        columns = self._view()
+        if start_dt is not None and end_dt is not None:
+            mask = (columns["start"] >= _epoch_us(start_dt)) & (columns["end"] <= _epoch_us(end_dt))
+            indoor = columns["indoor"][mask]
+            outdoor = columns["outdoor"][mask]
+            heating = columns["minutes_heating"][mask]
+        else:
+            indoor = columns["indoor"]
+            outdoor = columns["outdoor"]
+            heating = columns["minutes_heating"]
+
+        if not len(indoor):
+            return StatsSummary(
+                total_records=0, total_heating_minutes=0, avg_indoor_temp=0, avg_outdoor_temp=0,
+                min_indoor_temp=0, max_indoor_temp=0, min_outdoor_temp=0, max_outdoor_temp=0
+            )
+
+        return StatsSummary(
+            total_records=len(indoor),
+            total_heating_minutes=int(heating.sum()),
+            avg_indoor_temp=round(float(indoor.mean()), 2),
+            avg_outdoor_temp=round(float(outdoor.mean()), 2),
+            min_indoor_temp=float(indoor.min()),
+            max_indoor_temp=float(indoor.max()),
+            min_outdoor_temp=float(outdoor.min()),
+            max_outdoor_temp=float(outdoor.max())
+        )
+
+    def get_hourly_data(self, day_start: datetime) -> List[HourlyData]:
+        columns = self._view()
+        lo = _epoch_us(day_start)
+        mask = (columns["start"] >= lo) & (columns["start"] < lo + US_PER_DAY)
+        hours = (columns["start"] - lo) // US_PER_HOUR
+        counts, heating, avg_indoor, avg_outdoor = self._bucket_averages(hours, columns, mask, 24)
+        return [
+            HourlyData(
+                hour=hour,
+                minutes_heating=int(heating[hour]),
+                avg_indoor_temp=round(float(avg_indoor[hour]), 2),
+                avg_outdoor_temp=round(float(avg_outdoor[hour]), 2)
+            )
+            for hour in range(24)
+        ]
+
+    def get_daily_data(self, year: int, month: int) -> List[DailyData]:
+        columns = self._view()
+        _, last_day = monthrange(year, month)
+        lo = _epoch_us(datetime(year, month, 1))
+        mask = (columns["start"] >= lo) & (columns["start"] < lo + last_day * US_PER_DAY)
+        days = (columns["start"] - lo) // US_PER_DAY
+        counts, heating, avg_indoor, avg_outdoor = self._bucket_averages(days, columns, mask, last_day)
+        return [
+            DailyData(
+                day=day + 1,
+                minutes_heating=int(heating[day]),
+                avg_indoor_temp=round(float(avg_indoor[day]), 2),
+                avg_outdoor_temp=round(float(avg_outdoor[day]), 2)
+            )
+            for day in range(last_day)
+        ]
+
+    def get_monthly_data(self, year: int) -> List[MonthlyData]:
+        columns = self._view()
+        lo = _epoch_us(datetime(year, 1, 1))
+        hi = _epoch_us(datetime(year + 1, 1, 1))
+        mask = (columns["start"] >= lo) & (columns["start"] < hi)
+        months_since_epoch = columns["start"].astype("datetime64[us]").astype("datetime64[M]").astype("int64")
+        months = months_since_epoch - (year - 1970) * 12
+        counts, heating, avg_indoor, avg_outdoor = self._bucket_averages(months, columns, mask, 12)
+        return [
+            MonthlyData(
+                month=month + 1,
+                minutes_heating=int(heating[month]),
+                avg_indoor_temp=round(float(avg_indoor[month]), 2),
+                avg_outdoor_temp=round(float(avg_outdoor[month]), 2)
+            )
+            for month in range(12)
+        ]
+
+    def get_heating_efficiency(self, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> List[dict]:
+        columns = self._view()
+        if start_dt is not None and end_dt is not None:
+            mask = (columns["start"] >= _epoch_us(start_dt)) & (columns["end"] <= _epoch_us(end_dt))
+            order = np.flatnonzero(mask)
+            order = order[np.argsort(columns["start"][order], kind="stable")]
+        else:
+            # Rows are stored in id order; SQLite returns them by start_time
+            order = np.argsort(columns["start"], kind="stable")
+
+        ids = columns["id"][order]
+        starts = np.char.replace(np.datetime_as_string(columns["start"][order].astype("datetime64[us]"), unit="us"), "T", " ")
+        heating = columns["minutes_heating"][order]
+        temp_diff = columns["indoor"][order] - columns["outdoor"][order]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            efficiency = np.where(temp_diff > 0, heating / np.where(temp_diff > 0, temp_diff, 1), 0.0)
+
+        return [
+            {
+                "id": int(ids[i]),
+                "start_time": str(starts[i]),
+                "temperature_difference": round(float(temp_diff[i]), 2),
+                "heating_minutes": int(heating[i]),
+                "heating_efficiency": round(float(efficiency[i]), 2)
+            }
+            for i in range(len(order))
+        ]
+
+
+_store: Optional[ColumnarStatusStore] = None
+
+
+def get_store() -> Optional[ColumnarStatusStore]:
+    """The analytic store, or None when it is disabled"""
+    return _store
+
+
+def init_store(db: Session) -> Optional[ColumnarStatusStore]:
+    """Open the store configured by ANALYTIC_STORE_PATH and catch up with SQLite"""
+    global _store
+
+    path = os.getenv("ANALYTIC_STORE_PATH")
+    if not path:
+        return None
+    if not numpy_available():
+        logger.warning("ANALYTIC_STORE_PATH is set but numpy is not installed, analytic store disabled")
+        return None
+
+    try:
+        store = ColumnarStatusStore(path)
+        store.open()
+        appended = store.sync(db)
+    except Exception as e:
+        logger.warning(f"Analytic store unavailable, using SQLite: {e}")
+        return None
+
+    logger.info(f"Analytic store loaded with {store.count} statuses ({appended} new)")
+    _store = store
+    return store
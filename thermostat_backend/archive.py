@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .database import worker_session
+from .models import Status
+from .stats_index import EMPTY_SUMMARY, Summary
+
+# Optional dependency, imported on first use so processes without the archive skip its import cost
+pa = pc = pq = None
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = ["id", "start_time", "end_time", "minutes_heating", "average_indoor_temp", "average_outdoor_temp"]
+
+PARTITION_PATTERN = re.compile(r"statuses-(\d{4})-(\d{2})\.parquet$")
+
+
+def pyarrow_available() -> bool:
+    global pa, pc, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, pc, pq = pyarrow, pyarrow.compute, pyarrow.parquet
+    return True
+
+
+class StatusArchive:
+    """Closed months of statuses stored as one zstd-compressed Parquet file per month.
+
+    Files live at <path>/year=YYYY/statuses-YYYY-MM.parquet. Readers prune
+    partitions by month before opening any file and only load the requested
+    columns. Time strings keep the database format, so range filters compare
+    the same way SQLite does. A month's file is written before its rows are
+    deleted from SQLite, so until the delete commits (or after a crash in
+    between) rows are in both; readers that combine the two pass the ids
+    from ids_in_database() as exclude_ids and count the SQLite copy.
+    """
+
+    def __init__(self, path: str):
+        if not pyarrow_available():
+            raise ImportError("pyarrow is required for the status archive (install the archive extra)")
+        self.path = path
+        # file -> ((mtime_ns, size), its ids sorted); rebuilt for a file whenever archival rewrites it
+        self._id_index: Dict[str, tuple] = {}
+
+    def _partition_file(self, year: int, month: int) -> str:
+        return os.path.join(self.path, f"year={year:04d}", f"statuses-{year:04d}-{month:02d}.parquet")
+
+    def partitions(self) -> List[Tuple[int, int, str]]:
+        """(year, month, file) for every archived month, oldest first"""
+        result = []
+        if not os.path.isdir(self.path):
+            return result
+        for year_dir in os.listdir(self.path):
+            full_dir = os.path.join(self.path, year_dir)
+            if not year_dir.startswith("year=") or not os.path.isdir(full_dir):
+                continue
+            for name in os.listdir(full_dir):
+                match = PARTITION_PATTERN.match(name)
+                if match:
+                    result.append((int(match.group(1)), int(match.group(2)), os.path.join(full_dir, name)))
+        return sorted(result)
+
+    def _overlapping(self, start_str: Optional[str], end_str: Optional[str]) -> List[str]:
+        first = start_str[:7] if start_str else "0000-00"
+        last = end_str[:7] if end_str else "9999-99"
+        return [
+            file for year, month, file in self.partitions()
+            if first <= f"{year:04d}-{month:02d}" <= last
+        ]
+
+    def ids_in_database(self, db: Session, start_min: Optional[str] = None, end_max: Optional[str] = None) -> List[int]:
+        """Ids of SQLite statuses that start in an archived month (and in the range)"""
+        months = [
+            (year, month) for year, month, _ in self.partitions()
+            if (not start_min or f"{year:04d}-{month:02d}" >= start_min[:7])
+            and (not end_max or f"{year:04d}-{month:02d}" <= end_max[:7])
+        ]
+        if not months:
+            return []
+
+        # Closed months only keep late arrivals and rows mid-archival in SQLite, so this range is small
+        first_year, first_month = months[0]
+        last_year, last_month = months[-1]
+        next_year, next_month = (last_year + 1, 1) if last_month == 12 else (last_year, last_month + 1)
+        query = db.query(Status.id).filter(
+            Status.start_time >= f"{first_year:04d}-{first_month:02d}-01 00:00:00.000000",
+            Status.start_time < f"{next_year:04d}-{next_month:02d}-01 00:00:00.000000"
+        )
+        return [row[0] for row in query.all()]
+
+    @staticmethod
+    def _filters(start_min: Optional[str], start_max: Optional[str], end_max: Optional[str], start_before: Optional[str]):
+        filters = []
+        if start_min:
+            filters.append(("start_time", ">=", start_min))
+        if start_max:
+            filters.append(("start_time", "<=", start_max))
+        if start_before:
+            filters.append(("start_time", "<", start_before))
+        if end_max:
+            filters.append(("end_time", "<=", end_max))
+        return filters or None
+
+    def read_table(
+        self,
+        start_min: Optional[str] = None,
+        start_max: Optional[str] = None,
+        end_max: Optional[str] = None,
+        start_before: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        exclude_ids: Optional[Sequence[int]] = None
+    ):
+        """Read matching archived rows, minus exclude_ids, as an Arrow table (None when nothing matches)"""
+        upper = start_max or start_before or end_max
+        files = self._overlapping(start_min, upper)
+        if not files:
+            return None
+
+        filters = self._filters(start_min, start_max, end_max, start_before)
+        columns = columns or STATUS_COLUMNS
+        if exclude_ids and "id" not in columns:
+            columns = columns + ["id"]
+        tables = [pq.read_table(file, columns=columns, filters=filters) for file in files]
+        table = pa.concat_tables(tables)
+        if exclude_ids:
+            table = self._without_ids(table, exclude_ids)
+        return table if table.num_rows else None
+
+    @staticmethod
+    def _without_ids(table, ids: Sequence[int]):
+        return table.filter(pc.invert(pc.is_in(table["id"], value_set=pa.array(ids, type=table["id"].type))))
+
+    def _sorted_ids(self, file: str):
+        stat = os.stat(file)
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._id_index.get(file)
+        if cached is None or cached[0] != version:
+            ids = pq.read_table(file, columns=["id"])["id"].combine_chunks()
+            cached = (version, ids.take(pc.sort_indices(ids)))
+            self._id_index[file] = cached
+        return cached[1]
+
+    def first_by_id(self, limit: int) -> List[Status]:
+        """The limit archived statuses with the lowest ids, in id order.
+
+        Files are sorted by start time, so the lowest ids can be in any of
+        them. Only the id column of each file is read (and cached), then full
+        rows are read up to the limit-th lowest id, from the files that hold any.
+        """
+        if limit <= 0:
+            return []
+        heads = []
+        for _, _, file in self.partitions():
+            ids = self._sorted_ids(file)[:limit]
+            if len(ids):
+                heads.append((file, ids))
+        if not heads:
+            return []
+
+        lowest = pa.concat_arrays([ids for _, ids in heads])
+        lowest = lowest.take(pc.sort_indices(lowest))
+        threshold = lowest[min(limit, len(lowest)) - 1].as_py()
+        table = pa.concat_tables([
+            pq.read_table(file, columns=STATUS_COLUMNS, filters=[("id", "<=", threshold)])
+            for file, ids in heads if ids[0].as_py() <= threshold
+        ])
+        return [Status(**row) for row in table.sort_by("id").slice(0, limit).to_pylist()]
+
+    def read_statuses(
+        self,
+        start_min: Optional[str] = None,
+        start_max: Optional[str] = None,
+        end_max: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        exclude_ids: Optional[Sequence[int]] = None
+    ) -> List[Status]:
+        """Matching archived rows as transient Status objects"""
+        table = self.read_table(start_min, start_max, end_max, columns=columns, exclude_ids=exclude_ids)
+        if table is None:
+            return []
+        return [Status(**row) for row in table.to_pylist()]
+
+    def summarize(
+        self,
+        start_min: Optional[str] = None,
+        end_max: Optional[str] = None,
+        start_before: Optional[str] = None,
+        exclude_ids: Optional[Sequence[int]] = None
+    ) -> Summary:
+        table = self.read_table(
+            start_min, end_max=end_max, start_before=start_before,
+            columns=["minutes_heating", "average_indoor_temp", "average_outdoor_temp"],
+            exclude_ids=exclude_ids
+        )
+        if table is None:
+            return EMPTY_SUMMARY
+        indoor = table["average_indoor_temp"]
+        outdoor = table["average_outdoor_temp"]
+        return (
+            table.num_rows,
+            pc.sum(table["minutes_heating"]).as_py(),
+            pc.sum(indoor).as_py(),
+            pc.sum(outdoor).as_py(),
+            pc.min(indoor).as_py(),
+            pc.max(indoor).as_py(),
+            pc.min(outdoor).as_py(),
+            pc.max(outdoor).as_py()
+        )
+
+    def daily_summaries(self, exclude_ids: Optional[Sequence[int]] = None) -> Dict[date, Tuple[Summary, str]]:
+        """Per-day (summary, max end_time) over the whole archive minus exclude_ids, keyed by start date"""
+        result = {}
+        for _, _, file in self.partitions():
+            table = pq.read_table(file, columns=["id", "start_time", "end_time", "minutes_heating", "average_indoor_temp", "average_outdoor_temp"])
+            if exclude_ids:
+                table = self._without_ids(table, exclude_ids)
+            table = table.append_column("day", pc.utf8_slice_codeunits(table["start_time"], 0, 10))
+            grouped = table.group_by("day").aggregate([
+                ("minutes_heating", "count"),
+                ("minutes_heating", "sum"),
+                ("average_indoor_temp", "sum"),
+                ("average_outdoor_temp", "sum"),
+                ("average_indoor_temp", "min"),
+                ("average_indoor_temp", "max"),
+                ("average_outdoor_temp", "min"),
+                ("average_outdoor_temp", "max"),
+                ("end_time", "max")
+            ])
+            for row in grouped.to_pylist():
+                summary = (
+                    row["minutes_heating_count"],
+                    row["minutes_heating_sum"],
+                    row["average_indoor_temp_sum"],
+                    row["average_outdoor_temp_sum"],
+                    row["average_indoor_temp_min"],
+                    row["average_indoor_temp_max"],
+                    row["average_outdoor_temp_min"],
+                    row["average_outdoor_temp_max"]
+                )
+                result[date.fromisoformat(row["day"])] = (summary, row["end_time_max"])
+        return result
+
+    def count(self) -> int:
+        return sum(pq.ParquetFile(file).metadata.num_rows for _, _, file in self.partitions())
+
+    def archive_month(self, db: Session, year: int, month: int, batch_size: int = 1000) -> int:
+        """Move one month of statuses from SQLite into its Parquet partition; returns rows moved"""
+        month_start = f"{year:04d}-{month:02d}-01 00:00:00.000000"
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        month_end = f"{next_year:04d}-{next_month:02d}-01 00:00:00.000000"
+
+        # SQLite hands the highest id out again once its row is deleted, so the newest
+        # row stays until a newer one exists; ids must stay unique across the archive
+        max_id = db.query(func.max(Status.id)).scalar() or 0
+        rows = db.query(
+            Status.id,
+            Status.start_time,
+            Status.end_time,
+            Status.minutes_heating,
+            Status.average_indoor_temp,
+            Status.average_outdoor_temp
+        ).filter(
+            Status.start_time >= month_start,
+            Status.start_time < month_end,
+            Status.id < max_id
+        ).order_by(Status.start_time).all()
+        if not rows:
+            return 0
+
+        table = pa.Table.from_pylist([dict(zip(STATUS_COLUMNS, row)) for row in rows])
+        file = self._partition_file(year, month)
+        if os.path.exists(file):
+            # Late arrivals for an archived month: merge and drop ids already archived
+            existing = pq.read_table(file)
+            new_rows = table.filter(pc.invert(pc.is_in(table["id"], value_set=existing["id"])))
+            table = pa.concat_tables([existing, new_rows.cast(existing.schema)])
+            table = table.take(pc.sort_indices(table, sort_keys=[("start_time", "ascending")]))
+
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp_file = file + ".tmp"
+        pq.write_table(table, tmp_file, compression="zstd")
+        os.replace(tmp_file, file)
+
+        # The Parquet file is durable before any row is deleted, so a crash here
+        # leaves duplicates that the next run removes, never a gap; until then
+        # readers exclude ids_in_database() from the archive
+        ids = [row.id for row in rows]
+        for offset in range(0, len(ids), batch_size):
+            db.query(Status).filter(Status.id.in_(ids[offset:offset + batch_size])).delete(synchronize_session=False)
+            db.commit()
+
+        logger.info(f"Archived {len(ids)} statuses for {year:04d}-{month:02d}")
+        return len(ids)
+
+    def archive_closed_months(self, db: Session, keep_months: int = 3) -> int:
+        """Archive every month older than the last keep_months months (including the current one)"""
+        today = date.today()
+        cutoff_index = today.year * 12 + (today.month - 1) - (keep_months - 1)
+        cutoff = f"{cutoff_index // 12:04d}-{cutoff_index % 12 + 1:02d}-01 00:00:00.000000"
+
+        month_column = func.substr(Status.start_time, 1, 7)
+        months = [
+            row[0] for row in db.query(month_column).filter(
+                Status.start_time < cutoff
+            ).group_by(month_column).all()
+        ]
+
+        moved = 0
+        for month in months:
+            year_str, month_str = month.split("-")
+            moved += self.archive_month(db, int(year_str), int(month_str))
+        return moved
+
+    def _archive_closed_months_in_worker(self, keep_months: int) -> int:
+        with worker_session() as db:
+            try:
+                return self.archive_closed_months(db, keep_months)
+            except Exception:
+                db.rollback()
+                raise
+
+    async def run_periodically(self, keep_months: int, interval_seconds: int = 86400) -> None:
+        """Archive closed months once per interval"""
+        while True:
+            try:
+                # Parquet writes and batched deletes take a while, so they run in a worker
+                # thread on its own connection rather than on the event loop
+                moved = await asyncio.to_thread(self._archive_closed_months_in_worker, keep_months)
+                if moved:
+                    logger.info(f"Status archival moved {moved} rows to Parquet")
+            except Exception as e:
+                logger.error(f"Error archiving statuses: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+_archive: Optional[StatusArchive] = None
+
+
+def get_archive() -> Optional[StatusArchive]:
+    """The status archive, or None when archival is disabled"""
+    return _archive
+
+
+def init_archive() -> Optional[StatusArchive]:
+    """Enable the archive configured by STATUS_ARCHIVE_PATH"""
+    global _archive
+
+    path = os.getenv("STATUS_ARCHIVE_PATH")
+    if not path:
+        return None
+    if not pyarrow_available():
+        logger.warning("STATUS_ARCHIVE_PATH is set but pyarrow is not installed, status archive disabled")
+        return None
+
+    _archive = StatusArchive(path)
+    return _archive
+
+
+def archive_keep_months() -> int:
+    return int(os.getenv("STATUS_ARCHIVE_KEEP_MONTHS", "3"))
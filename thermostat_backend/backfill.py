@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from .daily_facts import DailyFactsService
+from .database import SessionLocal
+from .home_assistant import HomeAssistantService
+from .models import DEFAULT_HOME_ID, DailyPowerUsage
+
+logger = logging.getLogger(__name__)
+
+# fetch_daily_power_usage issues one history call each for import, export and inverter yield
+REQUESTS_PER_DAY = 3
+
+
+class RateLimiter:
+    """Spaces out request starts so at most `rate` requests begin per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class PowerUsageBackfill:
+    """Fill gaps in daily_power_usage from Home Assistant history.
+
+    Missing dates are recomputed from the database on every run and rows are
+    committed in batches, so an interrupted backfill resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        ha_service: HomeAssistantService,
+        concurrency: int = 4,
+        requests_per_second: float = 5.0,
+        batch_size: int = 30
+    ):
+        self.ha_service = ha_service
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.rate_limiter = RateLimiter(requests_per_second / REQUESTS_PER_DAY)
+
+    @staticmethod
+    def find_missing_dates(
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        home_id: str = DEFAULT_HOME_ID
+    ) -> List[date]:
+        """Return dates between start_date and end_date (inclusive) without a daily_power_usage row for the home"""
+        # Today is still being written by the poller, so the default range stops at yesterday
+        end_date = end_date or (date.today() - timedelta(days=1))
+        if start_date is None:
+            first = db.query(DailyPowerUsage.date).filter(
+                DailyPowerUsage.home_id == home_id
+            ).order_by(DailyPowerUsage.date).first()
+            start_date = first.date if first else end_date - timedelta(days=364)
+
+        if start_date > end_date:
+            return []
+
+        existing = {
+            row.date for row in db.query(DailyPowerUsage.date).filter(
+                DailyPowerUsage.home_id == home_id,
+                DailyPowerUsage.date >= start_date,
+                DailyPowerUsage.date <= end_date
+            ).all()
+        }
+
+        missing = []
+        current = start_date
+        while current <= end_date:
+            if current not in existing:
+                missing.append(current)
+            current += timedelta(days=1)
+        return missing
+
+    async def _fetch_day(self, semaphore: asyncio.Semaphore, day: date) -> Optional[DailyPowerUsage]:
+        async with semaphore:
+            await self.rate_limiter.acquire()
+            power_data = await self.ha_service.fetch_daily_power_usage(day)
+
+        if not power_data:
+            logger.warning(f"Backfill: no power data available for {day}")
+            return None
+
+        return DailyPowerUsage(home_id=self.ha_service.home_id, date=day, timestamp=datetime.utcnow(), **power_data)
+
+    def _save_batch(self, rows: List[DailyPowerUsage]) -> int:
+        db = SessionLocal()
+        try:
+            # Skip dates that were filled concurrently (e.g. by the poller or a parallel run)
+            existing = {
+                row.date for row in db.query(DailyPowerUsage.date).filter(
+                    DailyPowerUsage.home_id == self.ha_service.home_id,
+                    DailyPowerUsage.date.in_([row.date for row in rows])
+                ).all()
+            }
+            new_rows = [row for row in rows if row.date not in existing]
+            db.add_all(new_rows)
+            for row in new_rows:
+                DailyFactsService.record_power_usage(db, row)
+            db.commit()
+            return len(new_rows)
+        except Exception as e:
+            logger.error(f"Backfill: error saving batch: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    async def run(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+        """Backfill all missing dates in the range and return a summary"""
+        db = SessionLocal()
+        try:
+            missing = self.find_missing_dates(db, start_date, end_date, self.ha_service.home_id)
+        finally:
+            db.close()
+
+        logger.info(f"Backfill: {len(missing)} missing dates to fetch for home {self.ha_service.home_id}")
+        if not missing:
+            return {"missing": 0, "inserted": 0, "failed": 0}
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        inserted = 0
+        failed = 0
+        started = time.monotonic()
+
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=self.concurrency)) as client:
+            self.ha_service.client = client
+            try:
+                for offset in range(0, len(missing), self.batch_size):
+                    batch = missing[offset:offset + self.batch_size]
+                    results = await asyncio.gather(*(self._fetch_day(semaphore, day) for day in batch))
+
+                    rows = [row for row in results if row is not None]
+                    failed += len(batch) - len(rows)
+                    if rows:
+                        inserted += self._save_batch(rows)
+
+                    logger.info(
+                        f"Backfill: {offset + len(batch)}/{len(missing)} dates processed, "
+                        f"{inserted} inserted, {failed} failed"
+                    )
+            finally:
+                self.ha_service.client = None
+
+        logger.info(f"Backfill finished in {time.monotonic() - started:.1f}s")
+        return {"missing": len(missing), "inserted": inserted, "failed": failed}
@@ -0,0 +1,199 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+from alembic import op
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "migration_checkpoints"
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Seconds between chunks. A writer blocked by a chunk is sleeping in SQLite's busy
+# handler; without a pause the next chunk takes the lock again before it retries.
+DEFAULT_PAUSE = 0.02
+
+# Seconds between progress lines while copying
+PROGRESS_INTERVAL = 5.0
+
+
+def _after(key: str, last_key) -> Tuple[str, dict]:
+    """WHERE clause and parameters for rows past last_key; every row when nothing was copied yet"""
+    return (f"WHERE {key} > :last", {"last": last_key}) if last_key is not None else ("", {})
+
+
+@contextmanager
+def _transaction(bind: Connection) -> Iterator[None]:
+    # The connection is in autocommit mode here, so every step opens and commits its own transaction
+    bind.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        bind.exec_driver_sql("ROLLBACK")
+        raise
+    bind.exec_driver_sql("COMMIT")
+
+
+class BatchedMigration:
+    """A data migration that copies rows in bounded chunks and can resume.
+
+    A table rebuild is split into three steps: start() creates the new table,
+    copy() fills it chunk by chunk in key order, and finish() swaps it in.
+    Each step and each chunk commits on its own together with its checkpoint
+    row, so the database is only write-locked for one chunk at a time and an
+    interrupted `alembic upgrade` picks up after the last committed chunk.
+    The checkpoints are removed once the migration finishes.
+
+    Rows inserted into the source while the copy runs are picked up by
+    finish(), which copies everything past the last checkpoint in the same
+    transaction as the swap. Updates and deletes of rows that were already
+    copied are not carried over, so run the upgrade while nothing rewrites
+    existing rows, or accept losing those changes.
+    """
+
+    def __init__(self, bind: Connection, name: str):
+        self.bind = bind
+        self.name = name
+        # (source, target, columns, expressions, key) of each copy(), for the catch-up in finish()
+        self._copies: list = []
+        bind.exec_driver_sql(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                migration VARCHAR NOT NULL,
+                step VARCHAR NOT NULL,
+                last_key,
+                rows_copied INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (migration, step)
+            )
+        """)
+
+    def _checkpoint(self, step: str):
+        return self.bind.execute(
+            text(f"SELECT last_key, rows_copied FROM {CHECKPOINT_TABLE} WHERE migration = :migration AND step = :step"),
+            {"migration": self.name, "step": step}
+        ).first()
+
+    def _save_checkpoint(self, step: str, last_key, rows_copied: int) -> None:
+        self.bind.execute(text(f"""
+            INSERT INTO {CHECKPOINT_TABLE} (migration, step, last_key, rows_copied, updated_at)
+            VALUES (:migration, :step, :last_key, :rows_copied, CURRENT_TIMESTAMP)
+            ON CONFLICT (migration, step) DO UPDATE SET
+                last_key = excluded.last_key, rows_copied = excluded.rows_copied, updated_at = excluded.updated_at
+        """), {"migration": self.name, "step": step, "last_key": last_key, "rows_copied": rows_copied})
+
+    @property
+    def started(self) -> bool:
+        return self._checkpoint("start") is not None
+
+    def start(self, setup: Callable[[], None]) -> bool:
+        """Run setup (typically creating the new table) unless an earlier run got past it; returns whether it ran"""
+        if self.started:
+            logger.info(f"{self.name}: resuming from checkpoint")
+            return False
+        with _transaction(self.bind):
+            setup()
+            self._save_checkpoint("start", None, 0)
+        return True
+
+    def copy(
+        self,
+        source: str,
+        target: str,
+        columns: Sequence[str],
+        expressions: Optional[Sequence[str]] = None,
+        key: str = "id",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        pause: float = DEFAULT_PAUSE
+    ) -> int:
+        """INSERT INTO target (columns) SELECT expressions FROM source, batch_size rows at a time.
+
+        expressions default to the column names. Rows are taken in order of
+        key, which must be unique in source and indexed (the primary key);
+        the last key copied is the checkpoint. Returns rows copied in total,
+        including those copied by earlier runs.
+        """
+        expressions = expressions or columns
+        self._copies.append((source, target, columns, expressions, key))
+        checkpoint = self._checkpoint(target)
+        last_key, copied = (checkpoint.last_key, checkpoint.rows_copied) if checkpoint else (None, 0)
+
+        where, parameters = _after(key, last_key)
+        remaining = self.bind.execute(text(f"SELECT count(*) FROM {source} {where}"), parameters).scalar()
+        total = copied + remaining
+        logger.info(f"{self.name}: copying {remaining} rows from {source} to {target} ({copied} already copied)")
+
+        started = last_report = time.monotonic()
+        copied_now = 0
+        while True:
+            where, parameters = _after(key, last_key)
+            # The key closing this chunk; None once fewer than batch_size rows are left
+            upper = self.bind.execute(
+                text(f"SELECT {key} FROM {source} {where} ORDER BY {key} LIMIT 1 OFFSET :offset"),
+                {**parameters, "offset": batch_size - 1}
+            ).scalar()
+            if upper is not None:
+                where = f"{where} AND {key} <= :upper" if where else f"WHERE {key} <= :upper"
+                parameters["upper"] = upper
+            else:
+                upper = self.bind.execute(text(f"SELECT max({key}) FROM {source} {where}"), parameters).scalar()
+                if upper is None:
+                    break
+
+            with _transaction(self.bind):
+                rows = self.bind.execute(text(f"""
+                    INSERT INTO {target} ({', '.join(columns)})
+                    SELECT {', '.join(expressions)} FROM {source} {where} ORDER BY {key}
+                """), parameters).rowcount
+                copied += rows
+                self._save_checkpoint(target, upper, copied)
+            last_key = upper
+            copied_now += rows
+            time.sleep(pause)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                rate = copied_now / (now - started)
+                eta = (total - copied) / rate if rate else 0
+                logger.info(
+                    f"{self.name}: {copied}/{total} rows ({copied / total:.0%}), "
+                    f"{rate:.0f} rows/s, about {eta:.0f}s left"
+                )
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{self.name}: copied {copied_now} rows to {target} in {elapsed:.1f}s"
+            f" ({copied_now / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return copied
+
+    def finish(self, swap: Callable[[], None]) -> None:
+        """Copy rows inserted since the last chunk, run swap (typically dropping the old table and
+        renaming the new one) and drop the checkpoints, all in one transaction"""
+        with _transaction(self.bind):
+            # Writers are locked out from here on, so nothing can land in the source after this copy
+            for source, target, columns, expressions, key in self._copies:
+                checkpoint = self._checkpoint(target)
+                where, parameters = _after(key, checkpoint.last_key if checkpoint else None)
+                rows = self.bind.execute(text(f"""
+                    INSERT INTO {target} ({', '.join(columns)})
+                    SELECT {', '.join(expressions)} FROM {source} {where} ORDER BY {key}
+                """), parameters).rowcount
+                if rows:
+                    logger.info(f"{self.name}: copied {rows} rows written to {source} during the copy")
+            swap()
+            self.bind.execute(
+                text(f"DELETE FROM {CHECKPOINT_TABLE} WHERE migration = :migration"), {"migration": self.name}
+            )
+
+
+@contextmanager
+def batched_migration(name: str) -> Iterator[BatchedMigration]:
+    """Use inside an Alembic upgrade(); name identifies its checkpoints, normally the revision id"""
+    # Alembic would otherwise run the whole upgrade in one transaction
+    with op.get_context().autocommit_block():
+        yield BatchedMigration(op.get_bind(), name)
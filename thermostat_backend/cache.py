@@ -0,0 +1,218 @@
+import functools
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from dateutil import parser
+
+logger = logging.getLogger(__name__)
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Inclusive (first, last) bounds in status time strings; None means every status may affect the result
+TimeRange = Optional[Tuple[str, str]]
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    size: int
+    expires_at: float
+    time_range: TimeRange
+
+
+class ResultCache:
+    """Bounded LRU cache of service results with a TTL and a byte budget.
+
+    Each entry records the range of status times its result depends on, and
+    invalidate_range() drops exactly the entries that overlap newly written
+    statuses. Writes made by other processes aren't seen, so the TTL bounds
+    how stale a result can get. Cached values are shared between callers and
+    must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        # Bumped by every invalidation, so results computed across a write aren't stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(found, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry.value
+
+    def put(self, key: Hashable, value: Any, time_range: TimeRange, generation: Optional[int] = None) -> bool:
+        """Store value unless it's over budget or statuses were written since generation was read"""
+        try:
+            size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return False
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, size, time.monotonic() + self.ttl_seconds, time_range)
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _remove(self, key: Hashable) -> None:
+        self.size_bytes -= self._entries.pop(key).size
+
+    def invalidate_range(self, first: str, last: str) -> int:
+        """Drop entries whose time range overlaps [first, last]"""
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.time_range is None or (entry.time_range[0] <= last and first <= entry.time_range[1])
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_statuses(self, statuses: Iterable[Any]) -> int:
+        """Drop entries affected by the given statuses, merging their periods into as few ranges as possible"""
+        spans = sorted((status.start_time, status.end_time) for status in statuses)
+        merged: List[List[str]] = []
+        for first, last in spans:
+            if merged and first <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        return sum(self.invalidate_range(first, last) for first, last in merged)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide cache, sized from RESULT_CACHE_* on first use"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(
+            max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+        )
+    return _result_cache
+
+
+def cached_result(time_range: Callable[..., TimeRange]):
+    """Cache a service function of (db, *args) by its arguments.
+
+    time_range is called with the same arguments minus db and returns the
+    status times the result depends on.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(db, *args, **kwargs):
+            cache = get_result_cache()
+            if not cache.enabled:
+                return fn(db, *args, **kwargs)
+
+            key = (fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            generation = cache.generation
+            value = fn(db, *args, **kwargs)
+            cache.put(key, value, time_range(*args, **kwargs), generation)
+            return value
+        return wrapper
+    return decorator
+
+
+def _format(value: datetime) -> str:
+    return value.strftime(TIME_FORMAT)
+
+
+def period_range(start_date: Optional[str] = None, end_date: Optional[str] = None) -> TimeRange:
+    """Range for results filtered by parsed start/end dates; unbounded unless both parse"""
+    if not start_date or not end_date:
+        return None
+    try:
+        return _format(parser.parse(start_date)), _format(parser.parse(end_date))
+    except (ValueError, OverflowError):
+        return None
+
+
+def day_range(date: str) -> TimeRange:
+    try:
+        day = parser.parse(date).date()
+    except (ValueError, OverflowError):
+        return None
+    return day.strftime("%Y-%m-%d 00:00:00.000000"), day.strftime("%Y-%m-%d 23:59:59.999999")
+
+
+def month_range(year: int, month: int) -> TimeRange:
+    if not 1 <= month <= 12:
+        return None
+    last = f"{year + 1:04d}-01-01" if month == 12 else f"{year:04d}-{month + 1:02d}-01"
+    return f"{year:04d}-{month:02d}-01 00:00:00.000000", last + " 00:00:00.000000"
+
+
+def year_range(year: int) -> TimeRange:
+    return f"{year:04d}-01-01 00:00:00.000000", f"{year:04d}-12-31 23:59:59.999999"
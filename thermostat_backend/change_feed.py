@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .analytic_store import get_store
+from .cache import get_result_cache
+from .database import worker_session
+from .events import broadcaster
+from .models import DailyPowerUsage, SensorReading, Status, WeatherForecast
+
+logger = logging.getLogger(__name__)
+
+# Most sensor readings relayed per poll; the rest follow on the next one
+MAX_READINGS_PER_POLL = 1000
+
+# (event type, data, home id) as passed to broadcaster.publish
+Event = Tuple[str, Any, str]
+
+
+def change_feed_interval_seconds() -> float:
+    return float(os.getenv("CHANGE_FEED_INTERVAL_SECONDS", "2"))
+
+
+class ChangeFeed:
+    """Picks up rows other processes wrote, for this process's SSE subscribers and result cache.
+
+    Dashboard deltas are published and cached results invalidated in the
+    process that writes the rows. With several processes (POLLER_MODE=leader
+    or disabled) the others read the shared database every
+    CHANGE_FEED_INTERVAL_SECONDS instead: sensor readings and statuses by id,
+    which only grows, and forecasts and power usage by timestamp, since those
+    rows are updated in place. New statuses are also appended to the analytic
+    store, when enabled. Deltas are only published while this process
+    doesn't run the background jobs itself, which publish their own.
+    """
+
+    def __init__(self):
+        # Last row seen per table; None until the first poll records where the tables stand
+        self.reading_id: Optional[int] = None
+        self.status_id: Optional[int] = None
+        self.forecast_at = None
+        self.power_at = None
+
+        self.polls = 0
+        self.events_published = 0
+        self.statuses_invalidated = 0
+
+    @property
+    def primed(self) -> bool:
+        return self.reading_id is not None
+
+    def prime(self, db: Session) -> None:
+        """Start from the current end of each table; the dashboard snapshot covers everything before"""
+        self.reading_id = db.query(func.max(SensorReading.id)).scalar() or 0
+        self.status_id = db.query(func.max(Status.id)).scalar() or 0
+        self.forecast_at = db.query(func.max(WeatherForecast.timestamp)).scalar()
+        self.power_at = db.query(func.max(DailyPowerUsage.timestamp)).scalar()
+
+    def poll(self, db: Session) -> Tuple[List[Event], list]:
+        """Dashboard events and (start_time, end_time) rows of statuses written since the previous poll"""
+        events: List[Event] = []
+
+        readings = db.query(SensorReading).filter(SensorReading.id > self.reading_id) \
+            .order_by(SensorReading.id).limit(MAX_READINGS_PER_POLL).all()
+        by_home: Dict[str, List[Dict[str, Any]]] = {}
+        for reading in readings:
+            by_home.setdefault(reading.home_id, []).append({
+                "entity_id": reading.entity_id,
+                "state": reading.state,
+                "timestamp": reading.timestamp.isoformat()
+            })
+        events.extend(("sensor_readings", home_readings, home_id) for home_id, home_readings in by_home.items())
+        if readings:
+            self.reading_id = readings[-1].id
+
+        forecasts = db.query(WeatherForecast)
+        if self.forecast_at is not None:
+            forecasts = forecasts.filter(WeatherForecast.timestamp > self.forecast_at)
+        for forecast in forecasts.order_by(WeatherForecast.timestamp).all():
+            events.append(("weather_forecast", {
+                "entity_id": forecast.entity_id,
+                "forecast_data": json.loads(forecast.forecast_data) if forecast.forecast_data else [],
+                "timestamp": forecast.timestamp.isoformat()
+            }, forecast.home_id))
+            self.forecast_at = forecast.timestamp
+
+        power_rows = db.query(DailyPowerUsage)
+        if self.power_at is not None:
+            power_rows = power_rows.filter(DailyPowerUsage.timestamp > self.power_at)
+        for power_usage in power_rows.order_by(DailyPowerUsage.timestamp).all():
+            events.append(("daily_power_usage", {
+                "date": power_usage.date.isoformat(),
+                "daily_import": power_usage.daily_import,
+                "daily_export": power_usage.daily_export,
+                "inverter_daily_yield": power_usage.inverter_daily_yield,
+                "daily_usage": power_usage.daily_usage,
+                "timestamp": power_usage.timestamp.isoformat()
+            }, power_usage.home_id))
+            self.power_at = power_usage.timestamp
+
+        statuses = db.query(Status.id, Status.start_time, Status.end_time) \
+            .filter(Status.id > self.status_id).order_by(Status.id).all()
+        if statuses:
+            self.status_id = statuses[-1].id
+
+        self.polls += 1
+        return events, statuses
+
+    def _poll(self) -> Tuple[List[Event], list]:
+        with worker_session() as db:
+            if not self.primed:
+                self.prime(db)
+                return [], []
+            events, statuses = self.poll(db)
+            if statuses:
+                self._sync_store(db)
+            return events, statuses
+
+    @staticmethod
+    def _sync_store(db: Session) -> None:
+        """Append the new statuses to this process's analytic store, which only sees its own inserts otherwise"""
+        store = get_store()
+        if store is None:
+            return
+        try:
+            store.sync(db)
+        except Exception as e:
+            logger.warning(f"Error syncing the analytic store: {e}")
+
+    def apply(self, events: List[Event], statuses: list, publish: bool) -> None:
+        """Invalidate cached results for the statuses and publish the events; on the event loop thread"""
+        if statuses:
+            # Statuses this process wrote itself were invalidated already; doing it again only costs a recompute
+            get_result_cache().invalidate_statuses(statuses)
+            self.statuses_invalidated += len(statuses)
+        if publish:
+            for event_type, data, home_id in events:
+                broadcaster.publish(event_type, data, home_id)
+            self.events_published += len(events)
+
+    async def run(self) -> None:
+        """Poll every CHANGE_FEED_INTERVAL_SECONDS until cancelled"""
+        from .poller import background_jobs
+
+        interval = change_feed_interval_seconds()
+        logger.info(f"Change feed reading rows written by other processes every {interval}s")
+        while True:
+            try:
+                events, statuses = await asyncio.to_thread(self._poll)
+                self.apply(events, statuses, publish=not background_jobs.running)
+            except Exception as e:
+                logger.error(f"Error reading changes from other processes: {e}")
+            await asyncio.sleep(interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "polls": self.polls,
+            "events_published": self.events_published,
+            "statuses_invalidated": self.statuses_invalidated
+        }
+
+
+change_feed = ChangeFeed()
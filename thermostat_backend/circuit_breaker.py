@@ -0,0 +1,149 @@
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open"""
+
+
+def is_outage(error: BaseException) -> bool:
+    """Connection problems, timeouts and 5xx responses count against the breaker; 4xx means the server is up"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint after repeated failures and probes it again with exponential backoff.
+
+    After failure_threshold consecutive outages the breaker opens for
+    base_delay seconds, doubling (up to max_delay) each time a half-open probe
+    fails, with +/- jitter so several breakers don't retry in lockstep. While
+    open, calls fail immediately without touching the network. Once the delay
+    has passed a single call is let through as a probe; success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_delay: float = 10.0,
+        max_delay: float = 600.0,
+        jitter: float = 0.2
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_count = 0
+        self.rejected_calls = 0
+        self.last_error: Optional[str] = None
+        self.last_failure_at: Optional[datetime] = None
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected and no probe is due yet"""
+        return self.state == OPEN and time.monotonic() < self._retry_at
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self._retry_at:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info(f"Circuit {self.name} closed, endpoint recovered")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_count = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self.last_failure_at = datetime.utcnow()
+        self._probe_in_flight = False
+
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            delay = min(self.max_delay, self.base_delay * 2 ** self.open_count)
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+            self.state = OPEN
+            self.open_count += 1
+            self._retry_at = time.monotonic() + delay
+            logger.warning(
+                f"Circuit {self.name} open for {delay:.0f}s after {self.consecutive_failures} failures: {self.last_error}"
+            )
+
+    @asynccontextmanager
+    async def guard(self):
+        """Run the enclosed call under the breaker, raising CircuitOpenError if it may not run now"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit {self.name} is open")
+        try:
+            yield
+        except Exception as e:
+            if is_outage(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelled mid-call: no verdict, but let the next call probe
+            self._probe_in_flight = False
+            raise
+        else:
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = max(0.0, self._retry_at - time.monotonic()) if self.state == OPEN else None
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_count": self.open_count,
+            "rejected_calls": self.rejected_calls,
+            "retry_at": (datetime.utcnow() + timedelta(seconds=retry_in)).isoformat() if retry_in is not None else None,
+            "last_error": self.last_error,
+            "last_failure_at": self.last_failure_at.isoformat() if self.last_failure_at else None
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for name, so every caller of the same endpoint shares its state"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name)
+    return breaker
+
+
+def breaker_snapshots() -> List[Dict[str, Any]]:
+    return [breaker.snapshot() for breaker in sorted(_breakers.values(), key=lambda b: b.name)]
@@ -0,0 +1,186 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .models import DEFAULT_HOME_ID, DailyEnergyFact, DailyPowerUsage, Status
+
+logger = logging.getLogger(__name__)
+
+
+def degree_day_base() -> float:
+    """Base temperature (°C) for heating degree-days"""
+    return float(os.getenv("HEATING_DEGREE_DAY_BASE", "18"))
+
+
+def _status_day(status: Status) -> Optional[date]:
+    try:
+        return date.fromisoformat(status.start_time[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class DailyFactsService:
+    """Maintains daily_energy_facts, one row per home and day joining heating and electricity.
+
+    Statuses are added in place with an upsert that increments the day's sums
+    in the same transaction as the insert, so concurrent writers can't lose
+    updates. Power usage overwrites the day's electricity columns whenever it
+    is saved. Statuses carry no home, so their facts belong to DEFAULT_HOME_ID.
+    """
+
+    @staticmethod
+    def add_statuses(db: Session, statuses: Iterable[Status], home_id: str = DEFAULT_HOME_ID) -> None:
+        """Add statuses to their days' facts; the caller commits"""
+        days: Dict[date, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0])
+        for status in statuses:
+            day = _status_day(status)
+            if day is None:
+                continue
+            totals = days[day]
+            totals[0] += 1
+            totals[1] += status.minutes_heating
+            totals[2] += status.average_indoor_temp
+            totals[3] += status.average_outdoor_temp
+
+        base = degree_day_base()
+        now = datetime.utcnow()
+        for day, (count, minutes, indoor_sum, outdoor_sum) in days.items():
+            stmt = insert(DailyEnergyFact).values(
+                home_id=home_id,
+                date=day,
+                status_count=count,
+                minutes_heating=minutes,
+                indoor_temp_sum=indoor_sum,
+                outdoor_temp_sum=outdoor_sum,
+                avg_indoor_temp=indoor_sum / count,
+                avg_outdoor_temp=outdoor_sum / count,
+                heating_degree_days=max(0.0, base - outdoor_sum / count),
+                updated_at=now
+            )
+            new_count = DailyEnergyFact.status_count + stmt.excluded.status_count
+            new_outdoor_sum = DailyEnergyFact.outdoor_temp_sum + stmt.excluded.outdoor_temp_sum
+            # SET expressions see the row as it was before the update
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["home_id", "date"],
+                set_={
+                    "status_count": new_count,
+                    "minutes_heating": DailyEnergyFact.minutes_heating + stmt.excluded.minutes_heating,
+                    "indoor_temp_sum": DailyEnergyFact.indoor_temp_sum + stmt.excluded.indoor_temp_sum,
+                    "outdoor_temp_sum": new_outdoor_sum,
+                    "avg_indoor_temp": (DailyEnergyFact.indoor_temp_sum + stmt.excluded.indoor_temp_sum) / new_count,
+                    "avg_outdoor_temp": new_outdoor_sum / new_count,
+                    "heating_degree_days": func.max(0.0, base - new_outdoor_sum / new_count),
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+            db.execute(stmt)
+
+    @staticmethod
+    def record_power_usage(db: Session, usage: DailyPowerUsage) -> None:
+        """Copy a day's power usage into its fact row; the caller commits"""
+        # Column defaults aren't applied to rows that haven't been flushed yet
+        values = {
+            "daily_import": usage.daily_import,
+            "daily_export": usage.daily_export or 0.0,
+            "inverter_daily_yield": usage.inverter_daily_yield or 0.0,
+            "daily_usage": usage.daily_usage,
+            "updated_at": datetime.utcnow()
+        }
+        stmt = insert(DailyEnergyFact).values(
+            home_id=usage.home_id or DEFAULT_HOME_ID,
+            date=usage.date,
+            status_count=0,
+            minutes_heating=0,
+            indoor_temp_sum=0.0,
+            outdoor_temp_sum=0.0,
+            **values
+        )
+        db.execute(stmt.on_conflict_do_update(index_elements=["home_id", "date"], set_=values))
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute every fact row from statuses (SQLite, year partitions and archive) and daily power usage"""
+        from .archive import get_archive
+        from .partitions import get_partitions
+
+        day = func.substr(Status.start_time, 1, 10)
+
+        def daily_rows(session: Session) -> list:
+            return session.query(
+                day,
+                func.count(Status.id),
+                func.sum(Status.minutes_heating),
+                func.sum(Status.average_indoor_temp),
+                func.sum(Status.average_outdoor_temp)
+            ).group_by(day).all()
+
+        rows = daily_rows(db)
+        partitions = get_partitions()
+        if partitions is not None:
+            for partition_rows in partitions.each(daily_rows):
+                rows = rows + partition_rows
+
+        days: Dict[date, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0])
+        for day_str, count, minutes, indoor_sum, outdoor_sum in rows:
+            try:
+                totals = days[date.fromisoformat(day_str)]
+            except ValueError:
+                continue
+            totals[0] += count
+            totals[1] += minutes or 0
+            totals[2] += indoor_sum or 0.0
+            totals[3] += outdoor_sum or 0.0
+
+        archive = get_archive()
+        if archive is not None:
+            for archived_day, (summary, _) in archive.daily_summaries(archive.ids_in_database(db)).items():
+                totals = days[archived_day]
+                for i in range(4):
+                    totals[i] += summary[i]
+
+        base = degree_day_base()
+        now = datetime.utcnow()
+        db.query(DailyEnergyFact).delete(synchronize_session=False)
+        db.bulk_insert_mappings(DailyEnergyFact, [
+            {
+                "home_id": DEFAULT_HOME_ID,
+                "date": fact_day,
+                "status_count": count,
+                "minutes_heating": minutes,
+                "indoor_temp_sum": indoor_sum,
+                "outdoor_temp_sum": outdoor_sum,
+                "avg_indoor_temp": indoor_sum / count,
+                "avg_outdoor_temp": outdoor_sum / count,
+                "heating_degree_days": max(0.0, base - outdoor_sum / count),
+                "updated_at": now
+            }
+            for fact_day, (count, minutes, indoor_sum, outdoor_sum) in days.items() if count
+        ])
+        for usage in db.query(DailyPowerUsage).all():
+            DailyFactsService.record_power_usage(db, usage)
+        db.commit()
+
+        total = db.query(func.count(DailyEnergyFact.id)).scalar()
+        logger.info(f"Rebuilt {total} daily energy facts")
+        return total
+
+    @staticmethod
+    def get_facts(
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        home_id: str = DEFAULT_HOME_ID
+    ) -> List[Dict[str, Any]]:
+        """Facts for days between start_date and end_date (inclusive), oldest first"""
+        query = db.query(DailyEnergyFact).filter(DailyEnergyFact.home_id == home_id)
+        if start_date:
+            query = query.filter(DailyEnergyFact.date >= start_date)
+        if end_date:
+            query = query.filter(DailyEnergyFact.date <= end_date)
+        return [fact.to_dict() for fact in query.order_by(DailyEnergyFact.date).all()]
@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine
+import logging
+from contextlib import contextmanager
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
+from typing import List, Optional
 from .models import Base
 import os
 
+logger = logging.getLogger(__name__)
+
+# Alembic head the models correspond to; update together with each new migration
+SCHEMA_REVISION = "a6d4e9f3b812"
+
 def get_database_url():
     return os.getenv("DATABASE_URL", "sqlite:///./data.db")
 
@@ -18,12 +26,105 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_worker_sessionmaker: Optional[sessionmaker] = None
+
+def _is_memory_database(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def _worker_session_factory() -> sessionmaker:
+    """Sessions for queries offloaded to worker threads.
+
+    The request path shares one StaticPool connection on the event loop thread;
+    worker threads get their own pooled connections so their transactions never
+    interleave with it. In-memory databases only exist on that one connection,
+    so they keep using it.
+    """
+    global _worker_sessionmaker
+    if _worker_sessionmaker is None:
+        if _is_memory_database(DATABASE_URL):
+            bind = engine
+        else:
+            bind = create_engine(
+                DATABASE_URL,
+                connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+                echo=False
+            )
+        _worker_sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+    return _worker_sessionmaker
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
+def _current_revision(conn) -> Optional[str]:
+    if not engine.dialect.has_table(conn, "alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+def _missing_columns(conn) -> List[str]:
+    """table.column for every model column the database lacks; create_all() never adds columns"""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
+def ensure_schema() -> str:
+    """Make sure the schema exists without reflecting every table on each boot.
+
+    A database stamped with SCHEMA_REVISION that has every model table is used
+    as is; the table names come from one catalog query. An empty database gets
+    all tables plus the stamp, so later boots take the fast path. Anything else
+    falls back to create_tables(), which only adds missing tables, and
+    raises if existing tables lack columns the models need: every query on
+    them would fail, so the database has to go through 'alembic upgrade head'
+    first. Returns which path was taken.
+    """
+    with engine.connect() as conn:
+        revision = _current_revision(conn)
+        tables = set(inspect(conn).get_table_names())
+        if revision == SCHEMA_REVISION and tables >= set(Base.metadata.tables):
+            return "current"
+        empty = not tables
+
+    create_tables()
+    if not empty:
+        with engine.connect() as conn:
+            missing = _missing_columns(conn)
+        if missing:
+            raise RuntimeError(
+                f"Database at revision {revision or 'none (created before migrations)'} lacks columns "
+                f"{', '.join(missing)}; run 'alembic upgrade head' before starting"
+            )
+        if revision == SCHEMA_REVISION:
+            logger.warning(f"Database is at revision {revision} but lacked tables; created them")
+        elif revision is not None:
+            logger.warning(
+                f"Database is at revision {revision}, expected {SCHEMA_REVISION}; run 'alembic upgrade head'"
+            )
+        return "create_all"
+
+    with engine.begin() as conn:
+        # Another process starting on the same empty database may have stamped it already
+        conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+        if _current_revision(conn) is None:
+            conn.execute(text("INSERT INTO alembic_version (version_num) VALUES (:revision)"), {"revision": SCHEMA_REVISION})
+    return "created"
+
 def get_db() -> Session:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def worker_session():
+    db = _worker_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
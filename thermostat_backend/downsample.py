@@ -0,0 +1,86 @@
+from typing import List, Sequence
+
+# Optional dependency, imported on first use; the pure Python path gives the same result
+np = None
+
+
+def numpy_available() -> bool:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def _bucket_edges(n: int, threshold: int) -> List[int]:
+    """Start index of each of the threshold - 2 middle buckets, followed by n - 1 and n"""
+    every = (n - 2) / (threshold - 2)
+    return [int(k * every) + 1 for k in range(threshold - 2)] + [n - 1, n]
+
+
+def lttb(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. The points in between are
+    split into threshold - 2 buckets. From each bucket the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket is chosen, which preserves peaks and troughs that plain
+    averaging would flatten. x must be ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    if numpy_available():
+        return _lttb_numpy(x, y, threshold)
+    return _lttb_python(x, y, threshold)
+
+
+def _lttb_numpy(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    xs = np.asarray(x, dtype=np.float64)
+    ys = np.asarray(y, dtype=np.float64)
+    edges = np.asarray(_bucket_edges(len(xs), threshold))
+
+    # Averages of every bucket (the final point is a bucket of its own) in one pass
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(xs, edges[:-1]) / counts
+    avg_y = np.add.reduceat(ys, edges[:-1]) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = len(xs) - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Twice the triangle area, with the vertex candidates as a vector
+        area = np.abs(
+            (xs[a] - avg_x[i + 1]) * (ys[start:stop] - ys[a])
+            - (xs[a] - xs[start:stop]) * (avg_y[i + 1] - ys[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected.tolist()
+
+
+def _lttb_python(x: Sequence[float], y: Sequence[float], threshold: int) -> List[int]:
+    edges = _bucket_edges(len(x), threshold)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = edges[i + 1], edges[i + 2]
+        count = next_stop - next_start
+        avg_x = sum(x[next_start:next_stop]) / count
+        avg_y = sum(y[next_start:next_stop]) / count
+
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        selected.append(a)
+    selected.append(len(x) - 1)
+    return selected
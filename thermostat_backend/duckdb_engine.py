@@ -0,0 +1,283 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Status
+from .schemas import StatsSummary, MonthlyData
+
+# Optional dependencies, imported on first use so processes without the engine skip their import cost
+duckdb = np = None
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = ["id", "start_time", "end_time", "minutes_heating", "average_indoor_temp", "average_outdoor_temp"]
+
+
+def duckdb_available() -> bool:
+    global duckdb, np
+    if duckdb is None:
+        try:
+            import duckdb as duckdb_module
+            import numpy
+        except ImportError:
+            return False
+        duckdb, np = duckdb_module, numpy
+    return True
+
+
+class DuckDBAnalytics:
+    """Columnar copy of the statuses in an embedded DuckDB database for the aggregate endpoints.
+
+    The copy is filled from SQLite (plus year partitions and the archive) on
+    first open and caught up with rows whose id is higher than the last one
+    copied before every query, so it is never behind this process's writes.
+    Rows deleted or updated in SQLite afterwards are not reflected. With a
+    path the copy persists between runs and only new rows are loaded; a
+    DuckDB file can be open in one process at a time.
+    """
+
+    def __init__(self, path: Optional[str] = None, chunk_size: int = 100000):
+        if not duckdb_available():
+            raise ImportError("duckdb and numpy are required for the DuckDB engine (install the duckdb extra)")
+        self.path = path
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._con = duckdb.connect(path or ":memory:")
+        # Times are stored as timestamps: numpy parses them far faster than DuckDB ingests strings
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS statuses (
+                id BIGINT PRIMARY KEY,
+                start_time TIMESTAMP NOT NULL,
+                end_time TIMESTAMP NOT NULL,
+                minutes_heating BIGINT NOT NULL,
+                average_indoor_temp DOUBLE NOT NULL,
+                average_outdoor_temp DOUBLE NOT NULL
+            )
+        """)
+        self.count, self.max_id = self._con.execute("SELECT count(*), coalesce(max(id), 0) FROM statuses").fetchone()
+
+    @staticmethod
+    def _times_parse(row: tuple) -> bool:
+        try:
+            np.datetime64(row[1], "us")
+            np.datetime64(row[2], "us")
+        except (TypeError, ValueError):
+            logger.warning(f"DuckDB engine skipping status {row[0]} with unparseable times {row[1]!r}, {row[2]!r}")
+            return False
+        return True
+
+    def _insert(self, rows: Sequence[tuple]) -> int:
+        """Copy rows into DuckDB; returns how many were copied.
+
+        Rows whose times aren't ISO strings (the API accepts any string) are
+        skipped but still move max_id past them, so a catch-up never reads
+        them again.
+        """
+        max_id = max(row[0] for row in rows)
+        try:
+            starts = np.array([row[1] for row in rows], dtype="datetime64[us]")
+            ends = np.array([row[2] for row in rows], dtype="datetime64[us]")
+        except ValueError:
+            rows = [row for row in rows if self._times_parse(row)]
+            starts = np.array([row[1] for row in rows], dtype="datetime64[us]")
+            ends = np.array([row[2] for row in rows], dtype="datetime64[us]")
+
+        if rows:
+            columns = list(zip(*rows))
+            chunk = {
+                "id": np.array(columns[0], dtype="int64"),
+                "start_time": starts,
+                "end_time": ends,
+                "minutes_heating": np.array(columns[3], dtype="int64"),
+                "average_indoor_temp": np.array(columns[4], dtype="float64"),
+                "average_outdoor_temp": np.array(columns[5], dtype="float64")
+            }
+            self._con.register("status_chunk", chunk)
+            try:
+                self._con.execute("INSERT OR IGNORE INTO statuses SELECT * FROM status_chunk")
+            finally:
+                self._con.unregister("status_chunk")
+        self.max_id = max(self.max_id, max_id)
+        return len(rows)
+
+    def _load(self, chunks: Iterable[Sequence[tuple]]) -> int:
+        loaded = 0
+        for chunk in chunks:
+            if chunk:
+                loaded += self._insert(chunk)
+        return loaded
+
+    @staticmethod
+    def _select_statuses():
+        return select(*[getattr(Status, name) for name in STATUS_COLUMNS])
+
+    def _status_chunks(self, db: Session, after_id: int):
+        # Plain DB-API tuples: SQLAlchemy's per-row processing costs more than the copy itself
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT {', '.join(STATUS_COLUMNS)} FROM statuses WHERE id > ? ORDER BY id", (after_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def open(self, db: Session) -> int:
+        """Fill an empty copy with every status, wherever it is stored; returns rows loaded"""
+        from .archive import get_archive
+        from .partitions import get_partitions
+
+        with self._lock:
+            if self.count:
+                loaded = self._catch_up(db)
+                self.count += loaded
+                return loaded
+
+            loaded = 0
+            partitions = get_partitions()
+            if partitions is not None:
+                for rows in partitions.each(lambda session: session.execute(self._select_statuses()).all()):
+                    loaded += self._load(rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size))
+
+            archive = get_archive()
+            if archive is not None:
+                table = archive.read_table()
+                if table is not None:
+                    self._con.register("archived_statuses", table)
+                    try:
+                        self._con.execute(f"INSERT OR IGNORE INTO statuses SELECT {', '.join(STATUS_COLUMNS)} FROM archived_statuses")
+                    finally:
+                        self._con.unregister("archived_statuses")
+                    loaded += table.num_rows
+
+            # Moved rows may have higher ids than some still in SQLite, so the first SQLite pass takes every row
+            loaded += self._load(self._status_chunks(db, 0))
+            self.count, self.max_id = self._con.execute("SELECT count(*), coalesce(max(id), 0) FROM statuses").fetchone()
+            return loaded
+
+    def _catch_up(self, db: Session) -> int:
+        return self._load(self._status_chunks(db, self.max_id))
+
+    def _query(self, db: Session, sql: str, parameters: Optional[list] = None) -> list:
+        with self._lock:
+            self.count += self._catch_up(db)
+            return self._con.execute(sql, parameters or []).fetchall()
+
+    @staticmethod
+    def _range(start_dt: Optional[datetime], end_dt: Optional[datetime]):
+        if start_dt is None or end_dt is None:
+            return "", []
+        return "WHERE start_time >= ? AND end_time <= ?", [start_dt, end_dt]
+
+    # Query methods mirror the StatusService results
+
+    def get_statistics(self, db: Session, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> StatsSummary:
+        where, parameters = self._range(start_dt, end_dt)
+        count, heating, avg_indoor, avg_outdoor, min_indoor, max_indoor, min_outdoor, max_outdoor = self._query(db, f"""
+            SELECT count(*), sum(minutes_heating), avg(average_indoor_temp), avg(average_outdoor_temp),
+                   min(average_indoor_temp), max(average_indoor_temp), min(average_outdoor_temp), max(average_outdoor_temp)
+            FROM statuses {where}
+        """, parameters)[0]
+
+        if not count:
+            return StatsSummary(
+                total_records=0, total_heating_minutes=0, avg_indoor_temp=0, avg_outdoor_temp=0,
+                min_indoor_temp=0, max_indoor_temp=0, min_outdoor_temp=0, max_outdoor_temp=0
+            )
+
+        return StatsSummary(
+            total_records=count,
+            total_heating_minutes=int(heating),
+            avg_indoor_temp=round(avg_indoor, 2),
+            avg_outdoor_temp=round(avg_outdoor, 2),
+            min_indoor_temp=min_indoor,
+            max_indoor_temp=max_indoor,
+            min_outdoor_temp=min_outdoor,
+            max_outdoor_temp=max_outdoor
+        )
+
+    def get_monthly_data(self, db: Session, year: int) -> List[MonthlyData]:
+        rows = self._query(db, """
+            SELECT month(start_time) AS month, sum(minutes_heating), avg(average_indoor_temp), avg(average_outdoor_temp)
+            FROM statuses
+            WHERE start_time >= ? AND start_time < ?
+            GROUP BY month
+        """, [datetime(year, 1, 1), datetime(year + 1, 1, 1)])
+        months = {row[0]: row for row in rows}
+
+        result = []
+        for month in range(1, 13):
+            if month in months:
+                _, heating, avg_indoor, avg_outdoor = months[month]
+                result.append(MonthlyData(
+                    month=month,
+                    minutes_heating=int(heating),
+                    avg_indoor_temp=round(avg_indoor, 2),
+                    avg_outdoor_temp=round(avg_outdoor, 2)
+                ))
+            else:
+                result.append(MonthlyData(month=month, minutes_heating=0, avg_indoor_temp=0.0, avg_outdoor_temp=0.0))
+        return result
+
+    def get_heating_efficiency(self, db: Session, start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> List[dict]:
+        where, parameters = self._range(start_dt, end_dt)
+        rows = self._query(db, f"""
+            SELECT id, strftime(start_time, '%Y-%m-%d %H:%M:%S.%f'), average_indoor_temp - average_outdoor_temp AS temp_diff,
+                   minutes_heating
+            FROM statuses {where}
+            ORDER BY start_time, id
+        """, parameters)
+        return [
+            {
+                "id": status_id,
+                "start_time": start_time,
+                "temperature_difference": round(temp_diff, 2),
+                "heating_minutes": heating,
+                "heating_efficiency": round(heating / temp_diff if temp_diff > 0 else 0, 2)
+            }
+            for status_id, start_time, temp_diff, heating in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+
+_engine: Optional[DuckDBAnalytics] = None
+
+
+def get_duckdb_engine() -> Optional[DuckDBAnalytics]:
+    """The DuckDB engine, or None when the aggregate endpoints use SQLite"""
+    return _engine
+
+
+def init_duckdb_engine(db: Session) -> Optional[DuckDBAnalytics]:
+    """Open the engine when ANALYTIC_ENGINE=duckdb and load what the copy is missing"""
+    global _engine
+
+    if os.getenv("ANALYTIC_ENGINE", "sqlite").lower() != "duckdb":
+        return None
+    if not duckdb_available():
+        logger.warning("ANALYTIC_ENGINE=duckdb but duckdb or numpy is not installed, using SQLite")
+        return None
+
+    try:
+        engine = DuckDBAnalytics(os.getenv("DUCKDB_PATH") or None)
+        loaded = engine.open(db)
+    except Exception as e:
+        # Typically the DuckDB file is held by another process
+        logger.warning(f"DuckDB engine unavailable, using SQLite: {e}")
+        return None
+
+    logger.info(f"DuckDB engine loaded with {engine.count} statuses ({loaded} new)")
+    _engine = engine
+    return engine
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Set
+
+from .models import DEFAULT_HOME_ID
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of deltas when a subscriber fell behind and must reload a full snapshot
+RESYNC = object()
+
+
+def format_sse(event_type: str, data: Any) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+class EventBroadcaster:
+    """In-memory fan-out of dashboard deltas to SSE subscribers.
+
+    Each message is encoded once and pushed to every subscriber's bounded queue.
+    A subscriber whose queue is full has its backlog replaced by a single resync
+    marker, so one slow client never blocks the poller or grows memory unbounded.
+    Subscribers are grouped by home and only receive that home's events.
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.dropped_subscribers = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, home_id: str = DEFAULT_HOME_ID) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(home_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, home_id: str = DEFAULT_HOME_ID) -> None:
+        queues = self._subscribers.get(home_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[home_id]
+
+    def publish(self, event_type: str, data: Any, home_id: str = DEFAULT_HOME_ID) -> None:
+        queues = self._subscribers.get(home_id)
+        if not queues:
+            return
+
+        message = format_sse(event_type, data)
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client can't keep up: drop its backlog and ask it to resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                self.dropped_subscribers += 1
+                logger.warning("Dashboard subscriber fell behind, sending resync")
+
+
+broadcaster = EventBroadcaster()
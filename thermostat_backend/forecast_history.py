@@ -0,0 +1,247 @@
+import json
+import logging
+import math
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import DEFAULT_HOME_ID, WeatherForecastSnapshot
+from .homes import DEFAULT_FORECAST_ENTITY
+from .sensor_history import SensorHistoryService
+
+logger = logging.getLogger(__name__)
+
+# Forecast entries keyed by their "datetime" field
+ForecastState = Dict[str, Dict[str, Any]]
+
+
+def index_forecast(forecast: List[Dict[str, Any]]) -> ForecastState:
+    return {entry["datetime"]: entry for entry in forecast if entry.get("datetime")}
+
+
+def encode_delta(previous: ForecastState, current: ForecastState) -> Optional[Dict[str, Any]]:
+    """Changes turning previous into current, or None when nothing changed.
+
+    "set" holds new entries in full, "patch" only the changed fields of
+    existing entries (plus their datetime), "remove" the datetimes that
+    dropped out of the forecast.
+    """
+    set_entries = []
+    patches = []
+    for key, entry in current.items():
+        old = previous.get(key)
+        if old == entry:
+            continue
+        if old is None or set(old) - set(entry):
+            set_entries.append(entry)
+        else:
+            patch = {field: value for field, value in entry.items() if old.get(field) != value}
+            patch["datetime"] = key
+            patches.append(patch)
+    remove = [key for key in previous if key not in current]
+
+    if not set_entries and not patches and not remove:
+        return None
+    delta = {}
+    if set_entries:
+        delta["set"] = set_entries
+    if patches:
+        delta["patch"] = patches
+    if remove:
+        delta["remove"] = remove
+    return delta
+
+
+def apply_delta(state: ForecastState, delta: Dict[str, Any]) -> ForecastState:
+    result = dict(state)
+    for key in delta.get("remove", []):
+        result.pop(key, None)
+    for entry in delta.get("set", []):
+        result[entry["datetime"]] = entry
+    for patch in delta.get("patch", []):
+        result[patch["datetime"]] = {**result[patch["datetime"]], **patch}
+    return result
+
+
+def parse_forecast_time(value: str) -> datetime:
+    """Forecast datetimes carry an offset; sensor history is naive UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def replay(
+    db: Session,
+    home_id: str,
+    entity_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[Tuple[datetime, ForecastState]]:
+    """Reconstruct forecast snapshots as (timestamp, state), from the last keyframe at or before start up to end"""
+    base = db.query(WeatherForecastSnapshot).filter(
+        WeatherForecastSnapshot.home_id == home_id,
+        WeatherForecastSnapshot.entity_id == entity_id,
+        WeatherForecastSnapshot.is_keyframe.is_(True)
+    )
+    if start is not None:
+        base = base.filter(WeatherForecastSnapshot.timestamp <= start)
+    keyframe = base.order_by(WeatherForecastSnapshot.timestamp.desc(), WeatherForecastSnapshot.id.desc()).first()
+
+    query = db.query(WeatherForecastSnapshot).filter(
+        WeatherForecastSnapshot.home_id == home_id,
+        WeatherForecastSnapshot.entity_id == entity_id
+    )
+    if keyframe is not None:
+        query = query.filter(WeatherForecastSnapshot.id >= keyframe.id)
+    if end is not None:
+        query = query.filter(WeatherForecastSnapshot.timestamp <= end)
+
+    snapshots = []
+    state: Optional[ForecastState] = None
+    for row in query.order_by(WeatherForecastSnapshot.id).all():
+        data = json.loads(row.data)
+        if row.is_keyframe:
+            state = index_forecast(data)
+        elif state is None:
+            # Deltas before the first keyframe can't be resolved
+            continue
+        else:
+            state = apply_delta(state, data)
+        snapshots.append((row.timestamp, state))
+    return snapshots
+
+
+class ForecastRecorder:
+    """Appends each fetched forecast to weather_forecast_snapshots.
+
+    The first snapshot of every UTC day is stored in full; others store only
+    the entries that changed or dropped off since the previous snapshot, and
+    unchanged forecasts store nothing. Consecutive hourly forecasts mostly
+    overlap, so a day costs about one full forecast plus small deltas.
+    """
+
+    def __init__(self, home_id: str = DEFAULT_HOME_ID, entity_id: str = DEFAULT_FORECAST_ENTITY):
+        self.home_id = home_id
+        self.entity_id = entity_id
+        self._state: Optional[ForecastState] = None
+        self._keyframe_day = None
+        self._loaded = False
+
+    def reset(self) -> None:
+        """Forget the cached state, e.g. after a rollback; it is reloaded from the database"""
+        self._state = None
+        self._keyframe_day = None
+        self._loaded = False
+
+    def _load(self, db: Session) -> None:
+        snapshots = replay(db, self.home_id, self.entity_id)
+        if snapshots:
+            # Replay starts at the latest keyframe
+            self._keyframe_day = snapshots[0][0].date()
+            self._state = snapshots[-1][1]
+        self._loaded = True
+
+    def record(self, db: Session, forecast: List[Dict[str, Any]], timestamp: datetime) -> Optional[WeatherForecastSnapshot]:
+        """Add the snapshot row (if any) to the session; the caller commits"""
+        if not self._loaded:
+            self._load(db)
+
+        current = index_forecast(forecast)
+        if self._state is None or self._keyframe_day != timestamp.date():
+            row = WeatherForecastSnapshot(
+                home_id=self.home_id,
+                entity_id=self.entity_id,
+                timestamp=timestamp,
+                is_keyframe=True,
+                data=json.dumps(forecast)
+            )
+            self._keyframe_day = timestamp.date()
+        else:
+            delta = encode_delta(self._state, current)
+            if delta is None:
+                return None
+            row = WeatherForecastSnapshot(
+                home_id=self.home_id,
+                entity_id=self.entity_id,
+                timestamp=timestamp,
+                is_keyframe=False,
+                data=json.dumps(delta)
+            )
+
+        db.add(row)
+        self._state = current
+        return row
+
+
+class ForecastAccuracyService:
+    @staticmethod
+    def get_accuracy(
+        db: Session,
+        forecast_entity: str,
+        actual_entity: str,
+        start: datetime,
+        end: datetime,
+        max_lead_hours: int = 48,
+        home_id: str = DEFAULT_HOME_ID,
+        field: str = "temperature"
+    ) -> Dict[str, Any]:
+        """Forecast error by lead time for target hours between start and end.
+
+        The forecast at lead h for target hour f is the one held by the snapshot
+        current at f - h; it is compared with the measured hourly average for f.
+        Errors are forecast minus actual.
+        """
+        snapshots = replay(db, home_id, forecast_entity, start - timedelta(hours=max_lead_hours), end)
+        times = [timestamp for timestamp, _ in snapshots]
+        forecasts = []
+        for _, state in snapshots:
+            values = {}
+            for entry in state.values():
+                value = entry.get(field)
+                if isinstance(value, (int, float)):
+                    values[parse_forecast_time(entry["datetime"])] = float(value)
+            forecasts.append(values)
+
+        history = SensorHistoryService.get_history(db, actual_entity, start, end, 3600, home_id)
+        actuals = {
+            datetime.fromisoformat(point["timestamp"]): point["avg"]
+            for point in history["points"] if point["avg"] is not None
+        }
+
+        totals = [[0, 0.0, 0.0, 0.0] for _ in range(max_lead_hours + 1)]  # samples, error, abs error, squared error
+        for target, actual in actuals.items():
+            for lead in range(max_lead_hours + 1):
+                index = bisect_right(times, target - timedelta(hours=lead)) - 1
+                if index < 0:
+                    break
+                forecast = forecasts[index].get(target)
+                if forecast is None:
+                    continue
+                error = forecast - actual
+                total = totals[lead]
+                total[0] += 1
+                total[1] += error
+                total[2] += abs(error)
+                total[3] += error * error
+
+        return {
+            "home_id": home_id,
+            "forecast_entity": forecast_entity,
+            "actual_entity": actual_entity,
+            "field": field,
+            "snapshots": len(snapshots),
+            "target_hours": len(actuals),
+            "by_lead_hours": [
+                {
+                    "lead_hours": lead,
+                    "samples": samples,
+                    "mean_error": round(error_sum / samples, 3),
+                    "mean_absolute_error": round(abs_sum / samples, 3),
+                    "rmse": round(math.sqrt(squared_sum / samples), 3)
+                }
+                for lead, (samples, error_sum, abs_sum, squared_sum) in enumerate(totals) if samples
+            ]
+        }
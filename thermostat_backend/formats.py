@@ -0,0 +1,179 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional dependencies, imported on first use
+pa = msgpack = None
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+# Accept values naming each format; x-msgpack is still common in clients
+MEDIA_ALIASES = {
+    JSON: JSON,
+    "*/*": JSON,
+    "application/*": JSON,
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+# Package that must be installed to produce each binary format
+REQUIRED_PACKAGE = {ARROW_STREAM: "pyarrow", MSGPACK: "msgpack"}
+
+Columns = Dict[str, List[Any]]
+
+
+def pyarrow_ipc_available() -> bool:
+    global pa
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.ipc
+        except ImportError:
+            return False
+        pa = pyarrow
+    return True
+
+
+def msgpack_available() -> bool:
+    global msgpack
+    if msgpack is None:
+        try:
+            import msgpack as msgpack_module
+        except ImportError:
+            return False
+        msgpack = msgpack_module
+    return True
+
+
+def _available(media_type: str) -> bool:
+    if media_type == ARROW_STREAM:
+        return pyarrow_ipc_available()
+    if media_type == MSGPACK:
+        return msgpack_available()
+    return True
+
+
+def _parse_accept(header: str) -> List[str]:
+    """Media types from an Accept header, highest quality first (ties keep header order)"""
+    weighted = []
+    for position, part in enumerate(header.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            weighted.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(weighted)]
+
+
+def negotiate(request: Request) -> str:
+    """Response media type for the request's Accept header.
+
+    JSON unless the client prefers Arrow IPC or MessagePack. A binary format
+    whose package isn't installed is skipped in favour of the client's next
+    choice; 406 if nothing acceptable is left. Types we don't produce at all
+    are ignored, so existing clients keep getting JSON. Marks the request so
+    VaryAcceptMiddleware adds Vary: Accept to whatever response it gets.
+    """
+    request.state.vary_accept = True
+    header = request.headers.get("accept")
+    if not header:
+        return JSON
+
+    missing = []
+    for accepted in _parse_accept(header):
+        media_type = MEDIA_ALIASES.get(accepted)
+        if media_type is None:
+            continue
+        if _available(media_type):
+            return media_type
+        missing.append(media_type)
+
+    if missing:
+        packages = ", ".join(sorted({REQUIRED_PACKAGE[media_type] for media_type in missing}))
+        raise HTTPException(
+            status_code=406,
+            detail=f"{', '.join(missing)} requires {packages} on the server (install the binary extra); JSON is available"
+        )
+    return JSON
+
+
+def rows_to_columns(rows: Iterable[Any]) -> Columns:
+    """Turn dicts or pydantic models into one list per field"""
+    columns: Columns = {}
+    for row in rows:
+        if isinstance(row, BaseModel):
+            row = row.model_dump()
+        if not columns:
+            columns = {name: [] for name in row}
+        for name, values in columns.items():
+            values.append(row.get(name))
+    return columns
+
+
+def objects_to_columns(objects: Iterable[Any], fields: List[str]) -> Columns:
+    """Read the given attributes of ORM objects into one list per field"""
+    objects = list(objects)
+    return {name: [getattr(obj, name, None) for obj in objects] for name in fields}
+
+
+def columnar_response(media_type: str, columns: Columns) -> Response:
+    """Encode columns as an Arrow IPC stream or a MessagePack map of arrays"""
+    if media_type == ARROW_STREAM:
+        table = pa.Table.from_pydict(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        content = sink.getvalue().to_pybytes()
+    elif media_type == MSGPACK:
+        content = msgpack.packb(columns, use_bin_type=True)
+    else:
+        raise ValueError(f"Not a columnar media type: {media_type}")
+    return Response(content=content, media_type=media_type)
+
+
+def negotiated_rows(media_type: str, rows: Iterable[Any]) -> Optional[Response]:
+    """Columnar response for binary media types, None when the endpoint should return JSON as usual"""
+    if media_type == JSON:
+        return None
+    return columnar_response(media_type, rows_to_columns(rows))
+
+
+class VaryAcceptMiddleware:
+    """Adds Vary: Accept to every response of a request that went through negotiate().
+
+    A route that negotiates returns different bodies for the same URL, so
+    shared caches must key on Accept for its JSON, binary and error responses
+    alike. Plain ASGI rather than BaseHTTPMiddleware, so streamed responses
+    pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start" and scope.get("state", {}).get("vary_accept"):
+                headers = MutableHeaders(scope=message)
+                vary = [token.strip().lower() for token in headers.get("vary", "").split(",")]
+                if "accept" not in vary and "*" not in vary:
+                    headers.add_vary_header("Accept")
+            await send(message)
+
+        await self.app(scope, receive, send_with_vary)
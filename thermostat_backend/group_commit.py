@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from .database import SessionLocal
+from .models import Status
+from .services import StatusService
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    """Commits statuses from concurrent requests together.
+
+    submit() queues a status and waits. The queue is written in one
+    transaction once max_rows are waiting or max_delay seconds after the
+    first one arrived, so a burst of requests pays for one SQLite commit
+    instead of one each. Every caller gets its own row back, with its id,
+    after the commit. If the batch fails, its statuses are retried one by one
+    so a bad row only fails its own request.
+    """
+
+    def __init__(self, max_delay: float = 0.005, max_rows: int = 200):
+        self.max_delay = max_delay
+        self.max_rows = max_rows
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+
+    async def submit(self, status_data: dict) -> Status:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((status_data, future))
+
+        if len(self._pending) >= self.max_rows:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Write everything queued; runs on the event loop like the other request-path writes"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        db = SessionLocal()
+        try:
+            try:
+                statuses = StatusService.insert_statuses(db, [data for data, _ in pending])
+            except Exception as e:
+                # Only the insert and commit are retried: the transaction was rolled back, so nothing is written twice
+                db.rollback()
+                logger.warning(f"Group commit of {len(pending)} statuses failed, writing them one by one: {e}")
+                self._write_individually(db, pending)
+                return
+            StatusService.after_insert_logged(db, statuses)
+        finally:
+            db.close()
+
+        self.batches += 1
+        self.rows += len(pending)
+        self.largest_batch = max(self.largest_batch, len(pending))
+        for (_, future), status in zip(pending, statuses):
+            if not future.done():
+                future.set_result(status)
+
+    def _write_individually(self, db, pending: List[Tuple[dict, asyncio.Future]]) -> None:
+        for data, future in pending:
+            try:
+                status, = StatusService.insert_statuses(db, [data])
+            except Exception as e:
+                db.rollback()
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            StatusService.after_insert_logged(db, [status])
+            self.batches += 1
+            self.rows += 1
+            self.largest_batch = max(self.largest_batch, 1)
+            if not future.done():
+                future.set_result(status)
+
+    def snapshot(self) -> dict:
+        return {
+            "max_delay_ms": self.max_delay * 1000,
+            "max_rows": self.max_rows,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "rows": self.rows,
+            "largest_batch": self.largest_batch
+        }
+
+
+_group_commit_writer: Optional[GroupCommitWriter] = None
+
+
+def get_group_commit_writer() -> GroupCommitWriter:
+    """Process-wide writer, configured from STATUS_GROUP_COMMIT_* on first use"""
+    global _group_commit_writer
+    if _group_commit_writer is None:
+        _group_commit_writer = GroupCommitWriter(
+            max_delay=float(os.getenv("STATUS_GROUP_COMMIT_MS", "5")) / 1000,
+            max_rows=max(1, int(os.getenv("STATUS_GROUP_COMMIT_MAX_ROWS", "200")))
+        )
+    return _group_commit_writer
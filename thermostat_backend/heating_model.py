@@ -0,0 +1,283 @@
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import DEFAULT_HOME_ID, Status, WeatherForecast
+
+logger = logging.getLogger(__name__)
+
+# Sufficient statistics for least squares of heating rate y (minutes per hour)
+# on temperature difference x (indoor - outdoor):
+# (count, sum_x, sum_y, sum_xx, sum_xy, sum_yy, sum_indoor)
+Moments = Tuple[int, float, float, float, float, float, float]
+
+EMPTY_MOMENTS: Moments = (0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+# The time strings SQLite's julianday() reads: a date, optionally a time with any fraction
+# of a second, optionally a UTC offset (Z or ±HH:MM)
+_TIME_STRING = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[ T](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?)?"
+    r"\s*(?:(Z)|([+-])(\d{2}):(\d{2}))?"
+)
+
+
+def combine_moments(a: Moments, b: Moments) -> Moments:
+    return tuple(x + y for x, y in zip(a, b))
+
+
+def parse_status_time(value: Optional[str]) -> Optional[datetime]:
+    """Read a status time as julianday() does in _database_moments (offsets applied), or None"""
+    match = _TIME_STRING.fullmatch(value.strip()) if isinstance(value, str) else None
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, utc, sign, offset_hours, offset_minutes = match.groups()
+    try:
+        parsed = datetime(
+            int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+            int((fraction or "0")[:6].ljust(6, "0"))
+        )
+    except ValueError:
+        return None
+    if sign:
+        offset = timedelta(hours=int(offset_hours), minutes=int(offset_minutes))
+        parsed = parsed - offset if sign == "+" else parsed + offset
+    return parsed
+
+
+def status_moments(status: Status) -> Moments:
+    """Moments of one status, or EMPTY_MOMENTS when its period can't be used"""
+    start = parse_status_time(status.start_time)
+    end = parse_status_time(status.end_time)
+    if start is None or end is None:
+        return EMPTY_MOMENTS
+    duration = (end - start).total_seconds() / 60
+    if duration <= 0:
+        return EMPTY_MOMENTS
+
+    x = status.average_indoor_temp - status.average_outdoor_temp
+    y = status.minutes_heating * 60.0 / duration
+    return (1, x, y, x * x, x * y, y * y, status.average_indoor_temp)
+
+
+def _database_moments(db: Session) -> Tuple[Moments, int]:
+    """Moments over all SQLite statuses with one aggregate query, plus the highest id"""
+    duration = (func.julianday(Status.end_time) - func.julianday(Status.start_time)) * 1440.0
+    x = Status.average_indoor_temp - Status.average_outdoor_temp
+    y = Status.minutes_heating * 60.0 / duration
+    row = db.query(
+        func.count(Status.id),
+        func.sum(x),
+        func.sum(y),
+        func.sum(x * x),
+        func.sum(x * y),
+        func.sum(y * y),
+        func.sum(Status.average_indoor_temp)
+    ).filter(duration > 0).first()
+    max_id = db.query(func.max(Status.id)).scalar() or 0
+
+    if not row or not row[0]:
+        return EMPTY_MOMENTS, max_id
+    return (row[0],) + tuple(value or 0.0 for value in row[1:]), max_id
+
+
+def _partition_moments() -> Moments:
+    from .partitions import get_partitions
+    partitions = get_partitions()
+    moments = EMPTY_MOMENTS
+    if partitions is not None:
+        for partition_moments, _ in partitions.each(_database_moments):
+            moments = combine_moments(moments, partition_moments)
+    return moments
+
+
+def _archive_moments(db: Session) -> Moments:
+    from .archive import get_archive
+    archive = get_archive()
+    if archive is None:
+        return EMPTY_MOMENTS
+
+    table = archive.read_table(
+        columns=["start_time", "end_time", "minutes_heating", "average_indoor_temp", "average_outdoor_temp"],
+        exclude_ids=archive.ids_in_database(db)
+    )
+    if table is None:
+        return EMPTY_MOMENTS
+
+    import pyarrow.compute as pc
+
+    def seconds(column):
+        # Second precision is plenty for period lengths and avoids parsing the fraction. Times without
+        # seconds count as in julianday(); unparseable ones become null and drop out with the filter below
+        values = pc.replace_substring(table[column], "T", " ", max_replacements=1)
+
+        def parse(length, time_format):
+            return pc.strptime(pc.utf8_slice_codeunits(values, 0, length), format=time_format, unit="s", error_is_null=True)
+
+        parsed = pc.coalesce(parse(19, "%Y-%m-%d %H:%M:%S"), parse(16, "%Y-%m-%d %H:%M"))
+        return pc.cast(parsed, "int64")
+
+    duration = pc.divide(pc.cast(pc.subtract(seconds("end_time"), seconds("start_time")), "double"), 60.0)
+    valid = pc.greater(duration, 0)
+    indoor = pc.filter(table["average_indoor_temp"], valid)
+    x = pc.subtract(indoor, pc.filter(table["average_outdoor_temp"], valid))
+    y = pc.divide(pc.multiply(pc.cast(pc.filter(table["minutes_heating"], valid), "double"), 60.0), pc.filter(duration, valid))
+
+    count = len(x)
+    if not count:
+        return EMPTY_MOMENTS
+    return (
+        count,
+        pc.sum(x).as_py(),
+        pc.sum(y).as_py(),
+        pc.sum(pc.multiply(x, x)).as_py(),
+        pc.sum(pc.multiply(x, y)).as_py(),
+        pc.sum(pc.multiply(y, y)).as_py(),
+        pc.sum(indoor).as_py()
+    )
+
+
+class HeatingDemandModel:
+    """Online least squares of heating minutes per hour on the indoor/outdoor temperature difference.
+
+    Only the sufficient statistics are stored: they are built once with an
+    aggregate query, then each new status is folded in by create_status, so
+    the coefficients never require a refit over the statuses table. Rows
+    written by other processes are caught up by id, like the statistics index.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._moments: Optional[Moments] = None
+        self._coefficients: Optional[Tuple[float, float, float]] = None
+        self.max_id = 0
+        self._added_ids: set = set()
+
+    @property
+    def is_built(self) -> bool:
+        return self._moments is not None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._moments = None
+            self._coefficients = None
+            self.max_id = 0
+            self._added_ids = set()
+
+    def build(self, db: Session) -> None:
+        moments, max_id = _database_moments(db)
+        moments = combine_moments(moments, _partition_moments())
+        moments = combine_moments(moments, _archive_moments(db))
+        with self._lock:
+            self._moments = moments
+            self._coefficients = None
+            self.max_id = max_id
+            self._added_ids = set()
+        logger.info(f"Heating model built from {moments[0]} statuses")
+
+    def add(self, statuses: Iterable[Status]) -> None:
+        """Fold newly inserted statuses into the model (no-op until built)"""
+        with self._lock:
+            if self._moments is None:
+                return
+            for status in statuses:
+                if status.id is not None and (status.id <= self.max_id or status.id in self._added_ids):
+                    continue
+                self._moments = combine_moments(self._moments, status_moments(status))
+                self._coefficients = None
+                if status.id is not None:
+                    self._added_ids.add(status.id)
+
+    def ensure_current(self, db: Session) -> None:
+        if self._moments is None:
+            self.build(db)
+            return
+
+        latest_id = db.query(func.max(Status.id)).scalar() or 0
+        if latest_id > self.max_id:
+            self.add(db.query(Status).filter(Status.id > self.max_id).order_by(Status.id).all())
+            with self._lock:
+                self.max_id = latest_id
+                self._added_ids = {i for i in self._added_ids if i > latest_id}
+
+    def coefficients(self) -> Optional[Tuple[float, float, float]]:
+        """(intercept, slope, r_squared), cached until the next status; None while there is too little data to fit"""
+        with self._lock:
+            if self._coefficients is None and self._moments is not None:
+                n, sx, sy, sxx, sxy, syy, _ = self._moments
+                if n >= 2:
+                    sxx_centered = sxx - sx * sx / n
+                    sxy_centered = sxy - sx * sy / n
+                    syy_centered = syy - sy * sy / n
+                    if sxx_centered > 1e-9:
+                        slope = sxy_centered / sxx_centered
+                        intercept = (sy - slope * sx) / n
+                        r_squared = sxy_centered * sxy_centered / (sxx_centered * syy_centered) if syy_centered > 1e-9 else 1.0
+                        self._coefficients = (intercept, slope, r_squared)
+            return self._coefficients
+
+    @property
+    def sample_count(self) -> int:
+        return self._moments[0] if self._moments else 0
+
+    def average_indoor_temp(self) -> Optional[float]:
+        if not self._moments or not self._moments[0]:
+            return None
+        return self._moments[6] / self._moments[0]
+
+    def predict(self, temperature_difference: float) -> Optional[float]:
+        """Expected heating minutes per hour, clamped to 0..60"""
+        coefficients = self.coefficients()
+        if coefficients is None:
+            return None
+        intercept, slope, _ = coefficients
+        return min(60.0, max(0.0, intercept + slope * temperature_difference))
+
+    def predict_forecast(self, db: Session, indoor_temp: Optional[float] = None, home_id: str = DEFAULT_HOME_ID) -> Dict[str, Any]:
+        """Predicted heating for each hour of the home's stored forecast"""
+        self.ensure_current(db)
+        coefficients = self.coefficients()
+        if indoor_temp is None:
+            indoor_temp = self.average_indoor_temp()
+
+        forecast_row = db.query(WeatherForecast).filter(
+            WeatherForecast.home_id == home_id
+        ).order_by(WeatherForecast.timestamp.desc()).first()
+        forecast = json.loads(forecast_row.forecast_data) if forecast_row else []
+
+        hours = []
+        if coefficients is not None and indoor_temp is not None:
+            for entry in forecast:
+                outdoor = entry.get("temperature")
+                if not isinstance(outdoor, (int, float)):
+                    continue
+                difference = indoor_temp - outdoor
+                hours.append({
+                    "datetime": entry.get("datetime"),
+                    "outdoor_temp": outdoor,
+                    "temperature_difference": round(difference, 2),
+                    "predicted_minutes_heating": round(self.predict(difference), 1)
+                })
+
+        return {
+            "home_id": home_id,
+            "indoor_temp": round(indoor_temp, 2) if indoor_temp is not None else None,
+            "forecast_timestamp": forecast_row.timestamp.isoformat() if forecast_row else None,
+            "model": {
+                "samples": self.sample_count,
+                "intercept": round(coefficients[0], 4) if coefficients else None,
+                "slope": round(coefficients[1], 4) if coefficients else None,
+                "r_squared": round(coefficients[2], 4) if coefficients else None
+            },
+            "hours": hours,
+            "total_predicted_minutes_heating": round(sum(hour["predicted_minutes_heating"] for hour in hours), 1)
+        }
+
+
+heating_model = HeatingDemandModel()
@@ -1,61 +1,142 @@
+import os
 import httpx
 import asyncio
 import logging
 import json
-from datetime import datetime, date
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, date, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from .models import SensorReading, WeatherForecast, DailyPowerUsage, Status
+from .models import SensorReading, WeatherForecast, DailyPowerUsage, Status, DEFAULT_HOME_ID
 from .database import SessionLocal
+from .events import broadcaster
+from .json_stream import aiter_array_objects
+from .circuit_breaker import CircuitOpenError, get_breaker
+from .forecast_history import ForecastRecorder
+from .daily_facts import DailyFactsService
+from .readiness import poll_freshness, max_poll_age_seconds
+from .homes import (
+    HomeConfig,
+    DEFAULT_FORECAST_ENTITY,
+    DEFAULT_TARGET_ENTITIES,
+    DEFAULT_IMPORT_ENTITY,
+    DEFAULT_EXPORT_ENTITY,
+    DEFAULT_INVERTER_YIELD_ENTITY
+)
 
 logger = logging.getLogger(__name__)
 
+# Fail fast when Home Assistant is unreachable, but allow slow responses (history, large state dumps)
+HA_TIMEOUT = httpx.Timeout(30.0, connect=3.0)
+
+# Data collected on every poll, each tracked for readiness
+POLLED_SOURCES = ("states", "forecast", "power_usage")
+
+# Top-level entity_id of a raw state object; attributes may repeat the key, so matches are only candidates
+ENTITY_ID_PATTERN = re.compile(r'"entity_id"\s*:\s*"([^"\\]*)"')
+
 class HomeAssistantService:
-    def __init__(self, base_url: str, access_token: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: str,
+        access_token: Optional[str] = None,
+        home_id: str = DEFAULT_HOME_ID,
+        forecast_entity: str = DEFAULT_FORECAST_ENTITY,
+        target_entities: Optional[List[str]] = None,
+        import_entity: str = DEFAULT_IMPORT_ENTITY,
+        export_entity: str = DEFAULT_EXPORT_ENTITY,
+        inverter_yield_entity: str = DEFAULT_INVERTER_YIELD_ENTITY
+    ):
         self.base_url = base_url.rstrip('/')
         self.access_token = access_token
-        self.target_entities = [
-            "sensor.balcony_humidity",
-            "sensor.balcony_pressure",
-            "sensor.balcony_temperature",
-            "sensor.bathroom_big_humidity",
-            "sensor.bathroom_big_temperature",
-            "sensor.bathroom_small_humidity",
-            "sensor.bathroom_small_temperature",
-            "sensor.bedroom_humidity",
-            "sensor.bedroom_temperature",
-            "sensor.entrance_humidity",
-            "sensor.entrance_temperature",
-            "sensor.living_room_humidity",
-            "sensor.living_room_temperature",
-            "sensor.second_floor_humidity",
-            "sensor.second_floor_temperature",
-            "sensor.working_room_humidity",
-            "sensor.working_room_temperature",
-            "sensor.pantry_temperature",
-            "sensor.pantry_humidity",
-            "sensor.sun_next_setting",
-            "sensor.sun_next_rising",
-            "sensor.pilisszentivan_condition",
-            "sensor.pilisszentivan_temperature",
-            "sensor.inverter_daily_yield"
-        ]
+        self.home_id = home_id
+        self.forecast_entity = forecast_entity
+        self.import_entity = import_entity
+        self.export_entity = export_entity
+        self.inverter_yield_entity = inverter_yield_entity
+        # Shared client for batch jobs and the multi-home supervisor; None means one client per call
+        self.client: Optional[httpx.AsyncClient] = None
+
+        # Sensor write coalescing: unchanged states are only rewritten as a heartbeat,
+        # and queued writes are flushed in one transaction by interval or size
+        self.sensor_heartbeat_seconds = int(os.getenv("SENSOR_HEARTBEAT_SECONDS", "900"))
+        self.sensor_flush_interval_seconds = int(os.getenv("SENSOR_FLUSH_INTERVAL_SECONDS", "120"))
+        self.sensor_flush_max_pending = int(os.getenv("SENSOR_FLUSH_MAX_PENDING", "100"))
+        # Readings kept for retry while flushes fail; the oldest go first beyond this
+        self.sensor_buffer_max_readings = int(os.getenv("SENSOR_BUFFER_MAX_READINGS", "10000"))
+        self._last_states: Dict[str, str] = {}
+        self._last_written: Dict[str, datetime] = {}
+        self._pending_readings: List[Dict[str, Any]] = []
+        self._last_flush = datetime.utcnow()
+        self.target_entities = list(target_entities) if target_entities is not None else list(DEFAULT_TARGET_ENTITIES)
+        self.forecast_recorder = ForecastRecorder(home_id, forecast_entity)
+        self._target_set = frozenset(self.target_entities)
+
+    @classmethod
+    def from_config(cls, home: HomeConfig) -> "HomeAssistantService":
+        return cls(
+            home.base_url,
+            home.token(),
+            home_id=home.id,
+            forecast_entity=home.forecast_entity,
+            target_entities=home.target_entities,
+            import_entity=home.import_entity,
+            export_entity=home.export_entity,
+            inverter_yield_entity=home.inverter_yield_entity
+        )
+
+    def _breaker(self, endpoint: str):
+        return get_breaker(f"{self.home_id}:{endpoint}")
+
+    @asynccontextmanager
+    async def _http_client(self):
+        """Yield the shared HTTP client if one is set, otherwise a short-lived one"""
+        if self.client is not None:
+            yield self.client
+        else:
+            async with httpx.AsyncClient() as client:
+                yield client
+
+    def _parse_target_state(self, raw: str) -> Optional[Dict[str, Any]]:
+        """Decode one raw state object if it belongs to a target entity, keeping only entity_id and state"""
+        if not any(entity_id in self._target_set for entity_id in ENTITY_ID_PATTERN.findall(raw)):
+            return None
+        state = json.loads(raw)
+        if state.get("entity_id") not in self._target_set:
+            return None
+        return {"entity_id": state["entity_id"], "state": state["state"]}
 
     async def fetch_states(self) -> List[Dict[str, Any]]:
-        """Fetch all states from Home Assistant API"""
+        """Fetch the states of the target entities from Home Assistant API.
+
+        /api/states returns every entity with all attributes, so the response is
+        parsed incrementally: objects are split off the byte stream one at a time
+        and only target entities are decoded.
+        """
         headers = {}
         if self.access_token:
             headers["Authorization"] = f"Bearer {self.access_token}"
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             try:
-                response = await client.get(
-                    f"{self.base_url}/api/states",
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
+                states = []
+                async with self._breaker("states").guard():
+                    async with client.stream(
+                        "GET",
+                        f"{self.base_url}/api/states",
+                        headers=headers,
+                        timeout=HA_TIMEOUT
+                    ) as response:
+                        response.raise_for_status()
+                        async for raw in aiter_array_objects(response.aiter_bytes()):
+                            state = self._parse_target_state(raw)
+                            if state is not None:
+                                states.append(state)
+                return states
+            except CircuitOpenError as e:
+                logger.debug(f"Skipping states fetch: {e}")
+                return []
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error fetching states: {e}")
                 return []
@@ -67,42 +148,80 @@ class HomeAssistantService:
         """Filter states to only include target entities"""
         filtered_states = []
         for state in states:
-            if state.get("entity_id") in self.target_entities:
+            if state.get("entity_id") in self._target_set:
                 filtered_states.append({
                     "entity_id": state["entity_id"],
                     "state": state["state"]
                 })
         return filtered_states
 
-    def save_sensor_readings(self, readings: List[Dict[str, Any]]) -> None:
-        """Save or update sensor readings to database (only latest values)"""
+    def save_sensor_readings(self, readings: List[Dict[str, Any]]) -> int:
+        """Queue changed sensor readings (and due heartbeats) for the next flush; returns the number queued"""
+        timestamp = datetime.utcnow()
+        heartbeat = timedelta(seconds=self.sensor_heartbeat_seconds)
+        queued = 0
+        changed_readings = []
+
+        for reading in readings:
+            entity_id = reading["entity_id"]
+            changed = self._last_states.get(entity_id) != reading["state"]
+            last_written = self._last_written.get(entity_id)
+
+            if changed or last_written is None or timestamp - last_written >= heartbeat:
+                self._pending_readings.append({
+                    "home_id": self.home_id,
+                    "entity_id": entity_id,
+                    "state": reading["state"],
+                    "timestamp": timestamp
+                })
+                self._last_states[entity_id] = reading["state"]
+                self._last_written[entity_id] = timestamp
+                queued += 1
+                if changed:
+                    changed_readings.append({
+                        "entity_id": entity_id,
+                        "state": reading["state"],
+                        "timestamp": timestamp.isoformat()
+                    })
+
+        # Live subscribers get changes right away, independent of the write-behind flush
+        if changed_readings:
+            broadcaster.publish("sensor_readings", changed_readings, self.home_id)
+
+        flush_interval = timedelta(seconds=self.sensor_flush_interval_seconds)
+        if (len(self._pending_readings) >= self.sensor_flush_max_pending
+                or timestamp - self._last_flush >= flush_interval):
+            self.flush_sensor_readings()
+
+        return queued
+
+    def flush_sensor_readings(self) -> None:
+        """Append all queued sensor readings to the history in one transaction"""
+        self._last_flush = datetime.utcnow()
+        if not self._pending_readings:
+            return
+
+        pending = self._pending_readings
+        self._pending_readings = []
+
         db = SessionLocal()
         try:
-            timestamp = datetime.utcnow()
-            for reading in readings:
-                # Check if reading already exists for this entity
-                existing = db.query(SensorReading).filter(
-                    SensorReading.entity_id == reading["entity_id"]
-                ).first()
-
-                if existing:
-                    # Update existing record
-                    existing.state = reading["state"]
-                    existing.timestamp = timestamp
-                else:
-                    # Create new record
-                    sensor_reading = SensorReading(
-                        entity_id=reading["entity_id"],
-                        state=reading["state"],
-                        timestamp=timestamp
-                    )
-                    db.add(sensor_reading)
-
+            db.bulk_insert_mappings(SensorReading, pending)
             db.commit()
-            logger.info(f"Updated {len(readings)} sensor readings")
+            logger.info(f"Flushed {len(pending)} sensor readings")
         except Exception as e:
             logger.error(f"Error saving sensor readings: {e}")
             db.rollback()
+            # Keep the readings for the next flush, up to the buffer limit
+            pending = pending + self._pending_readings
+            dropped = len(pending) - self.sensor_buffer_max_readings
+            if dropped > 0:
+                pending = pending[dropped:]
+                logger.warning(
+                    f"Dropped the {dropped} oldest unsaved sensor readings, "
+                    f"keeping {self.sensor_buffer_max_readings} for retry"
+                )
+            self._pending_readings = pending
         finally:
             db.close()
 
@@ -115,29 +234,33 @@ class HomeAssistantService:
             headers["Authorization"] = f"Bearer {self.access_token}"
 
         body = {
-            "entity_id": "weather.pilisszentivan_forecast",
+            "entity_id": self.forecast_entity,
             "type": "hourly"
         }
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             try:
-                response = await client.post(
-                    f"{self.base_url}/api/services/weather/get_forecasts?return_response",
-                    headers=headers,
-                    json=body,
-                    timeout=30.0
-                )
-                response.raise_for_status()
+                async with self._breaker("forecast").guard():
+                    response = await client.post(
+                        f"{self.base_url}/api/services/weather/get_forecasts?return_response",
+                        headers=headers,
+                        json=body,
+                        timeout=HA_TIMEOUT
+                    )
+                    response.raise_for_status()
                 data = response.json()
 
                 # Navigate through the response structure
                 service_response = data.get("service_response", {})
-                forecast_entity = service_response.get("weather.pilisszentivan_forecast", {})
+                forecast_entity = service_response.get(self.forecast_entity, {})
                 forecast_array = forecast_entity.get("forecast", [])
 
                 logger.info(f"Fetched {len(forecast_array)} weather forecast entries")
                 return forecast_array
 
+            except CircuitOpenError as e:
+                logger.debug(f"Skipping weather forecast fetch: {e}")
+                return None
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error fetching weather forecast: {e}")
                 return None
@@ -153,10 +276,11 @@ class HomeAssistantService:
         db = SessionLocal()
         try:
             timestamp = datetime.utcnow()
-            entity_id = "weather.pilisszentivan_forecast"
+            entity_id = self.forecast_entity
 
             # Check if forecast already exists
             existing = db.query(WeatherForecast).filter(
+                WeatherForecast.home_id == self.home_id,
                 WeatherForecast.entity_id == entity_id
             ).first()
 
@@ -168,6 +292,7 @@ class HomeAssistantService:
             else:
                 # Create new forecast
                 weather_forecast = WeatherForecast(
+                    home_id=self.home_id,
                     entity_id=entity_id,
                     forecast_data=json.dumps(forecast_data),
                     timestamp=timestamp
@@ -175,61 +300,58 @@ class HomeAssistantService:
                 db.add(weather_forecast)
                 logger.info(f"Saved new weather forecast with {len(forecast_data)} entries")
 
+            # Keep the history for accuracy analysis alongside the current forecast
+            self.forecast_recorder.record(db, forecast_data, timestamp)
             db.commit()
+            broadcaster.publish("weather_forecast", {
+                "entity_id": entity_id,
+                "forecast_data": forecast_data,
+                "timestamp": timestamp.isoformat()
+            }, self.home_id)
         except Exception as e:
             logger.error(f"Error saving weather forecast: {e}")
             db.rollback()
+            self.forecast_recorder.reset()
         finally:
             db.close()
 
-    async def fetch_sensor_history(self, entity_id: str) -> Optional[tuple]:
-        """Fetch sensor history for today and return (start_value, end_value, daily_difference)"""
+    async def fetch_history_entries(self, entity_id: str, target_date: Optional[date] = None) -> Optional[List[Dict[str, Any]]]:
+        """Fetch raw history entries for one entity on target_date (defaults to today)"""
         headers = {}
         if self.access_token:
             headers["Authorization"] = f"Bearer {self.access_token}"
 
-        today = date.today().strftime("%Y-%m-%d")
+        day = target_date or date.today()
         params = {
             "filter_entity_id": entity_id,
             "minimal_response": "",
             "significant_changes_only": ""
         }
+        if day != date.today():
+            # Past days need an explicit end, otherwise HA returns history up to now
+            params["end_time"] = (day + timedelta(days=1)).strftime("%Y-%m-%d")
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             try:
-                response = await client.get(
-                    f"{self.base_url}/api/history/period/{today}",
-                    headers=headers,
-                    params=params,
-                    timeout=30.0
-                )
-                response.raise_for_status()
+                async with self._breaker("history").guard():
+                    response = await client.get(
+                        f"{self.base_url}/api/history/period/{day.strftime('%Y-%m-%d')}",
+                        headers=headers,
+                        params=params,
+                        timeout=HA_TIMEOUT
+                    )
+                    response.raise_for_status()
                 data = response.json()
 
                 if not data or not isinstance(data, list) or len(data) == 0:
-                    logger.warning(f"No history data received for {entity_id}")
+                    logger.warning(f"No history data received for {entity_id} on {day}")
                     return None
 
-                history_entries = data[0]
-                if not history_entries or len(history_entries) < 2:
-                    logger.warning(f"Not enough history entries for {entity_id}")
-                    return None
-
-                first_entry = history_entries[0]
-                last_entry = history_entries[-1]
-
-                try:
-                    start_value = float(first_entry["state"])
-                    end_value = float(last_entry["state"])
-                    daily_difference = end_value - start_value
-
-                    logger.info(f"{entity_id}: {end_value} - {start_value} = {daily_difference}")
-                    return start_value, end_value, daily_difference
-
-                except (ValueError, KeyError) as e:
-                    logger.error(f"Error parsing values for {entity_id}: {e}")
-                    return None
+                return data[0]
 
+            except CircuitOpenError as e:
+                logger.debug(f"Skipping history fetch for {entity_id}: {e}")
+                return None
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error fetching {entity_id}: {e}")
                 return None
@@ -237,20 +359,56 @@ class HomeAssistantService:
                 logger.error(f"Unexpected error fetching {entity_id}: {e}")
                 return None
 
-    async def fetch_inverter_daily_yield(self) -> Optional[float]:
-        """Fetch current inverter daily yield value"""
+    async def fetch_sensor_history(self, entity_id: str, target_date: Optional[date] = None) -> Optional[tuple]:
+        """Fetch sensor history for a day and return (start_value, end_value, daily_difference)"""
+        history_entries = await self.fetch_history_entries(entity_id, target_date)
+        if not history_entries or len(history_entries) < 2:
+            logger.warning(f"Not enough history entries for {entity_id}")
+            return None
+
+        first_entry = history_entries[0]
+        last_entry = history_entries[-1]
+
+        try:
+            start_value = float(first_entry["state"])
+            end_value = float(last_entry["state"])
+            daily_difference = end_value - start_value
+
+            logger.info(f"{entity_id}: {end_value} - {start_value} = {daily_difference}")
+            return start_value, end_value, daily_difference
+
+        except (ValueError, KeyError) as e:
+            logger.error(f"Error parsing values for {entity_id}: {e}")
+            return None
+
+    async def fetch_inverter_daily_yield(self, target_date: Optional[date] = None) -> Optional[float]:
+        """Fetch inverter daily yield; past days use the highest value recorded that day"""
+        if target_date and target_date != date.today():
+            history_entries = await self.fetch_history_entries(self.inverter_yield_entity, target_date)
+            if not history_entries:
+                return None
+
+            values = []
+            for entry in history_entries:
+                try:
+                    values.append(float(entry["state"]))
+                except (ValueError, KeyError):
+                    continue
+            return max(values) if values else None
+
         headers = {}
         if self.access_token:
             headers["Authorization"] = f"Bearer {self.access_token}"
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             try:
-                response = await client.get(
-                    f"{self.base_url}/api/states/sensor.inverter_daily_yield",
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
+                async with self._breaker("entity_state").guard():
+                    response = await client.get(
+                        f"{self.base_url}/api/states/{self.inverter_yield_entity}",
+                        headers=headers,
+                        timeout=HA_TIMEOUT
+                    )
+                    response.raise_for_status()
                 data = response.json()
 
                 try:
@@ -261,6 +419,9 @@ class HomeAssistantService:
                     logger.error(f"Error parsing inverter daily yield: {e}")
                     return None
 
+            except CircuitOpenError as e:
+                logger.debug(f"Skipping inverter daily yield fetch: {e}")
+                return None
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error fetching inverter daily yield: {e}")
                 return None
@@ -268,22 +429,22 @@ class HomeAssistantService:
                 logger.error(f"Unexpected error fetching inverter daily yield: {e}")
                 return None
 
-    async def fetch_daily_power_usage(self) -> Optional[dict]:
-        """Fetch all power-related sensors and calculate total usage"""
+    async def fetch_daily_power_usage(self, target_date: Optional[date] = None) -> Optional[dict]:
+        """Fetch all power-related sensors and calculate total usage for a day (defaults to today)"""
         # Fetch import data
-        import_data = await self.fetch_sensor_history("sensor.p1_meter_total_energy_import")
+        import_data = await self.fetch_sensor_history(self.import_entity, target_date)
         if not import_data:
             logger.error("Failed to fetch import data")
             return None
 
         # Fetch export data
-        export_data = await self.fetch_sensor_history("sensor.p1_meter_total_energy_export")
+        export_data = await self.fetch_sensor_history(self.export_entity, target_date)
         if not export_data:
             logger.warning("Failed to fetch export data, using 0")
             export_data = (0.0, 0.0, 0.0)
 
         # Fetch inverter daily yield (this is already a daily cumulative value)
-        inverter_yield = await self.fetch_inverter_daily_yield()
+        inverter_yield = await self.fetch_inverter_daily_yield(target_date)
         if inverter_yield is None:
             logger.warning("Failed to fetch inverter daily yield, using 0")
             inverter_yield = 0.0
@@ -315,7 +476,10 @@ class HomeAssistantService:
             timestamp = datetime.utcnow()
 
             # Check if we already have data for today, update if exists
-            existing = db.query(DailyPowerUsage).filter(DailyPowerUsage.date == today).first()
+            existing = db.query(DailyPowerUsage).filter(
+                DailyPowerUsage.home_id == self.home_id,
+                DailyPowerUsage.date == today
+            ).first()
 
             if existing:
                 existing.import_start_value = power_data["import_start_value"]
@@ -327,9 +491,11 @@ class HomeAssistantService:
                 existing.inverter_daily_yield = power_data["inverter_daily_yield"]
                 existing.daily_usage = power_data["daily_usage"]
                 existing.timestamp = timestamp
+                power_usage = existing
                 logger.info(f"Updated daily power usage for {today}: {power_data['daily_usage']} kWh")
             else:
                 power_usage = DailyPowerUsage(
+                    home_id=self.home_id,
                     date=today,
                     import_start_value=power_data["import_start_value"],
                     import_end_value=power_data["import_end_value"],
@@ -344,7 +510,16 @@ class HomeAssistantService:
                 db.add(power_usage)
                 logger.info(f"Saved new daily power usage for {today}: {power_data['daily_usage']} kWh")
 
+            DailyFactsService.record_power_usage(db, power_usage)
             db.commit()
+            broadcaster.publish("daily_power_usage", {
+                "date": today.isoformat(),
+                "daily_import": power_data["daily_import"],
+                "daily_export": power_data["daily_export"],
+                "inverter_daily_yield": power_data["inverter_daily_yield"],
+                "daily_usage": power_data["daily_usage"],
+                "timestamp": timestamp.isoformat()
+            }, self.home_id)
         except Exception as e:
             logger.error(f"Error saving daily power usage: {e}")
             db.rollback()
@@ -354,39 +529,47 @@ class HomeAssistantService:
     async def collect_and_save_data(self) -> None:
         """Main method to collect data from Home Assistant and save to database"""
         try:
-            logger.info("Fetching states from Home Assistant...")
-            states = await self.fetch_states()
-
-            if not states:
-                logger.warning("No states received from Home Assistant")
+            # Steps whose endpoint is known to be down are skipped quietly until the breaker's next probe
+            if self._breaker("states").is_open:
+                logger.debug("Home Assistant states circuit open, skipping sensor readings")
             else:
-                filtered_states = await self.filter_target_entities(states)
+                logger.info("Fetching states from Home Assistant...")
+                target_states = await self.fetch_states()
 
-                if not filtered_states:
+                if not target_states:
                     logger.warning("No target entities found in states")
                 else:
-                    self.save_sensor_readings(filtered_states)
-                    logger.info(f"Successfully collected and saved {len(filtered_states)} sensor readings")
+                    queued = self.save_sensor_readings(target_states)
+                    poll_freshness.record_success(f"{self.home_id}:states")
+                    logger.info(f"Collected {len(target_states)} sensor readings, {queued} changed or due for heartbeat")
 
             # Fetch weather forecast
-            logger.info("Fetching weather forecast from Home Assistant...")
-            forecast_data = await self.fetch_weather_forecast()
-
-            if forecast_data:
-                self.save_weather_forecast(forecast_data)
-                logger.info("Successfully collected and saved weather forecast")
+            if self._breaker("forecast").is_open:
+                logger.debug("Home Assistant forecast circuit open, skipping weather forecast")
             else:
-                logger.warning("No weather forecast data received")
+                logger.info("Fetching weather forecast from Home Assistant...")
+                forecast_data = await self.fetch_weather_forecast()
 
-            # Fetch daily power usage
-            logger.info("Fetching daily power usage from Home Assistant...")
-            power_usage_data = await self.fetch_daily_power_usage()
+                if forecast_data:
+                    self.save_weather_forecast(forecast_data)
+                    poll_freshness.record_success(f"{self.home_id}:forecast")
+                    logger.info("Successfully collected and saved weather forecast")
+                else:
+                    logger.warning("No weather forecast data received")
 
-            if power_usage_data:
-                self.save_daily_power_usage(power_usage_data)
-                logger.info("Successfully collected and saved daily power usage")
+            # Fetch daily power usage
+            if self._breaker("history").is_open:
+                logger.debug("Home Assistant history circuit open, skipping daily power usage")
             else:
-                logger.warning("No daily power usage data received")
+                logger.info("Fetching daily power usage from Home Assistant...")
+                power_usage_data = await self.fetch_daily_power_usage()
+
+                if power_usage_data:
+                    self.save_daily_power_usage(power_usage_data)
+                    poll_freshness.record_success(f"{self.home_id}:power_usage")
+                    logger.info("Successfully collected and saved daily power usage")
+                else:
+                    logger.warning("No daily power usage data received")
 
         except Exception as e:
             logger.error(f"Error in collect_and_save_data: {e}")
@@ -394,15 +577,20 @@ class HomeAssistantService:
     async def start_polling(self, interval_seconds: int = 60) -> None:
         """Start polling Home Assistant every interval_seconds"""
         logger.info(f"Starting Home Assistant polling every {interval_seconds} seconds")
-        while True:
-            await self.collect_and_save_data()
-            await asyncio.sleep(interval_seconds)
+        try:
+            while True:
+                await self.collect_and_save_data()
+                await asyncio.sleep(interval_seconds)
+        finally:
+            # Don't lose buffered readings when the poller is cancelled
+            self.flush_sensor_readings()
 
     def get_latest_readings(self, db: Session) -> List[Dict[str, Any]]:
         """Get the latest reading for each target entity"""
         latest_readings = []
         for entity_id in self.target_entities:
             latest = db.query(SensorReading).filter(
+                SensorReading.home_id == self.home_id,
                 SensorReading.entity_id == entity_id
             ).order_by(SensorReading.timestamp.desc()).first()
 
@@ -413,7 +601,9 @@ class HomeAssistantService:
 
     def get_latest_weather_forecast(self, db: Session) -> Optional[Dict[str, Any]]:
         """Get the latest weather forecast"""
-        latest_forecast = db.query(WeatherForecast).order_by(
+        latest_forecast = db.query(WeatherForecast).filter(
+            WeatherForecast.home_id == self.home_id
+        ).order_by(
             WeatherForecast.timestamp.desc()
         ).first()
 
@@ -425,6 +615,7 @@ class HomeAssistantService:
         """Get today's daily power usage"""
         today = date.today()
         today_power_usage = db.query(DailyPowerUsage).filter(
+            DailyPowerUsage.home_id == self.home_id,
             DailyPowerUsage.date == today
         ).first()
 
@@ -465,4 +656,54 @@ class HomeAssistantService:
             "avg_indoor_temp": avg_indoor_temp,
             "avg_outdoor_temp": avg_outdoor_temp,
             "records_count": count
-        }
\ No newline at end of file
+        }
+
+
+class HomeAssistantSupervisor:
+    """Polls every configured home from one task.
+
+    Each home runs on its own schedule, but at most max_concurrency collection
+    cycles are in flight at once and all homes share one HTTP connection pool.
+    """
+
+    def __init__(self, homes: List[HomeConfig], interval_seconds: int = 60, max_concurrency: int = 4):
+        self.services: Dict[str, HomeAssistantService] = {
+            home.id: HomeAssistantService.from_config(home) for home in homes
+        }
+        self.interval_seconds = interval_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Polled sources reported by /health/ready, named like their circuit breakers
+        max_age = max_poll_age_seconds(interval_seconds)
+        for home_id in self.services:
+            for source in POLLED_SOURCES:
+                poll_freshness.register(f"{home_id}:{source}", max_age)
+
+    async def _poll_home(self, service: HomeAssistantService) -> None:
+        while True:
+            started = asyncio.get_running_loop().time()
+            async with self._semaphore:
+                await service.collect_and_save_data()
+            elapsed = asyncio.get_running_loop().time() - started
+            await asyncio.sleep(max(0.0, self.interval_seconds - elapsed))
+
+    async def start_polling(self) -> None:
+        logger.info(
+            f"Starting Home Assistant polling for {len(self.services)} homes every "
+            f"{self.interval_seconds} seconds (max {self.max_concurrency} concurrent)"
+        )
+        limits = httpx.Limits(max_connections=self.max_concurrency * 2, max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(limits=limits) as client:
+            for service in self.services.values():
+                service.client = client
+            try:
+                await asyncio.gather(*(self._poll_home(service) for service in self.services.values()))
+            finally:
+                for service in self.services.values():
+                    service.client = None
+                self.flush_sensor_readings()
+
+    def flush_sensor_readings(self) -> None:
+        for service in self.services.values():
+            service.flush_sensor_readings()
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .models import DEFAULT_HOME_ID
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FORECAST_ENTITY = "weather.pilisszentivan_forecast"
+DEFAULT_TEMPERATURE_ENTITY = "sensor.pilisszentivan_temperature"
+DEFAULT_IMPORT_ENTITY = "sensor.p1_meter_total_energy_import"
+DEFAULT_EXPORT_ENTITY = "sensor.p1_meter_total_energy_export"
+DEFAULT_INVERTER_YIELD_ENTITY = "sensor.inverter_daily_yield"
+
+DEFAULT_TARGET_ENTITIES = [
+    "sensor.balcony_humidity",
+    "sensor.balcony_pressure",
+    "sensor.balcony_temperature",
+    "sensor.bathroom_big_humidity",
+    "sensor.bathroom_big_temperature",
+    "sensor.bathroom_small_humidity",
+    "sensor.bathroom_small_temperature",
+    "sensor.bedroom_humidity",
+    "sensor.bedroom_temperature",
+    "sensor.entrance_humidity",
+    "sensor.entrance_temperature",
+    "sensor.living_room_humidity",
+    "sensor.living_room_temperature",
+    "sensor.second_floor_humidity",
+    "sensor.second_floor_temperature",
+    "sensor.working_room_humidity",
+    "sensor.working_room_temperature",
+    "sensor.pantry_temperature",
+    "sensor.pantry_humidity",
+    "sensor.sun_next_setting",
+    "sensor.sun_next_rising",
+    "sensor.pilisszentivan_condition",
+    "sensor.pilisszentivan_temperature",
+    "sensor.inverter_daily_yield"
+]
+
+
+class HomeConfig(BaseModel):
+    id: str = Field(..., description="Identifier used to partition this home's data")
+    base_url: str = Field(..., description="Home Assistant base URL")
+    access_token: Optional[str] = Field(None, description="Long-lived access token")
+    access_token_env: Optional[str] = Field(None, description="Environment variable holding the access token")
+    forecast_entity: str = DEFAULT_FORECAST_ENTITY
+    # Measured outdoor temperature the forecast is scored against
+    temperature_entity: str = DEFAULT_TEMPERATURE_ENTITY
+    target_entities: List[str] = Field(default_factory=lambda: list(DEFAULT_TARGET_ENTITIES))
+    import_entity: str = DEFAULT_IMPORT_ENTITY
+    export_entity: str = DEFAULT_EXPORT_ENTITY
+    inverter_yield_entity: str = DEFAULT_INVERTER_YIELD_ENTITY
+
+    def token(self) -> Optional[str]:
+        if self.access_token_env:
+            return os.getenv(self.access_token_env)
+        return self.access_token
+
+
+_homes: Optional[Dict[str, HomeConfig]] = None
+
+
+def load_homes() -> Dict[str, HomeConfig]:
+    """Configured homes by id, read once.
+
+    HOME_ASSISTANT_HOMES_FILE points at a JSON list of home objects. Without
+    it, HOME_ASSISTANT_URL/HOME_ASSISTANT_TOKEN define a single default home.
+    """
+    global _homes
+    if _homes is not None:
+        return _homes
+
+    homes: Dict[str, HomeConfig] = {}
+    homes_file = os.getenv("HOME_ASSISTANT_HOMES_FILE")
+    if homes_file:
+        with open(homes_file) as f:
+            for entry in json.load(f):
+                home = HomeConfig.model_validate(entry)
+                if home.id in homes:
+                    raise ValueError(f"Duplicate home id {home.id!r} in {homes_file}")
+                homes[home.id] = home
+        logger.info(f"Loaded {len(homes)} homes from {homes_file}")
+    elif os.getenv("HOME_ASSISTANT_URL"):
+        homes[DEFAULT_HOME_ID] = HomeConfig(
+            id=DEFAULT_HOME_ID,
+            base_url=os.getenv("HOME_ASSISTANT_URL"),
+            access_token=os.getenv("HOME_ASSISTANT_TOKEN")
+        )
+
+    _homes = homes
+    return homes
+
+
+def get_home(home_id: str) -> Optional[HomeConfig]:
+    return load_homes().get(home_id)
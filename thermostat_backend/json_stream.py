@@ -0,0 +1,70 @@
+import codecs
+import re
+from typing import AsyncIterator, List
+
+# A complete or still unterminated string literal, or a brace outside of strings
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}]')
+
+
+class ArrayObjectSplitter:
+    """Incrementally split a top-level JSON array into the raw text of its object elements.
+
+    Only braces and string literals are tokenized (with a C-level regex), so
+    nothing is decoded while scanning, and memory is bounded by the largest
+    element rather than the whole document. Every top-level object is an
+    element, which for an array of objects means every array item.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = None
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        elements = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while True:
+            match = _TOKEN.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+
+            token = match.group(0)
+            if token[0] == '"':
+                if match.group(1) is None:
+                    # String continues in the next chunk
+                    pos = match.start()
+                    break
+            elif token == "{":
+                if self._depth == 0:
+                    self._start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    elements.append(buffer[self._start:match.end()])
+                    self._start = None
+            pos = match.end()
+
+        # Drop everything that can no longer be part of an element
+        keep_from = self._start if self._start is not None else pos
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._start is not None:
+            self._start = 0
+        return elements
+
+
+async def aiter_array_objects(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Raw text of each object in a JSON array streamed as UTF-8 byte chunks"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    splitter = ArrayObjectSplitter()
+    async for chunk in chunks:
+        for element in splitter.feed(decoder.decode(chunk)):
+            yield element
+    for element in splitter.feed(decoder.decode(b"", final=True)):
+        yield element
@@ -1,12 +1,21 @@
-import os
+import time
+_import_started = time.perf_counter()
+
 import asyncio
 import logging
-from fastapi import FastAPI
+from contextlib import contextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from .routers import router
-from .database import create_tables
-from .home_assistant import HomeAssistantService
+from .database import ensure_schema, SessionLocal
+from .analytic_store import init_store
+from .duckdb_engine import init_duckdb_engine
+from .archive import init_archive
+from .partitions import init_partitions
+from .poller import background_jobs, poller_mode, poller_lock_path, LeaderLock
+from .change_feed import change_feed
+from .formats import VaryAcceptMiddleware
 
 # Load environment variables from .env file
 load_dotenv()
@@ -28,25 +37,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(VaryAcceptMiddleware)
+
 app.include_router(router, prefix="/api/v1")
 
-home_assistant_service = None
+poller_lock: LeaderLock = None
+leader_task: asyncio.Task = None
+change_feed_task: asyncio.Task = None
+
+# Seconds spent in each startup phase, in order; "imports" covers loading the app modules
+startup_timings = {"imports": time.perf_counter() - _import_started}
+
+@contextmanager
+def _startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = time.perf_counter() - started
 
 @app.on_event("startup")
 async def startup_event():
-    create_tables()
+    with _startup_phase("schema"):
+        schema_path = ensure_schema()
+
+    with _startup_phase("archive"):
+        init_archive()
+
+    with _startup_phase("partitions"):
+        init_partitions()
+
+    with _startup_phase("analytic_store"):
+        db = SessionLocal()
+        try:
+            init_store(db)
+        finally:
+            db.close()
+
+    with _startup_phase("duckdb"):
+        db = SessionLocal()
+        try:
+            init_duckdb_engine(db)
+        finally:
+            db.close()
+
+    # Polling, compaction and archival write shared rows, so only one process may run them
+    with _startup_phase("background_jobs"):
+        mode = poller_mode()
+        if mode == "embedded":
+            background_jobs.start()
+        elif mode == "leader":
+            global poller_lock, leader_task
+            poller_lock = LeaderLock(poller_lock_path())
+            leader_task = asyncio.create_task(background_jobs.run_as_leader(poller_lock))
+        else:
+            logger.info("POLLER_MODE=disabled, background jobs run in the separate poller process")
 
-    ha_url = os.getenv("HOME_ASSISTANT_URL")
-    ha_token = os.getenv("HOME_ASSISTANT_TOKEN")
+        if mode != "embedded":
+            # Other processes write rows this one must relay to its SSE subscribers and result cache
+            global change_feed_task
+            change_feed_task = asyncio.create_task(change_feed.run())
 
-    if ha_url:
-        global home_assistant_service
-        home_assistant_service = HomeAssistantService(ha_url, ha_token)
+    phases = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in startup_timings.items())
+    logger.info(f"Startup finished (schema: {schema_path}): {phases}")
 
-        asyncio.create_task(home_assistant_service.start_polling(60))
-        logger.info("Home Assistant polling started")
-    else:
-        logger.warning("HOME_ASSISTANT_URL not set, Home Assistant integration disabled")
+@app.on_event("shutdown")
+async def shutdown_event():
+    if leader_task:
+        leader_task.cancel()
+    if change_feed_task:
+        change_feed_task.cancel()
+    await background_jobs.stop()
+    if poller_lock:
+        poller_lock.release()
 
 @app.get("/")
 async def root():
@@ -60,6 +123,56 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """Readiness for load balancers: 503 when the database probe misses its budget,
+    a background job has died or a polled source is stale"""
+    from .readiness import check_readiness
+    report = await check_readiness()
+    if report["status"] != "ready":
+        response.status_code = 503
+    return report
+
+@app.get("/health/home-assistant")
+async def home_assistant_health():
+    """Circuit breaker state of each Home Assistant endpoint called by this process, plus
+    the poller's circuits as of its last heartbeat when another process runs the polling"""
+    from .circuit_breaker import breaker_snapshots
+    report = {"circuits": breaker_snapshots()}
+    if not background_jobs.running:
+        from .readiness import read_poller_health
+        heartbeat, _ = await asyncio.to_thread(read_poller_health)
+        report["poller"] = {
+            "age_seconds": heartbeat["age_seconds"],
+            "circuits": heartbeat["circuits"]
+        } if heartbeat else None
+    return report
+
+@app.get("/health/cache")
+async def result_cache_health():
+    """Service result cache, single-flight and change feed counters of this process"""
+    from .cache import get_result_cache
+    from .singleflight import single_flight
+    return {
+        "result_cache": get_result_cache().snapshot(),
+        "single_flight": single_flight.snapshot(),
+        "change_feed": change_feed.snapshot()
+    }
+
+@app.get("/health/writes")
+async def write_health():
+    """Group commit counters for POST /statuses in this process"""
+    from .group_commit import get_group_commit_writer
+    return {"group_commit": get_group_commit_writer().snapshot()}
+
+@app.get("/health/startup")
+async def startup_report():
+    """Per-phase startup timings of this process, in seconds"""
+    return {
+        "phases": startup_timings,
+        "total": sum(startup_timings.values())
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Date, create_engine
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Date, Boolean, Index, UniqueConstraint, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, date
@@ -7,6 +7,9 @@ import json
 
 Base = declarative_base()
 
+# Home used for data from single-home configurations (HOME_ASSISTANT_URL)
+DEFAULT_HOME_ID = "default"
+
 class Status(Base):
     __tablename__ = "statuses"
 
@@ -29,8 +32,12 @@ class Status(Base):
 
 class SensorReading(Base):
     __tablename__ = "sensor_readings"
+    __table_args__ = (
+        Index("ix_sensor_readings_home_id_entity_id_timestamp", "home_id", "entity_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    home_id = Column(String, nullable=False, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
     entity_id = Column(String, nullable=False, index=True)
     state = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -38,15 +45,52 @@ class SensorReading(Base):
     def to_dict(self):
         return {
             "id": self.id,
+            "home_id": self.home_id,
             "entity_id": self.entity_id,
             "state": self.state,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
         }
 
+class SensorReadingRollup(Base):
+    """Downsampled sensor history: one row per entity, tier resolution and time bucket"""
+    __tablename__ = "sensor_reading_rollups"
+    __table_args__ = (
+        UniqueConstraint("home_id", "entity_id", "resolution", "bucket_start", name="uq_sensor_reading_rollups_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    home_id = Column(String, nullable=False, index=True, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
+    entity_id = Column(String, nullable=False, index=True)
+    resolution = Column(Integer, nullable=False)  # bucket width in seconds
+    bucket_start = Column(DateTime, nullable=False, index=True)
+
+    # Aggregates over numeric states only; None for entities like conditions or timestamps
+    sample_count = Column(Integer, nullable=False, default=0)
+    min_value = Column(Float, nullable=True)
+    max_value = Column(Float, nullable=True)
+    avg_value = Column(Float, nullable=True)
+
+    # Latest raw state in the bucket, kept for non-numeric entities
+    last_state = Column(String, nullable=True)
+
+    def to_dict(self):
+        return {
+            "home_id": self.home_id,
+            "entity_id": self.entity_id,
+            "resolution": self.resolution,
+            "bucket_start": self.bucket_start.isoformat() if self.bucket_start else None,
+            "sample_count": self.sample_count,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "avg_value": self.avg_value,
+            "last_state": self.last_state
+        }
+
 class WeatherForecast(Base):
     __tablename__ = "weather_forecasts"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    home_id = Column(String, nullable=False, index=True, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
     entity_id = Column(String, nullable=False, index=True, default="weather.pilisszentivan_forecast")
     forecast_data = Column(Text, nullable=False)  # JSON string of the forecast array
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -54,16 +98,46 @@ class WeatherForecast(Base):
     def to_dict(self):
         return {
             "id": self.id,
+            "home_id": self.home_id,
             "entity_id": self.entity_id,
             "forecast_data": json.loads(self.forecast_data) if self.forecast_data else [],
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
         }
 
+class WeatherForecastSnapshot(Base):
+    """Forecast history: a full keyframe per day, otherwise only the changes since the previous snapshot"""
+    __tablename__ = "weather_forecast_snapshots"
+    __table_args__ = (
+        Index("ix_weather_forecast_snapshots_home_entity_timestamp", "home_id", "entity_id", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    home_id = Column(String, nullable=False, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
+    entity_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)
+    is_keyframe = Column(Boolean, nullable=False, default=False)
+    # Keyframe: JSON forecast array; delta: {"set": [entries], "patch": [changed fields], "remove": [datetimes]}
+    data = Column(Text, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "home_id": self.home_id,
+            "entity_id": self.entity_id,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "is_keyframe": self.is_keyframe,
+            "data": json.loads(self.data) if self.data else None
+        }
+
 class DailyPowerUsage(Base):
     __tablename__ = "daily_power_usage"
+    __table_args__ = (
+        Index("uq_daily_power_usage_home_date", "home_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(Date, nullable=False, unique=True, index=True)
+    home_id = Column(String, nullable=False, index=True, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
+    date = Column(Date, nullable=False, index=True)
 
     # Import values
     import_start_value = Column(Float, nullable=False)
@@ -86,10 +160,68 @@ class DailyPowerUsage(Base):
     def to_dict(self):
         return {
             "id": self.id,
+            "home_id": self.home_id,
             "date": self.date.isoformat() if self.date else None,
             "daily_import": self.daily_import,
             "daily_export": self.daily_export,
             "inverter_daily_yield": self.inverter_daily_yield,
             "daily_usage": self.daily_usage,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
-        }
\ No newline at end of file
+        }
+class DailyEnergyFact(Base):
+    """Per-home, per-day heating and electricity figures, kept current as statuses and power usage are saved"""
+    __tablename__ = "daily_energy_facts"
+    __table_args__ = (
+        Index("uq_daily_energy_facts_home_date", "home_id", "date", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    home_id = Column(String, nullable=False, default=DEFAULT_HOME_ID, server_default=DEFAULT_HOME_ID)
+    date = Column(Date, nullable=False)
+
+    # Heating, from statuses starting on this date; sums are kept so new statuses can be added in place
+    status_count = Column(Integer, nullable=False, default=0)
+    minutes_heating = Column(Integer, nullable=False, default=0)
+    indoor_temp_sum = Column(Float, nullable=False, default=0.0)
+    outdoor_temp_sum = Column(Float, nullable=False, default=0.0)
+    avg_indoor_temp = Column(Float, nullable=True)
+    avg_outdoor_temp = Column(Float, nullable=True)
+    heating_degree_days = Column(Float, nullable=True)
+
+    # Electricity, copied from daily_power_usage
+    daily_import = Column(Float, nullable=True)
+    daily_export = Column(Float, nullable=True)
+    inverter_daily_yield = Column(Float, nullable=True)
+    daily_usage = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "home_id": self.home_id,
+            "date": self.date.isoformat() if self.date else None,
+            "status_count": self.status_count,
+            "minutes_heating": self.minutes_heating,
+            "avg_indoor_temp": round(self.avg_indoor_temp, 2) if self.avg_indoor_temp is not None else None,
+            "avg_outdoor_temp": round(self.avg_outdoor_temp, 2) if self.avg_outdoor_temp is not None else None,
+            "heating_degree_days": round(self.heating_degree_days, 2) if self.heating_degree_days is not None else None,
+            "daily_import": self.daily_import,
+            "daily_export": self.daily_export,
+            "inverter_daily_yield": self.inverter_daily_yield,
+            "daily_usage": self.daily_usage
+        }
+
+class PollerHealth(Base):
+    """Readiness state of the background jobs, written by the process running them and read by every API process"""
+    __tablename__ = "poller_health"
+
+    # A polled source such as "default:states", or "background_jobs" for the heartbeat of the jobs themselves
+    name = Column(String, primary_key=True)
+    max_age_seconds = Column(Float, nullable=True)
+    # Last success, or when the source was registered if it hasn't succeeded yet
+    since = Column(DateTime, nullable=False)
+    last_success_at = Column(DateTime, nullable=True)
+    # Comma-separated names of background jobs that have died (heartbeat row only)
+    error = Column(String, nullable=True)
+    # JSON {"circuits": [...]} with the Home Assistant circuit breakers of that process (heartbeat row only)
+    detail = Column(Text, nullable=True)
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .database import SessionLocal
+from .events import broadcaster
+from .models import SensorReading
+from .readiness import poll_freshness
+from .schemas import StatusCreate
+from .services import StatusService
+
+logger = logging.getLogger(__name__)
+
+
+class MqttIngestor:
+    """Subscribes to the thermostat's MQTT topics and writes what arrives in batches.
+
+    Topics, below MQTT_TOPIC_PREFIX (default "thermostat"):
+      <prefix>/status                        a status object or a list of them (POST /statuses body)
+      <prefix>/sensors/<home_id>/<entity_id> a raw state, or {"state": ..., "timestamp": ...}
+
+    Messages are collected until batch_size arrive or batch_seconds pass, then
+    written in one transaction. QoS 1/2 messages are acknowledged manually
+    only after that commit, in the order they arrived, and the session is
+    persistent (clean_session=False), so if a write fails or the process dies the broker
+    redelivers everything unacknowledged. Delivery is at least once.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 1883,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        client_id: str = "thermostat-backend",
+        topic_prefix: str = "thermostat",
+        qos: int = 1,
+        batch_size: int = 100,
+        batch_seconds: float = 1.0,
+        reconnect_seconds: float = 5.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.client_id = client_id
+        self.topic_prefix = topic_prefix.rstrip("/")
+        self.qos = qos
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.reconnect_seconds = reconnect_seconds
+
+        self._statuses: List[dict] = []
+        self._readings: List[Dict[str, Any]] = []
+        self._unacked: List[Tuple[int, int]] = []  # (mid, qos) in arrival order
+        self._received = 0
+
+        self.messages_received = 0
+        self.messages_rejected = 0
+        self.batches_written = 0
+
+    @property
+    def status_topic(self) -> str:
+        return f"{self.topic_prefix}/status"
+
+    @property
+    def sensor_topic(self) -> str:
+        return f"{self.topic_prefix}/sensors/+/+"
+
+    def parse(self, topic: str, payload: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+        """("status", [status dicts]) or ("sensor", [reading]); ValueError for anything unusable"""
+        text = payload.decode("utf-8") if isinstance(payload, (bytes, bytearray)) else str(payload)
+
+        if topic == self.status_topic:
+            data = json.loads(text)
+            items = data if isinstance(data, list) else [data]
+            try:
+                return "status", [StatusCreate.model_validate(item).model_dump() for item in items]
+            except ValidationError as e:
+                raise ValueError(str(e))
+
+        parts = topic[len(self.topic_prefix) + 1:].split("/") if topic.startswith(self.topic_prefix + "/") else []
+        if len(parts) == 3 and parts[0] == "sensors" and parts[1] and parts[2]:
+            state, timestamp = text, datetime.utcnow()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and "state" in data:
+                state = str(data["state"])
+                if data.get("timestamp"):
+                    timestamp = datetime.fromisoformat(data["timestamp"].replace("Z", "+00:00")).replace(tzinfo=None)
+            return "sensor", [{"home_id": parts[1], "entity_id": parts[2], "state": state, "timestamp": timestamp}]
+
+        raise ValueError(f"Unexpected topic {topic}")
+
+    def add(self, topic: str, payload: bytes, mid: int = 0, qos: int = 0) -> None:
+        """Queue one message; malformed ones are dropped but still acknowledged with the batch"""
+        self.messages_received += 1
+        self._received += 1
+        if qos > 0:
+            self._unacked.append((mid, qos))
+        try:
+            kind, rows = self.parse(topic, payload)
+        except (ValueError, TypeError, AttributeError) as e:
+            # Anything raised here would stop the consumer before the ack, and the
+            # broker would redeliver the same message after every reconnect
+            self.messages_rejected += 1
+            logger.warning(f"Dropping MQTT message on {topic}: {e}")
+            return
+        if kind == "status":
+            self._statuses.extend(rows)
+        else:
+            self._readings.extend(rows)
+
+    def write_batch(self) -> List[Tuple[int, int]]:
+        """Commit queued statuses and readings in one transaction; returns the (mid, qos) pairs now safe to ack.
+
+        Raises on database errors; nothing is acknowledged, so the broker redelivers
+        the batch once run() has reconnected.
+        """
+        if not self._received:
+            return []
+
+        db = SessionLocal()
+        try:
+            try:
+                if self._readings:
+                    db.bulk_insert_mappings(SensorReading, self._readings)
+                if self._statuses:
+                    # Commits the readings in the same transaction
+                    statuses = StatusService.insert_statuses(db, self._statuses)
+                else:
+                    statuses = []
+                    db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            # The batch is committed and gets acked whatever happens here, so it is never written twice
+            if statuses:
+                StatusService.after_insert_logged(db, statuses)
+        finally:
+            db.close()
+
+        by_home: Dict[str, List[Dict[str, Any]]] = {}
+        for reading in self._readings:
+            by_home.setdefault(reading["home_id"], []).append({
+                "entity_id": reading["entity_id"],
+                "state": reading["state"],
+                "timestamp": reading["timestamp"].isoformat()
+            })
+        for home_id, readings in by_home.items():
+            broadcaster.publish("sensor_readings", readings, home_id)
+
+        logger.debug(f"MQTT batch: {len(self._statuses)} statuses, {len(self._readings)} sensor readings")
+        acks = self._unacked
+        self._statuses, self._readings, self._unacked, self._received = [], [], [], 0
+        self.batches_written += 1
+        poll_freshness.record_success("mqtt")
+        return acks
+
+    def _reset_batch(self) -> None:
+        # Unacknowledged messages come back from the broker after reconnecting
+        self._statuses, self._readings, self._unacked, self._received = [], [], [], 0
+
+    def _client(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        # Imported here so processes without MQTT configured never load it
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=self.client_id, clean_session=False)
+        # Acks are sent by us after the commit instead of by paho on receipt
+        client.manual_ack_set(True)
+        if self.username:
+            client.username_pw_set(self.username, self.password)
+
+        # Callbacks run on paho's network thread; everything is handed to the event loop
+        def put(item):
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def on_connect(client, userdata, flags, reason_code, properties):
+            if reason_code.is_failure:
+                put(ConnectionError(f"MQTT connection refused: {reason_code}"))
+            else:
+                # Subscribing on every connect also covers a session the broker forgot
+                client.subscribe([(self.status_topic, self.qos), (self.sensor_topic, self.qos)])
+                logger.info(f"MQTT ingest subscribed to {self.topic_prefix}/# on {self.host}:{self.port}")
+
+        def on_disconnect(client, userdata, flags, reason_code, properties):
+            put(ConnectionError(f"MQTT disconnected: {reason_code}"))
+
+        client.on_connect = on_connect
+        client.on_disconnect = on_disconnect
+        client.on_message = lambda client, userdata, message: put(message)
+        return client
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        client = self._client(loop, queue)
+        await loop.run_in_executor(None, client.connect, self.host, self.port)
+        client.loop_start()
+        try:
+            deadline = None
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    item = None
+                if isinstance(item, Exception):
+                    raise item
+                if item is not None:
+                    self.add(item.topic, item.payload, item.mid, item.qos)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.batch_seconds
+
+                if self._received and (self._received >= self.batch_size or time.monotonic() >= deadline):
+                    for mid, qos in self.write_batch():
+                        client.ack(mid, qos)
+                    deadline = None
+        finally:
+            client.on_disconnect = None
+            client.disconnect()
+            client.loop_stop()
+
+    async def run(self) -> None:
+        """Consume until cancelled, reconnecting after broker or database errors"""
+        # Reported by /health/ready without a budget: a quiet topic is not a failure
+        poll_freshness.register("mqtt", None)
+        while True:
+            try:
+                await self._consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"MQTT ingest error, reconnecting in {self.reconnect_seconds:.0f}s: {e}")
+                self._reset_batch()
+                await asyncio.sleep(self.reconnect_seconds)
+
+
+def ingestor_from_env() -> Optional[MqttIngestor]:
+    """Ingestor for MQTT_HOST, or None when MQTT ingest isn't configured"""
+    host = os.getenv("MQTT_HOST")
+    if not host:
+        return None
+    return MqttIngestor(
+        host,
+        port=int(os.getenv("MQTT_PORT", "1883")),
+        username=os.getenv("MQTT_USERNAME") or None,
+        password=os.getenv("MQTT_PASSWORD") or None,
+        client_id=os.getenv("MQTT_CLIENT_ID", "thermostat-backend"),
+        topic_prefix=os.getenv("MQTT_TOPIC_PREFIX", "thermostat"),
+        qos=int(os.getenv("MQTT_QOS", "1")),
+        batch_size=int(os.getenv("MQTT_BATCH_SIZE", "100")),
+        batch_seconds=float(os.getenv("MQTT_BATCH_SECONDS", "1.0"))
+    )
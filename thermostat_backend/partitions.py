@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, List, Optional, Tuple
+from urllib.parse import quote
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, StaticPool
+
+from .database import worker_session
+from .models import Status
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PATTERN = re.compile(r"statuses-(\d{4})\.db$")
+
+# SQLite allows 10 attached databases by default
+MAX_ATTACHED = 8
+
+# Page cache per attached partition, in KiB
+PARTITION_CACHE_KIB = 8192
+
+
+def _create_statuses(conn: Connection) -> None:
+    # The statuses schema as of the first partition version; later changes get their own step
+    conn.execute(text("""
+        CREATE TABLE statuses (
+            id INTEGER NOT NULL PRIMARY KEY,
+            start_time VARCHAR NOT NULL,
+            end_time VARCHAR NOT NULL,
+            minutes_heating INTEGER NOT NULL,
+            average_indoor_temp FLOAT NOT NULL,
+            average_outdoor_temp FLOAT NOT NULL
+        )
+    """))
+    conn.execute(text("CREATE INDEX ix_statuses_start_time ON statuses (start_time)"))
+
+
+# Schema steps for partition files, applied in order; PRAGMA user_version counts those applied.
+# An Alembic migration that changes the statuses table appends the same change here, and
+# `alembic upgrade` then brings every partition up to date.
+PARTITION_MIGRATIONS: List[Callable[[Connection], None]] = [
+    _create_statuses,
+]
+
+
+def migrate_partition_file(file: str) -> int:
+    """Apply pending schema steps to one partition file in place; returns how many ran"""
+    engine = create_engine(f"sqlite:///{file}", poolclass=NullPool)
+    try:
+        with engine.begin() as conn:
+            version = conn.execute(text("PRAGMA user_version")).scalar() or 0
+            for step in PARTITION_MIGRATIONS[version:]:
+                step(conn)
+            if version < len(PARTITION_MIGRATIONS):
+                conn.execute(text(f"PRAGMA user_version = {len(PARTITION_MIGRATIONS)}"))
+        return max(0, len(PARTITION_MIGRATIONS) - version)
+    finally:
+        engine.dispose()
+
+
+class StatusPartitions:
+    """Closed years of statuses stored as one SQLite file per year.
+
+    Files live at <path>/statuses-YYYY.db and hold only the statuses table,
+    with the same ids as before they were moved. Readers share one connection
+    that attaches a year read-only and immutable the first time a query
+    overlaps it, so SQLite skips locking and keeps its page cache between
+    queries. Files are never changed in place: late arrivals and schema
+    upgrades write a copy and swap it in, and the reader reattaches when it
+    sees the swap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._engine = None
+        # year -> (schema name, file identity when attached), least recently used first
+        self._attached: "OrderedDict[int, Tuple[str, Tuple[int, int]]]" = OrderedDict()
+
+    def _partition_file(self, year: int) -> str:
+        return os.path.join(self.path, f"statuses-{year:04d}.db")
+
+    def partitions(self) -> List[Tuple[int, str]]:
+        """(year, file) for every partition, oldest first"""
+        if not os.path.isdir(self.path):
+            return []
+        result = []
+        for name in os.listdir(self.path):
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                result.append((int(match.group(1)), os.path.join(self.path, name)))
+        return sorted(result)
+
+    def years(self, first: Optional[str] = None, last: Optional[str] = None) -> List[int]:
+        """Partition years overlapping the status times [first, last]"""
+        first_year = first[:4] if first else "0000"
+        last_year = last[:4] if last else "9999"
+        return [year for year, _ in self.partitions() if first_year <= f"{year:04d}" <= last_year]
+
+    def _attach(self, conn: Connection, year: int) -> str:
+        file = self._partition_file(year)
+        stat = os.stat(file)
+        identity = (stat.st_ino, stat.st_mtime_ns)
+
+        attached = self._attached.get(year)
+        if attached is not None:
+            name, attached_identity = attached
+            if attached_identity == identity:
+                self._attached.move_to_end(year)
+                return name
+            # Swapped for a newer copy since it was attached
+            conn.execute(text(f"DETACH DATABASE {name}"))
+            del self._attached[year]
+
+        while len(self._attached) >= MAX_ATTACHED:
+            _, (oldest, _) = self._attached.popitem(last=False)
+            conn.execute(text(f"DETACH DATABASE {oldest}"))
+
+        name = f"partition_{year:04d}"
+        uri = f"file:{quote(os.path.abspath(file))}?mode=ro&immutable=1"
+        conn.execute(text(f"ATTACH DATABASE :uri AS {name}"), {"uri": uri})
+        conn.execute(text(f"PRAGMA {name}.cache_size = -{PARTITION_CACHE_KIB}"))
+        self._attached[year] = (name, identity)
+        return name
+
+    def each(self, fn: Callable[[Session], Any], first: Optional[str] = None, last: Optional[str] = None) -> List[Any]:
+        """fn(session) for every partition overlapping the status times [first, last], oldest first.
+
+        Inside fn, queries on Status read that partition. Loaded objects are
+        detached when fn returns; only their loaded columns are available.
+        """
+        years = self.years(first, last)
+        if not years:
+            return []
+
+        results = []
+        with self._lock:
+            if self._engine is None:
+                self._engine = create_engine(
+                    "sqlite://",
+                    poolclass=StaticPool,
+                    connect_args={"check_same_thread": False, "uri": True}
+                )
+            with self._engine.connect() as conn:
+                for year in years:
+                    name = self._attach(conn, year)
+                    session = Session(bind=conn.execution_options(schema_translate_map={None: name}))
+                    try:
+                        results.append(fn(session))
+                    finally:
+                        session.close()
+        return results
+
+    def count(self) -> int:
+        return sum(self.each(lambda session: session.query(func.count(Status.id)).scalar() or 0))
+
+    def partition_year(self, db: Session, year: int, batch_size: int = 1000) -> int:
+        """Move one year of statuses from SQLite into its partition file; returns rows moved"""
+        # SQLite hands the highest id out again once its row is deleted, so the newest
+        # row stays until a newer one exists; ids must stay unique across partitions
+        max_id = db.query(func.max(Status.id)).scalar() or 0
+        rows = db.query(
+            Status.id,
+            Status.start_time,
+            Status.end_time,
+            Status.minutes_heating,
+            Status.average_indoor_temp,
+            Status.average_outdoor_temp
+        ).filter(
+            Status.start_time >= f"{year:04d}-01-01 00:00:00.000000",
+            Status.start_time < f"{year + 1:04d}-01-01 00:00:00.000000",
+            Status.id < max_id
+        ).order_by(Status.start_time).all()
+        if not rows:
+            return 0
+
+        file = self._partition_file(year)
+        tmp_file = file + ".tmp"
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(file):
+            # Late arrivals for a partitioned year: add them to a copy, ids already there are kept
+            shutil.copyfile(file, tmp_file)
+        elif os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        migrate_partition_file(tmp_file)
+
+        engine = create_engine(f"sqlite:///{tmp_file}", poolclass=NullPool)
+        try:
+            with engine.begin() as conn:
+                mappings = [row._asdict() for row in rows]
+                for offset in range(0, len(mappings), batch_size):
+                    conn.execute(
+                        insert(Status.__table__).on_conflict_do_nothing(index_elements=["id"]),
+                        mappings[offset:offset + batch_size]
+                    )
+        finally:
+            engine.dispose()
+        os.replace(tmp_file, file)
+
+        # The partition file is complete before any row is deleted, so a crash here
+        # leaves duplicates that the next run removes, never a gap
+        ids = [row.id for row in rows]
+        for offset in range(0, len(ids), batch_size):
+            db.query(Status).filter(Status.id.in_(ids[offset:offset + batch_size])).delete(synchronize_session=False)
+            db.commit()
+
+        logger.info(f"Moved {len(ids)} statuses for {year:04d} to {file}")
+        return len(ids)
+
+    def partition_closed_years(self, db: Session, keep_years: int = 1) -> int:
+        """Partition every year older than the last keep_years years (including the current one)"""
+        cutoff = f"{date.today().year - keep_years + 1:04d}-01-01 00:00:00.000000"
+        year_column = func.substr(Status.start_time, 1, 4)
+        years = [
+            row[0] for row in db.query(year_column).filter(Status.start_time < cutoff).group_by(year_column).all()
+        ]
+
+        moved = 0
+        for year in years:
+            try:
+                moved += self.partition_year(db, int(year))
+            except ValueError:
+                logger.warning(f"Skipping statuses with unparseable start_time year {year!r}")
+        return moved
+
+    def migrate(self) -> int:
+        """Bring every partition file to the current partition schema; returns files changed"""
+        changed = 0
+        for year, file in self.partitions():
+            tmp_file = file + ".tmp"
+            shutil.copyfile(file, tmp_file)
+            if migrate_partition_file(tmp_file):
+                os.replace(tmp_file, file)
+                changed += 1
+                logger.info(f"Migrated status partition {year:04d}")
+            else:
+                os.remove(tmp_file)
+        return changed
+
+    def _partition_closed_years_in_worker(self, keep_years: int) -> int:
+        with worker_session() as db:
+            try:
+                return self.partition_closed_years(db, keep_years)
+            except Exception:
+                db.rollback()
+                raise
+
+    async def run_periodically(self, keep_years: int, interval_seconds: int = 86400) -> None:
+        """Partition closed years once per interval"""
+        while True:
+            try:
+                # Copying a year into its file and the batched deletes take a while, so they run
+                # in a worker thread on its own connection rather than on the event loop
+                moved = await asyncio.to_thread(self._partition_closed_years_in_worker, keep_years)
+                if moved:
+                    logger.info(f"Status partitioning moved {moved} rows to per-year files")
+            except Exception as e:
+                logger.error(f"Error partitioning statuses: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+_partitions: Optional[StatusPartitions] = None
+
+
+def get_partitions() -> Optional[StatusPartitions]:
+    """The per-year status partitions, or None when partitioning is disabled"""
+    return _partitions
+
+
+def init_partitions() -> Optional[StatusPartitions]:
+    """Enable the partitions configured by STATUS_PARTITION_PATH"""
+    global _partitions
+
+    path = os.getenv("STATUS_PARTITION_PATH")
+    if not path:
+        return None
+
+    _partitions = StatusPartitions(path)
+    return _partitions
+
+
+def partition_keep_years() -> int:
+    return max(1, int(os.getenv("STATUS_PARTITION_KEEP_YEARS", "1")))
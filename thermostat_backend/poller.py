@@ -0,0 +1,167 @@
+import asyncio
+import fcntl
+import logging
+import os
+import signal
+from typing import List, Optional, TYPE_CHECKING
+
+from .archive import get_archive, archive_keep_months
+from .homes import load_homes
+from .mqtt_ingest import ingestor_from_env
+from .partitions import get_partitions, partition_keep_years
+from .readiness import poll_freshness
+from .sensor_history import compactor_from_env
+
+if TYPE_CHECKING:
+    from .home_assistant import HomeAssistantSupervisor
+
+logger = logging.getLogger(__name__)
+
+# Where the API process runs the poller: "embedded" (every API process polls, fine
+# for a single worker), "leader" (API workers elect one poller through a file lock)
+# or "disabled" (polling runs in the separate run_poller.py process)
+POLLER_MODES = ("embedded", "leader", "disabled")
+
+
+def poller_mode() -> str:
+    mode = os.getenv("POLLER_MODE", "embedded").lower()
+    if mode not in POLLER_MODES:
+        logger.warning(f"Unknown POLLER_MODE {mode!r}, using embedded")
+        return "embedded"
+    return mode
+
+
+def poller_lock_path() -> str:
+    return os.getenv("POLLER_LOCK_FILE", "/tmp/thermostat-poller.lock")
+
+
+class LeaderLock:
+    """Exclusive, non-blocking flock on a file shared by all candidate processes.
+
+    The kernel releases the lock when the holder exits, however it exits, so a
+    crashed leader never blocks a standby from taking over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class BackgroundJobs:
+    """Jobs that write shared data and must run in exactly one process:
+    Home Assistant polling, MQTT ingest, sensor history compaction, status archival and partitioning."""
+
+    def __init__(self):
+        self.supervisor: Optional["HomeAssistantSupervisor"] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def failed_jobs(self) -> List[str]:
+        """Names of jobs that have stopped; they all run until cancelled, so any that ended has died"""
+        return [task.get_name() for task in self._tasks if task.done() and not task.cancelled()]
+
+    def start(self) -> None:
+        # Lets API processes that don't run the jobs report their health in /health/ready
+        self._tasks.append(asyncio.create_task(poll_freshness.run_heartbeat(self.failed_jobs), name="readiness_heartbeat"))
+
+        archive = get_archive()
+        if archive:
+            self._tasks.append(asyncio.create_task(archive.run_periodically(archive_keep_months()), name="archive"))
+            logger.info(f"Status archival enabled at {archive.path}")
+
+        partitions = get_partitions()
+        if partitions:
+            self._tasks.append(asyncio.create_task(partitions.run_periodically(partition_keep_years()), name="partitions"))
+            logger.info(f"Status partitioning enabled at {partitions.path}")
+
+        mqtt_ingestor = ingestor_from_env()
+        if mqtt_ingestor:
+            self._tasks.append(asyncio.create_task(mqtt_ingestor.run(), name="mqtt_ingest"))
+            logger.info(f"MQTT ingest enabled from {mqtt_ingestor.host}:{mqtt_ingestor.port}")
+
+        homes = load_homes()
+        if not homes:
+            logger.warning("No Home Assistant homes configured, Home Assistant integration disabled")
+            return
+
+        # Imported here so API workers that never poll don't load httpx
+        from .home_assistant import HomeAssistantSupervisor
+        self.supervisor = HomeAssistantSupervisor(
+            list(homes.values()),
+            interval_seconds=int(os.getenv("HOME_ASSISTANT_POLL_INTERVAL", "60")),
+            max_concurrency=int(os.getenv("HOME_ASSISTANT_MAX_CONCURRENCY", "4"))
+        )
+        self._tasks.append(asyncio.create_task(self.supervisor.start_polling(), name="home_assistant_polling"))
+        logger.info(f"Home Assistant polling started for homes: {', '.join(homes)}")
+
+        self._tasks.append(asyncio.create_task(compactor_from_env().run_periodically(), name="sensor_compaction"))
+        logger.info("Sensor history compaction started")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.supervisor:
+            # Write out sensor readings still held in the write-behind buffers
+            self.supervisor.flush_sensor_readings()
+
+    async def run_as_leader(self, lock: LeaderLock, retry_seconds: int = 30) -> None:
+        """Start the jobs once this process holds the leader lock, retrying as a standby until then"""
+        announced = False
+        while not lock.try_acquire():
+            if not announced:
+                logger.info(f"Another process holds {lock.path}, waiting as standby poller")
+                announced = True
+            await asyncio.sleep(retry_seconds)
+
+        logger.info(f"Acquired poller lock {lock.path} (pid {os.getpid()})")
+        self.start()
+
+
+background_jobs = BackgroundJobs()
+
+
+async def run_standalone() -> None:
+    """Run the background jobs in a dedicated process until it is cancelled or receives SIGTERM"""
+    lock = LeaderLock(poller_lock_path())
+    current = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, current.cancel)
+    try:
+        await background_jobs.run_as_leader(lock)
+        await asyncio.Event().wait()
+    except asyncio.CancelledError:
+        logger.info("Poller stopping")
+    finally:
+        await background_jobs.stop()
+        lock.release()
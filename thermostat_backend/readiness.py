@@ -0,0 +1,216 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from .database import DATABASE_URL, SessionLocal, _is_memory_database, worker_session
+from .models import PollerHealth
+
+logger = logging.getLogger(__name__)
+
+# How often the process running the background jobs writes their state for other processes
+HEARTBEAT_SECONDS = 10
+
+# Name of the heartbeat row in poller_health; every other row is a polled source
+HEARTBEAT = "background_jobs"
+
+_process_started = time.monotonic()
+
+
+def db_budget_seconds() -> float:
+    return float(os.getenv("READY_DB_BUDGET_MS", "250")) / 1000
+
+
+def max_poll_age_seconds(interval_seconds: int) -> float:
+    """Age after which a polled source counts as stale; by default three missed polls"""
+    return float(os.getenv("READY_MAX_POLL_AGE_SECONDS", str(3 * interval_seconds)))
+
+
+def _source_report(name: str, max_age: Optional[float], since: datetime, last_success_at: Optional[datetime],
+                   now: datetime) -> Dict[str, Any]:
+    age = (now - since).total_seconds()
+    return {
+        "source": name,
+        "last_success_at": last_success_at.isoformat() if last_success_at else None,
+        "age_seconds": round(age, 1),
+        "max_age_seconds": max_age,
+        "stale": max_age is not None and age > max_age
+    }
+
+
+class PollFreshness:
+    """When each data source was last polled successfully by this process.
+
+    A source that has never succeeded is aged from when it was registered, so
+    a poller that dies before its first poll still goes stale. Sources with a
+    max_age are stale once older than that; the rest are only reported. The
+    process running the background jobs writes this to poller_health every
+    HEARTBEAT_SECONDS, together with its Home Assistant circuit breakers, so
+    API processes that don't poll can report both.
+    """
+
+    def __init__(self):
+        # name -> [max_age, last success or registration, last success]
+        self._sources: Dict[str, list] = {}
+
+    def register(self, source: str, max_age: Optional[float]) -> None:
+        self._sources[source] = [max_age, datetime.utcnow(), None]
+
+    def record_success(self, source: str) -> None:
+        now = datetime.utcnow()
+        entry = self._sources.setdefault(source, [None, now, None])
+        entry[1] = entry[2] = now
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return [
+            _source_report(name, max_age, since, last_success_at, now)
+            for name, (max_age, since, last_success_at) in sorted(self._sources.items())
+        ]
+
+    def persist(self, db: Session, failed_jobs: List[str]) -> None:
+        """Replace poller_health with the current sources and a fresh heartbeat carrying the circuits"""
+        # Imported here: circuit_breaker pulls in httpx, which processes that never poll shouldn't load
+        from .circuit_breaker import breaker_snapshots
+
+        now = datetime.utcnow()
+        db.query(PollerHealth).delete(synchronize_session=False)
+        db.add(PollerHealth(
+            name=HEARTBEAT,
+            max_age_seconds=3 * HEARTBEAT_SECONDS,
+            since=now,
+            error=",".join(failed_jobs) or None,
+            detail=json.dumps({"circuits": breaker_snapshots()})
+        ))
+        for name, (max_age, since, last_success_at) in self._sources.items():
+            db.add(PollerHealth(name=name, max_age_seconds=max_age, since=since, last_success_at=last_success_at))
+        db.commit()
+
+    async def run_heartbeat(self, failed_jobs: Callable[[], List[str]]) -> None:
+        """Persist the state once per HEARTBEAT_SECONDS until cancelled"""
+        while True:
+            db = SessionLocal()
+            try:
+                self.persist(db, failed_jobs())
+            except Exception as e:
+                logger.error(f"Error writing poller health: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+
+poll_freshness = PollFreshness()
+
+
+def read_poller_health() -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """The heartbeat and sources written by whichever process runs the background jobs"""
+    now = datetime.utcnow()
+    with worker_session() as db:
+        rows = db.query(PollerHealth).order_by(PollerHealth.name).all()
+
+    heartbeat = None
+    sources = []
+    for row in rows:
+        if row.name == HEARTBEAT:
+            heartbeat = {
+                "age_seconds": round((now - row.since).total_seconds(), 1),
+                "max_age_seconds": row.max_age_seconds,
+                "failed": row.error.split(",") if row.error else [],
+                "circuits": json.loads(row.detail)["circuits"] if row.detail else []
+            }
+        else:
+            sources.append(_source_report(row.name, row.max_age_seconds, row.since, row.last_success_at, now))
+    return heartbeat, sources
+
+
+_probe_engine = None
+
+
+def _probe_database() -> None:
+    global _probe_engine
+
+    if _is_memory_database(DATABASE_URL):
+        # Only the shared connection sees an in-memory database, and it can't take a write lock of its own
+        with worker_session() as db:
+            db.execute(text("SELECT max(id) FROM statuses"))
+        return
+
+    if _probe_engine is None:
+        # Its own connection, waiting no longer than the budget for a lock held elsewhere
+        _probe_engine = create_engine(
+            DATABASE_URL,
+            connect_args={"check_same_thread": False, "timeout": db_budget_seconds()},
+            isolation_level="AUTOCOMMIT",
+            pool_size=1
+        )
+    with _probe_engine.connect() as conn:
+        # Taking the write lock shows writes can get through, not just reads
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            conn.exec_driver_sql("SELECT max(id) FROM statuses")
+        finally:
+            conn.exec_driver_sql("ROLLBACK")
+
+
+async def check_database() -> Dict[str, Any]:
+    """Time a probe query against the latency budget, off the event loop"""
+    budget = db_budget_seconds()
+    started = time.perf_counter()
+    error = None
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_probe_database), timeout=budget * 4)
+    except asyncio.TimeoutError:
+        error = "probe timed out"
+    except Exception as e:
+        # The driver's message ("database is locked") rather than SQLAlchemy's wrapped one
+        error = f"{type(e).__name__}: {getattr(e, 'orig', None) or e}"
+    latency = time.perf_counter() - started
+    return {
+        "ok": error is None and latency <= budget,
+        "latency_ms": round(latency * 1000, 1),
+        "budget_ms": budget * 1000,
+        "error": error
+    }
+
+
+async def check_background_jobs() -> Tuple[bool, Dict[str, Any], List[Dict[str, Any]]]:
+    """(ok, job report, sources), from this process if it runs the jobs, otherwise from poller_health"""
+    from .poller import background_jobs
+
+    if background_jobs.running:
+        failed = background_jobs.failed_jobs()
+        return not failed, {"process": "this", "failed": failed}, poll_freshness.snapshot()
+
+    try:
+        heartbeat, sources = await asyncio.to_thread(read_poller_health)
+    except Exception as e:
+        return False, {"process": "other", "error": f"{type(e).__name__}: {e}"}, []
+
+    if heartbeat is None:
+        # The poller may still be starting; after that a missing heartbeat means none is running
+        ok = time.monotonic() - _process_started <= 3 * HEARTBEAT_SECONDS
+        return ok, {"process": "other", "heartbeat": None}, []
+
+    ok = heartbeat["age_seconds"] <= heartbeat["max_age_seconds"] and not heartbeat["failed"]
+    heartbeat = {key: value for key, value in heartbeat.items() if key != "circuits"}
+    return ok, {"process": "other", "heartbeat": heartbeat, "failed": heartbeat["failed"]}, sources
+
+
+async def check_readiness() -> Dict[str, Any]:
+    """Database probe, background job liveness and poll freshness; ready only if all pass"""
+    database = await check_database()
+    jobs_ok, jobs, sources = await check_background_jobs()
+    ready = database["ok"] and jobs_ok and not any(source["stale"] for source in sources)
+    return {
+        "status": "ready" if ready else "not_ready",
+        "database": database,
+        "background_jobs": jobs,
+        "sources": sources
+    }
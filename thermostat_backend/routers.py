@@ -1,14 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from .database import get_db
+from typing import List, Optional, TYPE_CHECKING
+from datetime import datetime, timedelta
+from dateutil import parser
+from .database import get_db, SessionLocal, worker_session
 from .schemas import StatusResponse, StatusCreate, StatsSummary, HourlyData, DailyData, MonthlyData
 from .services import StatusService
-from .models import Status
-from .home_assistant import HomeAssistantService
+from .events import broadcaster, format_sse, RESYNC
+from .sensor_history import SensorHistoryService
+from .homes import load_homes, get_home, DEFAULT_FORECAST_ENTITY, DEFAULT_TEMPERATURE_ENTITY
+from .forecast_history import ForecastAccuracyService
+from .heating_model import heating_model
+from .daily_facts import DailyFactsService
+from .models import DEFAULT_HOME_ID
+from .formats import JSON, negotiate, negotiated_rows, columnar_response, objects_to_columns
+from .archive import STATUS_COLUMNS
+from .singleflight import single_flight
+from .group_commit import get_group_commit_writer
+
+if TYPE_CHECKING:
+    from .home_assistant import HomeAssistantService
 
 router = APIRouter()
 
+SSE_KEEPALIVE_SECONDS = 15
+
+# Upper bound on series in one /sensors/history request
+MAX_HISTORY_ENTITIES = 20
+
+# Reference to the running backfill so only one runs at a time
+_backfill_task: Optional[asyncio.Task] = None
+
 @router.get("/statuses/day/{date}", response_model=List[StatusResponse])
 async def get_statuses_by_day(
     date: str,
@@ -21,13 +47,17 @@ async def get_statuses_by_day(
 
 @router.get("/statuses/period", response_model=List[StatusResponse])
 async def get_statuses_by_period(
+    request: Request,
     start_date: str = Query(..., description="Start date (YYYY-MM-DD HH:MM:SS.ffffff or YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD HH:MM:SS.ffffff or YYYY-MM-DD)"),
     db: Session = Depends(get_db)
 ):
+    media_type = negotiate(request)
     statuses = StatusService.get_statuses_by_period(db, start_date, end_date)
     if not statuses:
         raise HTTPException(status_code=404, detail="No data found for the specified period")
+    if media_type != JSON:
+        return columnar_response(media_type, objects_to_columns(statuses, STATUS_COLUMNS))
     return [StatusResponse.model_validate(status.to_dict()) for status in statuses]
 
 @router.get("/statuses/all", response_model=List[StatusResponse])
@@ -36,114 +66,325 @@ async def get_all_statuses(
     offset: Optional[int] = Query(0, description="Number of records to skip"),
     db: Session = Depends(get_db)
 ):
-    statuses = db.query(Status).offset(offset).limit(limit).all()
+    statuses = StatusService.get_all_statuses(db, limit, offset)
     return [StatusResponse.model_validate(status.to_dict()) for status in statuses]
 
 @router.get("/statuses/stats", response_model=StatsSummary)
 async def get_statistics(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date for statistics"),
-    end_date: Optional[str] = Query(None, description="End date for statistics"),
-    db: Session = Depends(get_db)
+    end_date: Optional[str] = Query(None, description="End date for statistics")
 ):
-    return StatusService.get_statistics(db, start_date, end_date)
+    media_type = negotiate(request)
+    # Dashboards opening together ask for the same range; run the scan once for all of them
+    stats = await single_flight.query(("stats", start_date, end_date), StatusService.get_statistics, start_date, end_date)
+    return negotiated_rows(media_type, [stats]) or stats
 
 @router.post("/statuses", response_model=StatusResponse)
-async def create_status(
-    status: StatusCreate,
-    db: Session = Depends(get_db)
-):
+async def create_status(status: StatusCreate):
     try:
-        created_status = StatusService.create_status(db, status.model_dump())
+        # Committed together with statuses posted concurrently by other requests
+        created_status = await get_group_commit_writer().submit(status.model_dump())
         return StatusResponse.model_validate(created_status.to_dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating status: {str(e)}")
 
 @router.get("/statuses/heating-efficiency", response_model=List[dict])
 async def get_heating_efficiency(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date"),
     end_date: Optional[str] = Query(None, description="End date"),
     db: Session = Depends(get_db)
 ):
-    if start_date and end_date:
-        statuses = StatusService.get_statuses_by_period(db, start_date, end_date)
-    else:
-        statuses = db.query(Status).all()
-
-    efficiency_data = []
-    for status in statuses:
-        temp_diff = status.average_indoor_temp - status.average_outdoor_temp
-        efficiency = status.minutes_heating / temp_diff if temp_diff > 0 else 0
-
-        efficiency_data.append({
-            "id": status.id,
-            "start_time": status.start_time,
-            "temperature_difference": round(temp_diff, 2),
-            "heating_minutes": status.minutes_heating,
-            "heating_efficiency": round(efficiency, 2)
-        })
+    media_type = negotiate(request)
+    efficiency = StatusService.get_heating_efficiency(db, start_date, end_date)
+    return negotiated_rows(media_type, efficiency) or efficiency
 
-    return efficiency_data
+@router.get("/statuses/heating-prediction")
+async def get_heating_prediction(
+    indoor_temp: Optional[float] = Query(None, description="Indoor temperature to hold (defaults to the historical average)"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home whose stored forecast is used"),
+    db: Session = Depends(get_db)
+):
+    """Predicted heating minutes for each hour of the latest weather forecast"""
+    prediction = heating_model.predict_forecast(db, indoor_temp, home_id)
+    if prediction["model"]["slope"] is None:
+        raise HTTPException(status_code=404, detail="Not enough statuses to fit the heating model")
+    if prediction["forecast_timestamp"] is None:
+        raise HTTPException(status_code=404, detail=f"No weather forecast stored for home {home_id}")
+    return prediction
 
 @router.get("/statuses/hourly/{date}", response_model=List[HourlyData])
 async def get_hourly_data_by_date(
+    request: Request,
     date: str,
     db: Session = Depends(get_db)
 ):
+    media_type = negotiate(request)
     hourly_data = StatusService.get_hourly_data_by_date(db, date)
     if not hourly_data:
         raise HTTPException(status_code=404, detail="No data found for the specified date")
-    return hourly_data
+    return negotiated_rows(media_type, hourly_data) or hourly_data
 
 @router.get("/statuses/daily/{year}/{month}", response_model=List[DailyData])
 async def get_daily_data_by_month(
+    request: Request,
     year: int,
     month: int,
     db: Session = Depends(get_db)
 ):
+    media_type = negotiate(request)
     if month < 1 or month > 12:
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
 
     daily_data = StatusService.get_daily_data_by_month(db, year, month)
     if not daily_data:
         raise HTTPException(status_code=404, detail="No data found for the specified month")
-    return daily_data
+    return negotiated_rows(media_type, daily_data) or daily_data
 
 @router.get("/statuses/monthly/{year}", response_model=List[MonthlyData])
 async def get_monthly_data_by_year(
-    year: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    year: int
 ):
-    monthly_data = StatusService.get_monthly_data_by_year(db, year)
+    media_type = negotiate(request)
+    monthly_data = await single_flight.query(("monthly", year), StatusService.get_monthly_data_by_year, year)
     if not monthly_data:
         raise HTTPException(status_code=404, detail="No data found for the specified year")
-    return monthly_data
+    return negotiated_rows(media_type, monthly_data) or monthly_data
 
-@router.get("/dashboard")
-async def get_dashboard_data(db: Session = Depends(get_db)):
-    """Get the latest sensor readings and weather forecast for the dashboard"""
+@router.get("/sensors/history")
+async def get_sensors_history(
+    entity_id: List[str] = Query(..., description="Entity to chart; repeat for several entities"),
+    start_date: Optional[str] = Query(None, description="Start of the range (defaults to 24 hours ago)"),
+    end_date: Optional[str] = Query(None, description="End of the range (defaults to now)"),
+    points: int = Query(1000, ge=3, le=10000, description="Maximum points per entity"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home the sensors belong to")
+):
+    """LTTB-downsampled numeric history of several entities, streamed one series at a time"""
+    if len(entity_id) > MAX_HISTORY_ENTITIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_HISTORY_ENTITIES} entities per request")
+    try:
+        end = parser.parse(end_date) if end_date else datetime.utcnow()
+        start = parser.parse(start_date) if start_date else end - timedelta(days=1)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    def load_series(entity: str) -> dict:
+        with worker_session() as db:
+            return SensorHistoryService.get_downsampled(db, entity, start, end, points, home_id)
+
+    async def body():
+        yield f'{{"home_id": {json.dumps(home_id)}, "start": "{start.isoformat()}", "end": "{end.isoformat()}", "series": ['
+        for index, entity in enumerate(dict.fromkeys(entity_id)):
+            # Each series is read and downsampled off the event loop, then sent before the next one starts
+            series = await run_in_threadpool(load_series, entity)
+            yield ("," if index else "") + json.dumps(series)
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+@router.get("/sensors/{entity_id}/history")
+async def get_sensor_history(
+    entity_id: str,
+    start_date: Optional[str] = Query(None, description="Start of the range (defaults to 24 hours ago)"),
+    end_date: Optional[str] = Query(None, description="End of the range (defaults to now)"),
+    resolution: Optional[int] = Query(None, ge=0, description="Desired resolution in seconds; the coarsest stored tier that meets it is used"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home the sensor belongs to"),
+    db: Session = Depends(get_db)
+):
+    try:
+        end = parser.parse(end_date) if end_date else datetime.utcnow()
+        start = parser.parse(start_date) if start_date else end - timedelta(days=1)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    history = SensorHistoryService.get_history(db, entity_id, start, end, resolution, home_id)
+    if not history["points"]:
+        raise HTTPException(status_code=404, detail="No history found for the specified entity and period")
+    return history
+
+@router.get("/forecast/accuracy")
+async def get_forecast_accuracy(
+    start_date: Optional[str] = Query(None, description="First target hour to score (defaults to 7 days ago)"),
+    end_date: Optional[str] = Query(None, description="Last target hour to score (defaults to now)"),
+    max_lead_hours: int = Query(48, ge=0, le=168, description="Longest lead time to report"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home whose forecast is scored"),
+    db: Session = Depends(get_db)
+):
+    """Temperature forecast error by lead time, against the measured outdoor temperature"""
+    try:
+        end = parser.parse(end_date) if end_date else datetime.utcnow()
+        start = parser.parse(start_date) if start_date else end - timedelta(days=7)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    home = get_home(home_id)
+    forecast_entity = home.forecast_entity if home else DEFAULT_FORECAST_ENTITY
+    actual_entity = home.temperature_entity if home else DEFAULT_TEMPERATURE_ENTITY
+
+    accuracy = ForecastAccuracyService.get_accuracy(
+        db, forecast_entity, actual_entity, start, end, max_lead_hours, home_id
+    )
+    if not accuracy["by_lead_hours"]:
+        raise HTTPException(status_code=404, detail="No forecast history overlaps measured temperatures in this period")
+    return accuracy
+
+@router.get("/facts/daily", response_model=List[dict])
+async def get_daily_facts(
+    request: Request,
+    start_date: Optional[str] = Query(None, description="First day to return"),
+    end_date: Optional[str] = Query(None, description="Last day to return"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home to return"),
+    db: Session = Depends(get_db)
+):
+    """Heating minutes, temperature averages, degree-days and power usage per day"""
+    media_type = negotiate(request)
     try:
-        # We need to get Home Assistant service instance
-        # For now, let's create a temporary instance to get latest readings
-        import os
-        ha_url = os.getenv("HOME_ASSISTANT_URL", "")
-        ha_token = os.getenv("HOME_ASSISTANT_TOKEN")
-
-        if not ha_url:
-            raise HTTPException(status_code=503, detail="Home Assistant integration not configured")
-
-        ha_service = HomeAssistantService(ha_url, ha_token)
-        latest_readings = ha_service.get_latest_readings(db)
-        latest_forecast = ha_service.get_latest_weather_forecast(db)
-        latest_power_usage = ha_service.get_latest_daily_power_usage(db)
-        daily_thermostat_stats = ha_service.get_daily_thermostat_stats(db)
-
-        dashboard_data = {
-            "sensor_readings": latest_readings,
-            "weather_forecast": latest_forecast,
-            "daily_power_usage": latest_power_usage,
-            "daily_thermostat_stats": daily_thermostat_stats
+        start = parser.parse(start_date).date() if start_date else None
+        end = parser.parse(end_date).date() if end_date else None
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+
+    facts = DailyFactsService.get_facts(db, start, end, home_id)
+    return negotiated_rows(media_type, facts) or facts
+
+def _build_dashboard(db: Session, ha_service: "HomeAssistantService") -> dict:
+    return {
+        "sensor_readings": ha_service.get_latest_readings(db),
+        "weather_forecast": ha_service.get_latest_weather_forecast(db),
+        "daily_power_usage": ha_service.get_latest_daily_power_usage(db),
+        "daily_thermostat_stats": ha_service.get_daily_thermostat_stats(db)
+    }
+
+def _ha_service_for_home(home_id: str) -> "HomeAssistantService":
+    # Imported on first use: httpx is only needed once Home Assistant is queried
+    from .home_assistant import HomeAssistantService
+
+    if not load_homes():
+        raise HTTPException(status_code=503, detail="Home Assistant integration not configured")
+
+    home = get_home(home_id)
+    if not home:
+        raise HTTPException(status_code=404, detail=f"Unknown home {home_id!r}")
+
+    return HomeAssistantService.from_config(home)
+
+@router.get("/homes")
+async def list_homes():
+    """List the configured Home Assistant homes"""
+    return [
+        {
+            "id": home.id,
+            "base_url": home.base_url,
+            "forecast_entity": home.forecast_entity,
+            "target_entities": home.target_entities
         }
+        for home in load_homes().values()
+    ]
 
-        return dashboard_data
+@router.get("/dashboard")
+async def get_dashboard_data(
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home to show"),
+    db: Session = Depends(get_db)
+):
+    """Get the latest sensor readings and weather forecast for the dashboard"""
+    ha_service = _ha_service_for_home(home_id)
+    try:
+        return _build_dashboard(db, ha_service)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving dashboard data: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving dashboard data: {str(e)}")
+
+@router.get("/dashboard/stream")
+async def stream_dashboard_data(
+    request: Request,
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home to stream"),
+    db: Session = Depends(get_db)
+):
+    """Stream dashboard updates as Server-Sent Events.
+
+    The first event is a full snapshot; after that the poller pushes
+    sensor_readings, weather_forecast and daily_power_usage deltas.
+    """
+    ha_service = _ha_service_for_home(home_id)
+    snapshot = _build_dashboard(db, ha_service)
+    queue = broadcaster.subscribe(home_id)
+
+    async def event_stream():
+        try:
+            yield format_sse("snapshot", snapshot)
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if message is RESYNC:
+                    resync_db = SessionLocal()
+                    try:
+                        yield format_sse("snapshot", _build_dashboard(resync_db, ha_service))
+                    finally:
+                        resync_db.close()
+                else:
+                    yield message
+        finally:
+            broadcaster.unsubscribe(queue, home_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/power-usage/backfill")
+async def backfill_daily_power_usage(
+    start_date: Optional[str] = Query(None, description="First date to backfill (defaults to the earliest stored date)"),
+    end_date: Optional[str] = Query(None, description="Last date to backfill (defaults to yesterday)"),
+    concurrency: int = Query(4, ge=1, le=16, description="Maximum number of days fetched in parallel"),
+    requests_per_second: float = Query(5.0, gt=0, le=50, description="Maximum Home Assistant requests per second"),
+    home_id: str = Query(DEFAULT_HOME_ID, description="Home to backfill"),
+    db: Session = Depends(get_db)
+):
+    """Start a background backfill of missing daily power usage dates"""
+    global _backfill_task
+
+    from .backfill import PowerUsageBackfill
+    ha_service = _ha_service_for_home(home_id)
+
+    if _backfill_task is not None and not _backfill_task.done():
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+
+    try:
+        start = parser.parse(start_date).date() if start_date else None
+        end = parser.parse(end_date).date() if end_date else None
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+    missing = PowerUsageBackfill.find_missing_dates(db, start, end, home_id)
+    backfill = PowerUsageBackfill(
+        ha_service,
+        concurrency=concurrency,
+        requests_per_second=requests_per_second
+    )
+    _backfill_task = asyncio.create_task(backfill.run(start, end))
+
+    return {
+        "status": "started",
+        "home_id": home_id,
+        "missing_dates": len(missing),
+        "first_missing": missing[0].isoformat() if missing else None,
+        "last_missing": missing[-1].isoformat() if missing else None
+    }
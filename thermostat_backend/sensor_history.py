@@ -0,0 +1,326 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .downsample import lttb
+from .models import DEFAULT_HOME_ID, SensorReading, SensorReadingRollup
+
+logger = logging.getLogger(__name__)
+
+# Rollup tiers (bucket width in seconds), finest first
+TIERS = (300, 3600)
+
+# History requests without an explicit resolution aim for about this many points
+DEFAULT_MAX_POINTS = 1000
+
+
+def parse_numeric(state: Optional[str]) -> Optional[float]:
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return None
+
+
+def bucket_start(timestamp: datetime, resolution: int) -> datetime:
+    epoch_seconds = int((timestamp - datetime(1970, 1, 1)).total_seconds())
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch_seconds - epoch_seconds % resolution)
+
+
+class Bucket:
+    """Running min/max/avg over numeric states plus the latest raw state"""
+
+    __slots__ = ("count", "min_value", "max_value", "total", "last_state")
+
+    def __init__(self):
+        self.count = 0
+        self.min_value = None
+        self.max_value = None
+        self.total = 0.0
+        self.last_state = None
+
+    def add(self, state: Optional[str]) -> None:
+        self.last_state = state
+        value = parse_numeric(state)
+        if value is None:
+            return
+        self.count += 1
+        self.total += value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+    @property
+    def avg_value(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def merge_into(self, rollup: SensorReadingRollup) -> None:
+        """Fold this bucket into an existing rollup row covering older samples"""
+        if self.count:
+            previous = rollup.sample_count or 0
+            previous_total = (rollup.avg_value or 0.0) * previous
+            rollup.sample_count = previous + self.count
+            rollup.avg_value = (previous_total + self.total) / rollup.sample_count
+            rollup.min_value = self.min_value if rollup.min_value is None else min(rollup.min_value, self.min_value)
+            rollup.max_value = self.max_value if rollup.max_value is None else max(rollup.max_value, self.max_value)
+        if self.last_state is not None:
+            rollup.last_state = self.last_state
+
+
+def _point(timestamp: datetime, avg_value, min_value, max_value, count: int, state) -> Dict[str, Any]:
+    return {
+        "timestamp": timestamp.isoformat(),
+        "avg": avg_value,
+        "min": min_value,
+        "max": max_value,
+        "count": count,
+        "state": state
+    }
+
+
+class SensorCompactor:
+    """Rolls raw sensor_readings older than the raw retention into 5-minute and hourly tiers.
+
+    Each batch of raw rows is merged into its rollup buckets and deleted in the
+    same transaction, so the job can stop at any point and resume later.
+    """
+
+    def __init__(self, raw_retention_days: int = 7, five_minute_retention_days: int = 90, batch_size: int = 2000):
+        self.raw_retention_days = raw_retention_days
+        self.five_minute_retention_days = five_minute_retention_days
+        self.batch_size = batch_size
+
+    def raw_cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """Compaction boundary, aligned to the coarsest tier so no bucket is split"""
+        now = now or datetime.utcnow()
+        return bucket_start(now - timedelta(days=self.raw_retention_days), TIERS[-1])
+
+    def compact_batch(self, db: Session, cutoff: datetime) -> int:
+        """Roll up and delete one batch of raw rows older than cutoff; returns rows compacted"""
+        rows = db.query(SensorReading).filter(
+            SensorReading.timestamp < cutoff
+        ).order_by(SensorReading.timestamp, SensorReading.id).limit(self.batch_size).all()
+        if not rows:
+            return 0
+
+        buckets: Dict[Tuple[str, str, int, datetime], Bucket] = {}
+        for row in rows:
+            for resolution in TIERS:
+                key = (row.home_id, row.entity_id, resolution, bucket_start(row.timestamp, resolution))
+                buckets.setdefault(key, Bucket()).add(row.state)
+
+        # Buckets at the edges of the batch may already hold samples from the previous batch
+        existing = db.query(SensorReadingRollup).filter(
+            SensorReadingRollup.home_id.in_({key[0] for key in buckets}),
+            SensorReadingRollup.entity_id.in_({key[1] for key in buckets}),
+            SensorReadingRollup.bucket_start >= min(key[3] for key in buckets),
+            SensorReadingRollup.bucket_start <= max(key[3] for key in buckets)
+        ).all()
+        existing_by_key = {(r.home_id, r.entity_id, r.resolution, r.bucket_start): r for r in existing}
+
+        for key, bucket in buckets.items():
+            rollup = existing_by_key.get(key)
+            if rollup is None:
+                rollup = SensorReadingRollup(
+                    home_id=key[0],
+                    entity_id=key[1],
+                    resolution=key[2],
+                    bucket_start=key[3],
+                    sample_count=0
+                )
+                db.add(rollup)
+            bucket.merge_into(rollup)
+
+        db.query(SensorReading).filter(
+            SensorReading.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        db.commit()
+        return len(rows)
+
+    def purge_batch(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Delete one batch of 5-minute rollups past their retention; hourly rollups are kept"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=self.five_minute_retention_days)
+        ids = [
+            row.id for row in db.query(SensorReadingRollup.id).filter(
+                SensorReadingRollup.resolution == TIERS[0],
+                SensorReadingRollup.bucket_start < cutoff
+            ).limit(self.batch_size).all()
+        ]
+        if not ids:
+            return 0
+
+        db.query(SensorReadingRollup).filter(SensorReadingRollup.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        return len(ids)
+
+    async def run_once(self) -> int:
+        """Compact everything past the raw retention, yielding to the event loop between batches"""
+        cutoff = self.raw_cutoff()
+        compacted = 0
+        db = SessionLocal()
+        try:
+            while True:
+                count = self.compact_batch(db, cutoff)
+                if not count:
+                    break
+                compacted += count
+                await asyncio.sleep(0)
+
+            while self.purge_batch(db):
+                await asyncio.sleep(0)
+        except Exception as e:
+            logger.error(f"Error compacting sensor history: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        if compacted:
+            logger.info(f"Compacted {compacted} raw sensor readings older than {cutoff}")
+        return compacted
+
+    async def run_periodically(self, interval_seconds: int = 3600) -> None:
+        while True:
+            await self.run_once()
+            await asyncio.sleep(interval_seconds)
+
+
+class SensorHistoryService:
+    @staticmethod
+    def choose_resolution(requested: int) -> int:
+        """Coarsest tier that is still at least as fine as requested (0 means raw samples)"""
+        resolution = 0
+        for tier in TIERS:
+            if tier <= requested:
+                resolution = tier
+        return resolution
+
+    @staticmethod
+    def _rollup_points(
+        db: Session,
+        home_id: str,
+        entity_id: str,
+        resolution: int,
+        start: datetime,
+        end: datetime
+    ) -> Dict[datetime, Dict[str, Any]]:
+        rows = db.query(SensorReadingRollup).filter(
+            SensorReadingRollup.home_id == home_id,
+            SensorReadingRollup.entity_id == entity_id,
+            SensorReadingRollup.resolution == resolution,
+            SensorReadingRollup.bucket_start >= bucket_start(start, resolution),
+            SensorReadingRollup.bucket_start <= end
+        ).order_by(SensorReadingRollup.bucket_start).all()
+        return {
+            row.bucket_start: _point(row.bucket_start, row.avg_value, row.min_value, row.max_value, row.sample_count, row.last_state)
+            for row in rows
+        }
+
+    @staticmethod
+    def get_history(
+        db: Session,
+        entity_id: str,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[int] = None,
+        home_id: str = DEFAULT_HOME_ID
+    ) -> Dict[str, Any]:
+        """History for one entity, read from the coarsest tier that meets the requested resolution.
+
+        Recent, not yet compacted samples are bucketed on the fly. Periods before
+        the chosen tier's data begins (e.g. 5-minute rollups already purged) are
+        filled from the next coarser tier.
+        """
+        if resolution is None:
+            resolution = int((end - start).total_seconds() // DEFAULT_MAX_POINTS)
+        tier = SensorHistoryService.choose_resolution(resolution)
+
+        raw_rows = db.query(SensorReading).filter(
+            SensorReading.home_id == home_id,
+            SensorReading.entity_id == entity_id,
+            SensorReading.timestamp >= start,
+            SensorReading.timestamp <= end
+        ).order_by(SensorReading.timestamp).all()
+
+        if tier == 0:
+            points: Dict[datetime, Dict[str, Any]] = {}
+            for row in raw_rows:
+                value = parse_numeric(row.state)
+                points[row.timestamp] = _point(row.timestamp, value, value, value, 1 if value is not None else 0, row.state)
+        else:
+            points = SensorHistoryService._rollup_points(db, home_id, entity_id, tier, start, end)
+            buckets: Dict[datetime, Bucket] = {}
+            for row in raw_rows:
+                buckets.setdefault(bucket_start(row.timestamp, tier), Bucket()).add(row.state)
+            for key, bucket in buckets.items():
+                if key in points:
+                    # Bucket straddling the compaction boundary: merge rollup and raw samples
+                    merged = SensorReadingRollup(
+                        sample_count=points[key]["count"],
+                        avg_value=points[key]["avg"],
+                        min_value=points[key]["min"],
+                        max_value=points[key]["max"],
+                        last_state=points[key]["state"]
+                    )
+                    bucket.merge_into(merged)
+                    points[key] = _point(key, merged.avg_value, merged.min_value, merged.max_value, merged.sample_count, merged.last_state)
+                else:
+                    points[key] = _point(key, bucket.avg_value, bucket.min_value, bucket.max_value, bucket.count, bucket.last_state)
+
+        boundary = min(points) if points else end
+        for coarser in (t for t in TIERS if t > tier):
+            if boundary <= start:
+                break
+            older = SensorHistoryService._rollup_points(db, home_id, entity_id, coarser, start, boundary - timedelta(microseconds=1))
+            if older:
+                points.update(older)
+                boundary = min(older)
+
+        return {
+            "home_id": home_id,
+            "entity_id": entity_id,
+            "resolution": tier,
+            "points": [points[key] for key in sorted(points)]
+        }
+
+    @staticmethod
+    def get_downsampled(
+        db: Session,
+        entity_id: str,
+        start: datetime,
+        end: datetime,
+        max_points: int = DEFAULT_MAX_POINTS,
+        home_id: str = DEFAULT_HOME_ID
+    ) -> Dict[str, Any]:
+        """Numeric history for charts: the finest stored data, reduced to max_points with LTTB.
+
+        Raw samples are used while retained, older periods come from the
+        rollup tiers (their averages); non-numeric states are dropped.
+        """
+        history = SensorHistoryService.get_history(db, entity_id, start, end, 0, home_id)
+        timestamps = []
+        values = []
+        for point in history["points"]:
+            if point["avg"] is not None:
+                timestamps.append(point["timestamp"])
+                values.append(point["avg"])
+
+        epoch = datetime(1970, 1, 1)
+        x = [(datetime.fromisoformat(timestamp) - epoch).total_seconds() for timestamp in timestamps]
+        keep = lttb(x, values, max_points)
+        return {
+            "entity_id": entity_id,
+            "source_points": len(values),
+            "timestamps": [timestamps[i] for i in keep],
+            "values": [values[i] for i in keep]
+        }
+
+
+def compactor_from_env() -> SensorCompactor:
+    return SensorCompactor(
+        raw_retention_days=int(os.getenv("SENSOR_RAW_RETENTION_DAYS", "7")),
+        five_minute_retention_days=int(os.getenv("SENSOR_5MIN_RETENTION_DAYS", "90"))
+    )
@@ -1,12 +1,87 @@
+import heapq
+import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from .models import Status
 from .schemas import StatsSummary, HourlyData, DailyData, MonthlyData
+from .stats_index import statistics_index, summarize_query, combine, Summary, EMPTY_SUMMARY
+from .analytic_store import get_store
+from .duckdb_engine import get_duckdb_engine
+from .archive import get_archive
+from .partitions import get_partitions
+from .heating_model import heating_model
+from .daily_facts import DailyFactsService
+from .cache import cached_result, get_result_cache, period_range, day_range, month_range, year_range
 from datetime import datetime, timedelta
 from dateutil import parser
 from typing import List, Optional
 
+logger = logging.getLogger(__name__)
+
+# Columns the aggregate methods need when reading archived partitions
+AGGREGATE_COLUMNS = ["start_time", "minutes_heating", "average_indoor_temp", "average_outdoor_temp"]
+
 class StatusService:
+    @staticmethod
+    def _fetch_statuses(
+        db: Session,
+        start_min: Optional[str] = None,
+        start_max: Optional[str] = None,
+        end_max: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Status]:
+        """Statuses matching a start/end range from SQLite, its year partitions and the archive, ordered by start_time"""
+        filters = []
+        if start_min:
+            filters.append(Status.start_time >= start_min)
+        if start_max:
+            filters.append(Status.start_time <= start_max)
+        if end_max:
+            filters.append(Status.end_time <= end_max)
+
+        def matching(session: Session) -> List[Status]:
+            return session.query(Status).filter(*filters).order_by(Status.start_time).all()
+
+        statuses = matching(db)
+
+        partitions = get_partitions()
+        if partitions is not None:
+            partitioned = [
+                status for rows in partitions.each(matching, start_min, start_max or end_max) for status in rows
+            ]
+            if partitioned:
+                statuses = sorted(partitioned + statuses, key=lambda status: status.start_time)
+
+        archive = get_archive()
+        if archive is not None:
+            # Rows still in SQLite while their month is archived come from SQLite only
+            in_database = [status.id for status in statuses]
+            archived = archive.read_statuses(start_min, start_max, end_max, columns, exclude_ids=in_database)
+            if archived:
+                statuses = sorted(archived + statuses, key=lambda status: status.start_time)
+        return statuses
+
+    @staticmethod
+    def _raw_summary(db: Session, start_min: str, end_max: str, start_before: Optional[str] = None) -> Summary:
+        """Aggregate raw rows from SQLite, its year partitions and the archive into a summary"""
+        filters = [Status.start_time >= start_min, Status.end_time <= end_max]
+        if start_before:
+            filters.append(Status.start_time < start_before)
+        def summarize(session: Session) -> Summary:
+            return summarize_query(session.query(Status).filter(*filters))
+
+        summary = summarize(db)
+
+        partitions = get_partitions()
+        if partitions is not None:
+            for partition_summary in partitions.each(summarize, start_min, end_max):
+                summary = combine(summary, partition_summary)
+
+        archive = get_archive()
+        if archive is not None:
+            exclude_ids = archive.ids_in_database(db, start_min, end_max)
+            summary = combine(summary, archive.summarize(start_min, end_max, start_before, exclude_ids))
+        return summary
+
     @staticmethod
     def get_statuses_by_date(db: Session, date: str) -> List[Status]:
         try:
@@ -14,12 +89,7 @@ class StatusService:
             start_of_day = target_date.strftime("%Y-%m-%d 00:00:00.000000")
             end_of_day = target_date.strftime("%Y-%m-%d 23:59:59.999999")
 
-            return db.query(Status).filter(
-                and_(
-                    Status.start_time >= start_of_day,
-                    Status.start_time <= end_of_day
-                )
-            ).order_by(Status.start_time).all()
+            return StatusService._fetch_statuses(db, start_min=start_of_day, start_max=end_of_day)
         except Exception:
             return []
 
@@ -32,70 +102,148 @@ class StatusService:
             start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
             end_str = end_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
 
-            return db.query(Status).filter(
-                and_(
-                    Status.start_time >= start_str,
-                    Status.end_time <= end_str
-                )
-            ).order_by(Status.start_time).all()
+            return StatusService._fetch_statuses(db, start_min=start_str, end_max=end_str)
         except Exception:
             return []
 
     @staticmethod
+    def get_all_statuses(db: Session, limit: int = 100, offset: int = 0) -> List[Status]:
+        """Page through all statuses (SQLite, year partitions and archive) in id order"""
+        archive = get_archive()
+        partitions = get_partitions()
+        if archive is None and partitions is None:
+            return db.query(Status).order_by(Status.id).offset(offset).limit(limit).all()
+
+        # Take the first offset + limit rows of each source and merge them by id
+        window = offset + limit
+
+        def first_rows(session: Session) -> List[Status]:
+            return session.query(Status).order_by(Status.id).limit(window).all()
+
+        sources = [first_rows(db)]
+        if partitions is not None:
+            sources.extend(partitions.each(first_rows))
+        if archive is not None:
+            sources.append(archive.first_by_id(window))
+
+        # A row mid-archival is in SQLite and the archive; the merge puts the SQLite copy first
+        merged = []
+        for status in heapq.merge(*sources, key=lambda status: status.id):
+            if not merged or merged[-1].id != status.id:
+                merged.append(status)
+        return merged[offset:window]
+
+    @staticmethod
+    @cached_result(period_range)
     def get_statistics(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> StatsSummary:
-        query = db.query(Status)
+        engine = get_duckdb_engine()
+        store = get_store()
+        if engine is not None or store is not None:
+            start_dt = end_dt = None
+            if start_date and end_date:
+                try:
+                    start_dt = parser.parse(start_date)
+                    end_dt = parser.parse(end_date)
+                except Exception:
+                    start_dt = end_dt = None
+            if engine is not None:
+                try:
+                    return engine.get_statistics(db, start_dt, end_dt)
+                except Exception as e:
+                    logger.warning(f"DuckDB statistics failed, falling back: {e}")
+            if store is not None:
+                return store.get_statistics(start_dt, end_dt)
+
+        statistics_index.ensure_current(db)
+        summary = None
 
         if start_date and end_date:
             try:
                 start_dt = parser.parse(start_date)
                 end_dt = parser.parse(end_date)
-                start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
-                end_str = end_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
-
-                query = query.filter(
-                    and_(
-                        Status.start_time >= start_str,
-                        Status.end_time <= end_str
-                    )
-                )
+                summary = StatusService._range_summary(db, start_dt, end_dt)
             except Exception:
                 pass
 
-        stats = query.with_entities(
-            func.count(Status.id).label('total_records'),
-            func.sum(Status.minutes_heating).label('total_heating_minutes'),
-            func.avg(Status.average_indoor_temp).label('avg_indoor_temp'),
-            func.avg(Status.average_outdoor_temp).label('avg_outdoor_temp'),
-            func.min(Status.average_indoor_temp).label('min_indoor_temp'),
-            func.max(Status.average_indoor_temp).label('max_indoor_temp'),
-            func.min(Status.average_outdoor_temp).label('min_outdoor_temp'),
-            func.max(Status.average_outdoor_temp).label('max_outdoor_temp')
-        ).first()
+        if summary is None:
+            summary = statistics_index.total()
+
+        count, heating, indoor_sum, outdoor_sum, indoor_min, indoor_max, outdoor_min, outdoor_max = summary
+        if not count:
+            return StatsSummary(
+                total_records=0,
+                total_heating_minutes=0,
+                avg_indoor_temp=0,
+                avg_outdoor_temp=0,
+                min_indoor_temp=0,
+                max_indoor_temp=0,
+                min_outdoor_temp=0,
+                max_outdoor_temp=0
+            )
 
         return StatsSummary(
-            total_records=stats.total_records or 0,
-            total_heating_minutes=stats.total_heating_minutes or 0,
-            avg_indoor_temp=round(stats.avg_indoor_temp or 0, 2),
-            avg_outdoor_temp=round(stats.avg_outdoor_temp or 0, 2),
-            min_indoor_temp=stats.min_indoor_temp or 0,
-            max_indoor_temp=stats.max_indoor_temp or 0,
-            min_outdoor_temp=stats.min_outdoor_temp or 0,
-            max_outdoor_temp=stats.max_outdoor_temp or 0
+            total_records=count,
+            total_heating_minutes=heating,
+            avg_indoor_temp=round(indoor_sum / count, 2),
+            avg_outdoor_temp=round(outdoor_sum / count, 2),
+            min_indoor_temp=indoor_min,
+            max_indoor_temp=indoor_max,
+            min_outdoor_temp=outdoor_min,
+            max_outdoor_temp=outdoor_max
         )
 
     @staticmethod
+    def _range_summary(db: Session, start_dt: datetime, end_dt: datetime) -> Summary:
+        """Summary of statuses with start_time >= start_dt and end_time <= end_dt.
+
+        Whole days inside the range come from the statistics index; the partial
+        days at either edge are aggregated from raw rows.
+        """
+        start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        end_str = end_dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        if start_str > end_str:
+            return EMPTY_SUMMARY
+
+        first_full = start_dt.date()
+        if start_dt.time() != datetime.min.time():
+            first_full += timedelta(days=1)
+
+        # A day is whole if every status starting that day also ends by end_dt
+        last_full = end_dt.date()
+        while last_full >= first_full and (statistics_index.max_end_time(last_full) or "") > end_str:
+            last_full -= timedelta(days=1)
+
+        if first_full > last_full:
+            return StatusService._raw_summary(db, start_str, end_str)
+
+        summary = statistics_index.query(first_full, last_full)
+
+        head_end = first_full.strftime("%Y-%m-%d 00:00:00.000000")
+        if start_str < head_end:
+            summary = combine(summary, StatusService._raw_summary(db, start_str, end_str, start_before=head_end))
+
+        tail_start = (last_full + timedelta(days=1)).strftime("%Y-%m-%d 00:00:00.000000")
+        if tail_start <= end_str:
+            summary = combine(summary, StatusService._raw_summary(db, tail_start, end_str))
+
+        return summary
+
+    @staticmethod
+    @cached_result(day_range)
     def get_hourly_data_by_date(db: Session, date: str) -> List[HourlyData]:
         try:
             target_date = parser.parse(date).date()
+
+            store = get_store()
+            if store is not None:
+                return store.get_hourly_data(datetime.combine(target_date, datetime.min.time()))
+
             start_of_day = target_date.strftime("%Y-%m-%d 00:00:00.000000")
             end_of_day = target_date.strftime("%Y-%m-%d 23:59:59.999999")
 
-            statuses = db.query(Status).filter(
-                and_(
-                    Status.start_time >= start_of_day,
-                    Status.start_time <= end_of_day
-                )
-            ).order_by(Status.start_time).all()
+            statuses = StatusService._fetch_statuses(
+                db, start_min=start_of_day, start_max=end_of_day, columns=AGGREGATE_COLUMNS
+            )
 
             hourly_data = {}
             for status in statuses:
@@ -140,20 +288,22 @@ class StatusService:
             return []
 
     @staticmethod
+    @cached_result(month_range)
     def get_daily_data_by_month(db: Session, year: int, month: int) -> List[DailyData]:
         try:
             from calendar import monthrange
 
+            store = get_store()
+            if store is not None:
+                return store.get_daily_data(year, month)
+
             start_of_month = datetime(year, month, 1).strftime("%Y-%m-%d 00:00:00.000000")
             _, last_day = monthrange(year, month)
             end_of_month = datetime(year, month, last_day, 23, 59, 59, 999999).strftime("%Y-%m-%d %H:%M:%S.%f")
 
-            statuses = db.query(Status).filter(
-                and_(
-                    Status.start_time >= start_of_month,
-                    Status.start_time <= end_of_month
-                )
-            ).order_by(Status.start_time).all()
+            statuses = StatusService._fetch_statuses(
+                db, start_min=start_of_month, start_max=end_of_month, columns=AGGREGATE_COLUMNS
+            )
 
             daily_data = {}
             for status in statuses:
@@ -197,17 +347,26 @@ class StatusService:
             return []
 
     @staticmethod
+    @cached_result(year_range)
     def get_monthly_data_by_year(db: Session, year: int) -> List[MonthlyData]:
         try:
+            engine = get_duckdb_engine()
+            if engine is not None:
+                try:
+                    return engine.get_monthly_data(db, year)
+                except Exception as e:
+                    logger.warning(f"DuckDB monthly data failed, falling back: {e}")
+
+            store = get_store()
+            if store is not None:
+                return store.get_monthly_data(year)
+
             start_of_year = datetime(year, 1, 1).strftime("%Y-%m-%d 00:00:00.000000")
             end_of_year = datetime(year, 12, 31, 23, 59, 59, 999999).strftime("%Y-%m-%d %H:%M:%S.%f")
 
-            statuses = db.query(Status).filter(
-                and_(
-                    Status.start_time >= start_of_year,
-                    Status.start_time <= end_of_year
-                )
-            ).order_by(Status.start_time).all()
+            statuses = StatusService._fetch_statuses(
+                db, start_min=start_of_year, start_max=end_of_year, columns=AGGREGATE_COLUMNS
+            )
 
             monthly_data = {}
             for status in statuses:
@@ -250,10 +409,98 @@ class StatusService:
         except Exception:
             return []
 
+    @staticmethod
+    @cached_result(period_range)
+    def get_heating_efficiency(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
+        engine = get_duckdb_engine()
+        if engine is not None:
+            try:
+                if start_date and end_date:
+                    try:
+                        start_dt, end_dt = parser.parse(start_date), parser.parse(end_date)
+                    except Exception:
+                        return []
+                    return engine.get_heating_efficiency(db, start_dt, end_dt)
+                return engine.get_heating_efficiency(db)
+            except Exception as e:
+                logger.warning(f"DuckDB heating efficiency failed, falling back: {e}")
+
+        store = get_store()
+        if store is not None:
+            if start_date and end_date:
+                try:
+                    return store.get_heating_efficiency(parser.parse(start_date), parser.parse(end_date))
+                except Exception:
+                    return []
+            return store.get_heating_efficiency()
+
+        if start_date and end_date:
+            statuses = StatusService.get_statuses_by_period(db, start_date, end_date)
+        else:
+            statuses = StatusService._fetch_statuses(db)
+
+        efficiency_data = []
+        for status in statuses:
+            temp_diff = status.average_indoor_temp - status.average_outdoor_temp
+            efficiency = status.minutes_heating / temp_diff if temp_diff > 0 else 0
+
+            efficiency_data.append({
+                "id": status.id,
+                "start_time": status.start_time,
+                "temperature_difference": round(temp_diff, 2),
+                "heating_minutes": status.minutes_heating,
+                "heating_efficiency": round(efficiency, 2)
+            })
+
+        return efficiency_data
+
     @staticmethod
     def create_status(db: Session, status_data: dict) -> Status:
         status = Status(**status_data)
         db.add(status)
+        DailyFactsService.add_statuses(db, [status])
         db.commit()
         db.refresh(status)
-        return status
\ No newline at end of file
+        StatusService._after_insert(db, [status])
+        return status
+
+    @staticmethod
+    def create_statuses(db: Session, statuses_data: List[dict]) -> List[Status]:
+        """Insert several statuses in one transaction (committing anything else pending in db too)"""
+        statuses = StatusService.insert_statuses(db, statuses_data)
+        StatusService._after_insert(db, statuses)
+        return statuses
+
+    @staticmethod
+    def insert_statuses(db: Session, statuses_data: List[dict]) -> List[Status]:
+        """Insert and commit statuses in one transaction without updating derived data"""
+        statuses = [Status(**status_data) for status_data in statuses_data]
+        db.add_all(statuses)
+        DailyFactsService.add_statuses(db, statuses)
+        db.flush()
+        # Ids are assigned by the flush; detached rows aren't expired by the commit, so no per-row refresh is needed
+        for status in statuses:
+            db.expunge(status)
+        db.commit()
+        return statuses
+
+    @staticmethod
+    def after_insert_logged(db: Session, statuses: List[Status]) -> None:
+        """_after_insert for committed rows whose writers must not see its failure as a failed write"""
+        try:
+            StatusService._after_insert(db, statuses)
+        except Exception as e:
+            logger.error(f"Updating derived data for {len(statuses)} committed statuses failed: {e}")
+
+    @staticmethod
+    def _after_insert(db: Session, statuses: List[Status]) -> None:
+        """Keep in-memory derived data current after statuses are committed"""
+        statistics_index.add(statuses)
+        heating_model.add(statuses)
+
+        store = get_store()
+        if store is not None:
+            store.append(db, statuses)
+
+        # Last, so results recomputed from here on see every structure updated above
+        get_result_cache().invalidate_statuses(statuses)
\ No newline at end of file
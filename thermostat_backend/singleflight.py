@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+from .database import worker_session
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one execution.
+
+    The first caller for a key starts the computation in a worker thread;
+    callers arriving while it runs await the same result (or exception)
+    instead of starting their own. The key is forgotten as soon as the call
+    finishes, so later callers always get fresh data; nothing is cached.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one client disconnecting doesn't cancel the call for everyone sharing it
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight call {key!r} failed: {task.exception()!r}")
+
+    async def query(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(db, *args) once per key with a worker-thread session"""
+        return await self.do(key, _with_session, fn, *args)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"in_flight": len(self._calls), "executions": self.executions, "coalesced": self.coalesced}
+
+
+def _with_session(fn: Callable[..., Any], *args: Any) -> Any:
+    with worker_session() as db:
+        return fn(db, *args)
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,269 @@
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import Status
+
+logger = logging.getLogger(__name__)
+
+# Summary tuple layout:
+# (count, heating_minutes, indoor_sum, outdoor_sum, indoor_min, indoor_max, outdoor_min, outdoor_max)
+Summary = Tuple[int, int, float, float, float, float, float, float]
+
+EMPTY_SUMMARY: Summary = (0, 0, 0.0, 0.0, float("inf"), float("-inf"), float("inf"), float("-inf"))
+
+
+def combine(a: Summary, b: Summary) -> Summary:
+    """Merge two summaries (associative, EMPTY_SUMMARY is the identity)"""
+    return (
+        a[0] + b[0],
+        a[1] + b[1],
+        a[2] + b[2],
+        a[3] + b[3],
+        min(a[4], b[4]),
+        max(a[5], b[5]),
+        min(a[6], b[6]),
+        max(a[7], b[7])
+    )
+
+
+def summarize_status(status: Status) -> Summary:
+    indoor = status.average_indoor_temp
+    outdoor = status.average_outdoor_temp
+    return (1, status.minutes_heating, indoor, outdoor, indoor, indoor, outdoor, outdoor)
+
+
+def summarize_query(query) -> Summary:
+    """Aggregate a Status query into a summary with a single SQL statement"""
+    row = query.with_entities(
+        func.count(Status.id),
+        func.sum(Status.minutes_heating),
+        func.sum(Status.average_indoor_temp),
+        func.sum(Status.average_outdoor_temp),
+        func.min(Status.average_indoor_temp),
+        func.max(Status.average_indoor_temp),
+        func.min(Status.average_outdoor_temp),
+        func.max(Status.average_outdoor_temp)
+    ).first()
+
+    if not row or not row[0]:
+        return EMPTY_SUMMARY
+    return (row[0], row[1] or 0, row[2] or 0.0, row[3] or 0.0, row[4], row[5], row[6], row[7])
+
+
+class SegmentTree:
+    """Fixed-capacity segment tree of summaries with point updates and range queries"""
+
+    def __init__(self, values: List[Summary]):
+        size = 1
+        while size < max(1, len(values)):
+            size *= 2
+        self.size = size
+        self.tree: List[Summary] = [EMPTY_SUMMARY] * (2 * size)
+        self.tree[size:size + len(values)] = values
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = combine(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def add(self, index: int, value: Summary) -> None:
+        i = index + self.size
+        self.tree[i] = combine(self.tree[i], value)
+        i //= 2
+        while i:
+            self.tree[i] = combine(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def query(self, lo: int, hi: int) -> Summary:
+        """Combine leaves lo..hi (inclusive)"""
+        result = EMPTY_SUMMARY
+        lo += self.size
+        hi += self.size + 1
+        while lo < hi:
+            if lo & 1:
+                result = combine(result, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = combine(result, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return result
+
+    def total(self) -> Summary:
+        return self.tree[1]
+
+
+class StatisticsIndex:
+    """Per-day status summaries with a segment tree for O(log n) range statistics.
+
+    Days are keyed by the date of start_time. Built lazily from one GROUP BY
+    query, then kept current by add() and by catching up on rows with a higher
+    id than the last one seen (rows written by other processes).
+    """
+
+    # Days reserved past the last known day so new inserts rarely force a rebuild
+    GROWTH_DAYS = 366
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tree: Optional[SegmentTree] = None
+        self._base_day: Optional[date] = None
+        self._day_count = 0
+        self._max_end: dict = {}
+        # Highest id known to be folded in, plus ids above it that were added locally
+        self.max_id = 0
+        self._added_ids: set = set()
+
+    @property
+    def is_built(self) -> bool:
+        return self._tree is not None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tree = None
+            self._base_day = None
+            self._day_count = 0
+            self._max_end = {}
+            self.max_id = 0
+            self._added_ids = set()
+
+    def build(self, db: Session) -> None:
+        from .partitions import get_partitions
+
+        day_column = func.substr(Status.start_time, 1, 10)
+
+        def daily_rows(session: Session) -> list:
+            return session.query(
+                day_column,
+                func.count(Status.id),
+                func.sum(Status.minutes_heating),
+                func.sum(Status.average_indoor_temp),
+                func.sum(Status.average_outdoor_temp),
+                func.min(Status.average_indoor_temp),
+                func.max(Status.average_indoor_temp),
+                func.min(Status.average_outdoor_temp),
+                func.max(Status.average_outdoor_temp),
+                func.max(Status.end_time),
+                func.max(Status.id)
+            ).group_by(day_column).all()
+
+        rows = daily_rows(db)
+        max_id = max((row[10] or 0 for row in rows), default=0)
+
+        partitions = get_partitions()
+        if partitions is not None:
+            # A day can be split between its year partition and late arrivals still in SQLite
+            for partition_rows in partitions.each(daily_rows):
+                rows = rows + partition_rows
+
+        days = {}
+        max_end = {}
+        for row in rows:
+            try:
+                day = date.fromisoformat(row[0])
+            except (TypeError, ValueError):
+                logger.warning(f"Skipping statuses with unparseable start_time prefix {row[0]!r}")
+                continue
+            days[day] = combine(days.get(day, EMPTY_SUMMARY), tuple(row[1:9]))
+            max_end[day] = max(max_end.get(day) or "", row[9] or "")
+
+        from .archive import get_archive
+        archive = get_archive()
+        if archive is not None:
+            # Archived months are part of the dataset even though they left SQLite; rows
+            # still in SQLite mid-archival were counted above
+            for day, (summary, day_max_end) in archive.daily_summaries(archive.ids_in_database(db)).items():
+                days[day] = combine(days.get(day, EMPTY_SUMMARY), summary)
+                max_end[day] = max(max_end.get(day) or "", day_max_end or "")
+
+        with self._lock:
+            self._load(days, max_end)
+            self.max_id = max_id
+            self._added_ids = set()
+        logger.info(f"Statistics index built over {len(days)} days")
+
+    def _load(self, days: dict, max_end: dict) -> None:
+        if days:
+            base_day = min(days)
+            last_day = max(days)
+        else:
+            base_day = last_day = date.today()
+
+        day_count = (last_day - base_day).days + 1 + self.GROWTH_DAYS
+        values = [EMPTY_SUMMARY] * day_count
+        for day, summary in days.items():
+            values[(day - base_day).days] = summary
+
+        self._tree = SegmentTree(values)
+        self._base_day = base_day
+        self._day_count = day_count
+        self._max_end = max_end
+
+    def _leaves(self) -> dict:
+        days = {}
+        for offset in range(self._day_count):
+            summary = self._tree.tree[self._tree.size + offset]
+            if summary[0]:
+                days[self._base_day + timedelta(days=offset)] = summary
+        return days
+
+    def add(self, statuses: Iterable[Status]) -> None:
+        """Fold newly inserted statuses into the index (no-op until built)"""
+        with self._lock:
+            if self._tree is None:
+                return
+            for status in statuses:
+                if status.id is not None and (status.id <= self.max_id or status.id in self._added_ids):
+                    continue
+                try:
+                    day = date.fromisoformat(status.start_time[:10])
+                except (TypeError, ValueError):
+                    continue
+
+                offset = (day - self._base_day).days
+                if offset < 0 or offset >= self._day_count:
+                    days = self._leaves()
+                    days[day] = EMPTY_SUMMARY
+                    self._load(days, self._max_end)
+                    offset = (day - self._base_day).days
+
+                self._tree.add(offset, summarize_status(status))
+                if status.end_time > (self._max_end.get(day) or ""):
+                    self._max_end[day] = status.end_time
+                if status.id is not None:
+                    self._added_ids.add(status.id)
+
+    def ensure_current(self, db: Session) -> None:
+        """Build the index on first use and catch up on rows inserted elsewhere"""
+        if self._tree is None:
+            self.build(db)
+            return
+
+        latest_id = db.query(func.max(Status.id)).scalar() or 0
+        if latest_id > self.max_id:
+            self.add(db.query(Status).filter(Status.id > self.max_id).order_by(Status.id).all())
+            with self._lock:
+                self.max_id = latest_id
+                self._added_ids = {i for i in self._added_ids if i > latest_id}
+
+    def max_end_time(self, day: date) -> Optional[str]:
+        return self._max_end.get(day)
+
+    def query(self, first_day: date, last_day: date) -> Summary:
+        """Summary of all statuses starting on first_day..last_day (inclusive)"""
+        with self._lock:
+            lo = max((first_day - self._base_day).days, 0)
+            hi = min((last_day - self._base_day).days, self._day_count - 1)
+            if lo > hi:
+                return EMPTY_SUMMARY
+            return self._tree.query(lo, hi)
+
+    def total(self) -> Summary:
+        with self._lock:
+            return self._tree.total()
+
+
+statistics_index = StatisticsIndex()